@@ -0,0 +1,54 @@
+# scripts/archive_meetings.py
+"""
+Архивация листа Meetings по месяцам.
+
+python scripts/archive_meetings.py                 # оставить в Meetings текущий и прошлый месяц
+python scripts/archive_meetings.py --keep-months 0 # оставить только текущий месяц
+python scripts/archive_meetings.py --dry-run       # только показать, что будет перенесено
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from datetime import date, datetime
+
+import pytz
+
+# --- fix imports when running directly ---
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.config import TZ
+from src.sheets.managers_repo import archive_meetings_before
+
+
+def _cutoff(keep_months: int) -> date:
+    today = datetime.now(pytz.timezone(TZ)).date()
+    y, m = today.year, today.month - keep_months
+    while m < 1:
+        m += 12
+        y -= 1
+    return date(y, m, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move past Meetings rows into monthly worksheets")
+    parser.add_argument("--keep-months", type=int, default=1, help="сколько прошлых месяцев оставить в Meetings")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    cutoff = _cutoff(max(0, args.keep_months))
+    summary = archive_meetings_before(cutoff, dry_run=args.dry_run)
+
+    prefix = "DRY RUN: would move" if args.dry_run else "Moved"
+    if not summary:
+        print(f"Nothing to archive before {cutoff:%d.%m.%Y}")
+        return
+    for title, n in summary.items():
+        print(f"{prefix} {n} row(s) -> {title}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# scripts/export_meetings.py
+"""
+Потоковая выгрузка встреч в CSV / JSONL.
+
+python scripts/export_meetings.py --out meetings.csv                      # всё
+python scripts/export_meetings.py --out m.jsonl --from 01.09 --to 30.09   # период (ДД.ММ[.ГГГГ])
+python scripts/export_meetings.py --out new.jsonl --cursor data/export_cursor.json
+    # только новые и изменённые с прошлого запуска с тем же --cursor (для ночных задач);
+    # последние EXPORT_CURSOR_OVERLAP секунд (по умолчанию час) выгружаются повторно
+
+Без --out — в stdout. Файл пишется во временный и подменяется целиком, курсор сохраняется
+только после успешной выгрузки: упавший запуск можно просто повторить.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+# --- fix imports when running directly ---
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.config import EXPORT_CURSOR_OVERLAP
+from src.flows.export import EXPORT_FORMATS, export_meetings, export_repository, load_cursor, save_cursor
+from src.utils.dt import parse_date_input
+from src.utils.retry import format_retry_metrics
+
+
+def _day(value: str):
+    parsed = parse_date_input(value)
+    if not parsed:
+        raise argparse.ArgumentTypeError(f"не понял дату «{value}» (пример: 05.02 или 05.02.2026)")
+    return datetime.strptime(parsed, "%d.%m.%Y").date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream meetings to CSV / JSONL")
+    parser.add_argument("--out", default="-", help="файл (по умолчанию stdout)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="по умолчанию — по расширению --out, иначе csv")
+    parser.add_argument("--from", dest="start", type=_day, help="дата встречи с, ДД.ММ[.ГГГГ]")
+    parser.add_argument("--to", dest="end", type=_day, help="дата встречи по (включительно)")
+    parser.add_argument("--cursor", help="файл курсора: выгрузить только новое/изменённое с прошлого раза")
+    parser.add_argument("--full", action="store_true", help="с --cursor: выгрузить всё и обновить курсор")
+    args = parser.parse_args()
+    if args.start and args.end and args.end < args.start:
+        parser.error("конец периода раньше начала")
+
+    fmt = args.format or ("jsonl" if args.out.endswith((".jsonl", ".ndjson")) else "csv")
+    source, repo = export_repository()
+    since = load_cursor(args.cursor, source) if args.cursor and not args.full else ""
+
+    t0 = time.monotonic()
+    if args.out == "-":
+        report = export_meetings(repo, sys.stdout, fmt, since=since, start_day=args.start, end_day=args.end, overlap=EXPORT_CURSOR_OVERLAP)
+    else:
+        tmp = args.out + ".tmp"
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            report = export_meetings(repo, f, fmt, since=since, start_day=args.start, end_day=args.end, overlap=EXPORT_CURSOR_OVERLAP)
+        os.replace(tmp, args.out)
+
+    if args.cursor:
+        save_cursor(args.cursor, source, report["cursor"], report["rows"])
+
+    # отчёт — в stderr, чтобы не смешивать с данными в stdout
+    print(
+        f"Exported {report['rows']} meeting(s) from {source} as {fmt}"
+        + (f" since {since}" if since else "")
+        + f" in {time.monotonic() - t0:.1f}s",
+        file=sys.stderr,
+    )
+    if source == "sheets":
+        print("Google API:", format_retry_metrics(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# scripts/import_time.py
+"""
+Время импорта модулей бота и отчётов (python -X importtime) и проверка, что тяжёлые
+клиенты Google не грузятся при старте.
+
+python scripts/import_time.py                  # все цели, топ-10 модулей по каждой
+python scripts/import_time.py src.bot --top 20
+python scripts/import_time.py --max-ms 800     # exit 1, если импорт цели дольше 800 мс
+
+Каждая цель импортируется в отдельном чистом процессе. Если TELEGRAM_* не заданы,
+подставляются фиктивные значения (сеть не используется, нужен только импорт).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+TARGETS = [
+    "src.config",
+    "src.calendar.calendar_service",
+    "src.sheets.managers_repo",
+    "src.notify.daily_digest",
+    "src.bot",
+]
+
+# эти пакеты должны импортироваться лениво — при первом запросе к API, а не при старте
+FORBIDDEN = ("googleapiclient", "gspread", "google.oauth2", "google.auth")
+
+DUMMY_ENV = {
+    "TELEGRAM_BOT_TOKEN": "0:import-time",
+    "TELEGRAM_FORUM_CHAT_ID": "0",
+}
+
+
+def measure(module: str) -> list[tuple[str, int, int]]:
+    """
+    [(модуль, self мкс, cumulative мкс), ...] в порядке вывода -X importtime.
+    """
+    env = dict(os.environ)
+    for k, v in DUMMY_ENV.items():
+        env.setdefault(k, v)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+            rows.append((name.strip(), int(self_us), int(cum_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Время импорта модулей (python -X importtime)")
+    parser.add_argument("targets", nargs="*", default=TARGETS)
+    parser.add_argument("--top", type=int, default=10, help="сколько самых дорогих модулей показать")
+    parser.add_argument("--max-ms", type=float, default=0, help="бюджет на импорт цели (мс), 0 — без проверки")
+    args = parser.parse_args()
+
+    failed = False
+    for target in args.targets:
+        rows = measure(target)
+        total_ms = next((cum for name, _, cum in rows if name == target), 0) / 1000
+        heavy = sorted({name for name, _, _ in rows if name.startswith(FORBIDDEN)})
+
+        print(f"\n{target}: {total_ms:.1f} ms, модулей: {len(rows)}")
+        for name, _, cum in sorted(rows, key=lambda r: r[2], reverse=True)[: args.top]:
+            print(f"  {cum / 1000:8.1f} ms  {name}")
+
+        if heavy:
+            failed = True
+            print(f"  ❌ при импорте грузятся: {', '.join(heavy[:5])}{' …' if len(heavy) > 5 else ''}")
+        if args.max_ms and total_ms > args.max_ms:
+            failed = True
+            print(f"  ❌ дольше бюджета {args.max_ms:.0f} ms")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+# scripts/migrate_event_meta.py
+"""
+Разовая миграция: метаданные встреч бота из description в extendedProperties.private.
+
+python scripts/migrate_event_meta.py --dry-run         # сколько событий будет переведено
+python scripts/migrate_event_meta.py                   # год назад … год вперёд
+python scripts/migrate_event_meta.py --from 01.01.2025 --to 31.12.2026
+
+Повторный запуск безопасен: уже переведённые события пропускаются.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytz
+
+# --- fix imports when running directly ---
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.calendar.calendar_service import META_SCHEMA_VERSION, migrate_events_meta
+from src.config import TZ
+from src.utils.dt import parse_date_input
+
+
+def _day(value: str):
+    parsed = parse_date_input(value)
+    if not parsed:
+        raise argparse.ArgumentTypeError(f"не понял дату «{value}» (пример: 05.02 или 05.02.2026)")
+    return datetime.strptime(parsed, "%d.%m.%Y").date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move meeting metadata into extendedProperties")
+    parser.add_argument("--from", dest="start", type=_day, help="начало периода, ДД.ММ[.ГГГГ]")
+    parser.add_argument("--to", dest="end", type=_day, help="конец периода (включительно)")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    today = datetime.now(pytz.timezone(TZ)).date()
+    start = args.start or today - timedelta(days=365)
+    end = args.end or today + timedelta(days=365)
+
+    result = migrate_events_meta(start, end, dry_run=args.dry_run)
+    if args.dry_run:
+        print(f"DRY RUN: {result['checked']} event(s) would be moved to schema v{META_SCHEMA_VERSION}")
+    else:
+        print(f"Migrated {result['migrated']} event(s) to schema v{META_SCHEMA_VERSION}, failed: {result['failed']}")
+
+
+if __name__ == "__main__":
+    main()
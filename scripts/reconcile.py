@@ -0,0 +1,78 @@
+# scripts/reconcile.py
+"""
+Сверка листа Meetings с календарём (календарь — источник правды).
+
+python scripts/reconcile.py                           # 30 дней назад … 90 дней вперёд
+python scripts/reconcile.py --from 01.09 --to 30.11   # свой период (ДД.ММ[.ГГГГ])
+python scripts/reconcile.py --dry-run                 # только показать расхождения
+
+С MEETINGS_DB_PATH правится база SQLite, в лист изменения уносит зеркало запущенного бота.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+# --- fix imports when running directly ---
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.config import TZ
+from src.flows.reconcile import reconcile
+from src.utils.dt import parse_date_input
+from src.utils.retry import format_retry_metrics
+
+
+def _day(value: str):
+    parsed = parse_date_input(value)
+    if not parsed:
+        raise argparse.ArgumentTypeError(f"не понял дату «{value}» (пример: 05.02 или 05.02.2026)")
+    return datetime.strptime(parsed, "%d.%m.%Y").date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile the Meetings sheet with Google Calendar")
+    parser.add_argument("--from", dest="start", type=_day, help="начало периода, ДД.ММ[.ГГГГ]")
+    parser.add_argument("--to", dest="end", type=_day, help="конец периода (включительно)")
+    parser.add_argument("--days-back", type=int, default=30)
+    parser.add_argument("--days-ahead", type=int, default=90)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    today = datetime.now(pytz.timezone(TZ)).date()
+    start = args.start or today - timedelta(days=args.days_back)
+    end = args.end or today + timedelta(days=args.days_ahead)
+    if end < start:
+        parser.error("конец периода раньше начала")
+
+    t0 = time.monotonic()
+    report = reconcile(start, end, dry_run=args.dry_run)
+
+    for event_id, title, row_num, changes in report["changes"]:
+        diff = ", ".join(f"{k}: {old!r} -> {new!r}" for k, (old, new) in changes.items())
+        where = f"{title}!{row_num}" if row_num else title
+        print(f"{where} {event_id}: {diff}")
+    for event_id in report["missing_in_sheet"]:
+        print(f"missing in sheet: {event_id}")
+    for event_id in report["skipped"]:
+        print(f"skipped (changed since read, run again): {event_id}")
+
+    prefix = "DRY RUN: would fix" if args.dry_run else "Fixed"
+    print(
+        f"{start:%d.%m.%Y} – {end:%d.%m.%Y}: {report['rows']} row(s), {report['events']} event(s); "
+        f"{prefix} {len(report['changes'])} row(s)"
+        + ("" if args.dry_run else f" ({report['cells']} cell(s))")
+        + (f", skipped {len(report['skipped'])}" if report["skipped"] else "")
+        + f", missing in sheet: {len(report['missing_in_sheet'])}; {time.monotonic() - t0:.1f}s"
+    )
+    print("Google API:", format_retry_metrics())
+
+
+if __name__ == "__main__":
+    main()
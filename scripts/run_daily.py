@@ -4,7 +4,6 @@ from __future__ import annotations
 import sys
 import os
 from datetime import datetime, date, timedelta
-import requests
 import pytz
 
 # --- fix imports when running directly ---
@@ -12,7 +11,16 @@ ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT_DIR not in sys.path:
     sys.path.insert(0, ROOT_DIR)
 
-from src.calendar.calendar_service import list_events_for_date
+from src.notify.daily_digest import (
+    REPORT_STYLES,
+    fetch_meetings,
+    fetch_meetings_between,
+    iter_reports,
+    render_range,
+    send_reports,
+)
+from src.utils.dt import parse_date_input
+from src.utils.retry import format_retry_metrics
 from src.config import (
     TELEGRAM_BOT_TOKEN,
     TELEGRAM_FORUM_CHAT_ID,
@@ -20,7 +28,9 @@ from src.config import (
     TZ,
 )
 
-TG_API = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}"
+
+# диапазон для --range (дней); неделя — 7
+MAX_RANGE_DAYS = 62
 
 
 # -------------------- Date helpers --------------------
@@ -47,136 +57,56 @@ def _target_date() -> date:
     return base
 
 
-# -------------------- Telegram helpers --------------------
-def tg_request(method: str, payload: dict):
-    r = requests.post(f"{TG_API}/{method}", data=payload, timeout=30)
-    if r.status_code != 200:
-        print("Telegram error:", r.status_code, r.text)
-        r.raise_for_status()
-    return r.json()
-
-
-def tg_send_message(text: str, thread_id: int | str | None = None, reply_markup: dict | None = None):
-    payload = {
-        "chat_id": TELEGRAM_FORUM_CHAT_ID,
-        "text": text,
-        "parse_mode": "HTML",
-        "disable_web_page_preview": True,
-    }
-    if thread_id is not None and str(thread_id).isdigit() and int(thread_id) > 0:
-        payload["message_thread_id"] = int(thread_id)
-    if reply_markup:
-        payload["reply_markup"] = __import__("json").dumps(reply_markup, ensure_ascii=False)
-    return tg_request("sendMessage", payload)
-
-
-def escape_html(s: str) -> str:
-    return (s or "").replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-
-
-# -------------------- Calendar helpers --------------------
-def _extract_from_description(description: str, key: str) -> str:
-    if not description:
-        return ""
-    for line in description.splitlines():
-        if line.lower().startswith(key.lower() + ":"):
-            return line.split(":", 1)[1].strip()
-    return ""
-
-
-def _event_time_local(event: dict) -> str:
-    tz = _local_tz()
-    start = (event.get("start") or {})
-    dt_s = start.get("dateTime")
-    if not dt_s:
-        return "—"
-
-    dt = datetime.fromisoformat(dt_s)
-    if dt.tzinfo is None:
-        dt = tz.localize(dt)
-    else:
-        dt = dt.astimezone(tz)
-
-    return dt.strftime("%H:%M")
-
-
-def _meeting_keyboard(event_id: str) -> dict:
-    return {
-        "inline_keyboard": [
-            [
-                {"text": "✏️ Изменить", "callback_data": f"meet:edit:{event_id}"},
-                {"text": "🗑 Удалить", "callback_data": f"meet:delete:{event_id}"},
-            ]
-        ]
-    }
-
-
-# -------------------- Report builder --------------------
-def build_cards() -> list[dict]:
-    day = _target_date()
-    date_str = day.strftime("%d.%m.%Y")
-
-    is_tomorrow = "--tomorrow" in sys.argv
-
-    header_title = "Встречи на завтра" if is_tomorrow else "Встречи на сегодня"
-    header_icon = "🌙" if is_tomorrow else "☀️"
-
-    events = list_events_for_date(day)
-
-    ours = []
-    for e in events:
-        if e.get("status") == "cancelled":
-            continue
-        desc = e.get("description") or ""
-        if "source: qeepe_meets" not in desc:
-            continue
-        ours.append(e)
-
-    if not ours:
-        return [{
-            "text": f"{header_icon} <b>{header_title}</b> — <code>{date_str}</code>\n\nНет встреч ✅",
-            "event_id": ""
-        }]
-
-    ours.sort(key=lambda ev: (ev.get("start") or {}).get("dateTime") or "")
-
-    cards = []
-    header = f"{header_icon} <b>{header_title}</b> — <code>{date_str}</code>\n\n"
-
-    for i, e in enumerate(ours, 1):
-        event_id = (e.get("id") or "").strip()
-
-        summary = (e.get("summary") or "Встреча").strip()
-        if summary.lower().startswith("встреча:"):
-            summary = summary.split(":", 1)[1].strip()
-
-        desc = e.get("description") or ""
-        time_s = _event_time_local(e)
-
-        manager_name = _extract_from_description(desc, "manager_name")
-        manager_username = _extract_from_description(desc, "manager_username")
-        comment = _extract_from_description(desc, "comment")
-
-        text = f"📌 <b>{escape_html(time_s)}</b> — {escape_html(summary)}"
-
-        if manager_username:
-            text += f" — <b>{escape_html(manager_username)}</b>"
-
-        if manager_name:
-            text += f"\n👤 {escape_html(manager_name)}"
-
-        if comment:
-            text += f"\n📝 {escape_html(comment)}"
-
-        if event_id:
-            text += f"\n🆔 <code>{escape_html(event_id)}</code>"
-
-        if i == 1:
-            text = header + text
+def _arg_value(name: str) -> str | None:
+    """
+    Значение флага: --name value или --name=value.
+    """
+    for i, arg in enumerate(sys.argv):
+        if arg == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if arg.startswith(name + "="):
+            return arg.split("=", 1)[1]
+    return None
 
-        cards.append({"text": text, "event_id": event_id})
 
-    return cards
+def _target_range() -> tuple[date, date] | None:
+    """
+    --week → сегодня + 6 дней
+    --range 20.10:26.10 (ДД.ММ или ДД.ММ.ГГГГ, обе даты включительно)
+    None — обычный отчёт за один день.
+    """
+    if "--week" in sys.argv:
+        base = _base_date()
+        return base, base + timedelta(days=6)
+
+    value = _arg_value("--range")
+    if value is None:
+        return None
+
+    parts = [parse_date_input(x) for x in value.split(":")]
+    if len(parts) != 2 or not all(parts):
+        raise SystemExit("--range: ожидаю ДД.ММ[.ГГГГ]:ДД.ММ[.ГГГГ], например 20.10:26.10")
+    start, end = (datetime.strptime(x, "%d.%m.%Y").date() for x in parts)
+    if end < start:
+        raise SystemExit("--range: конечная дата раньше начальной")
+    if (end - start).days > MAX_RANGE_DAYS:
+        raise SystemExit(f"--range: не больше {MAX_RANGE_DAYS} дней")
+    return start, end
+
+
+def _styles() -> list[str]:
+    """
+    --style cards,managers,compact (по умолчанию cards).
+    Несколько стилей в одном запуске — один запрос к Calendar на все отчёты.
+    """
+    value = _arg_value("--style")
+    if value is None:
+        return ["cards"]
+    styles = [x.strip() for x in value.split(",") if x.strip()]
+    unknown = [x for x in styles if x not in REPORT_STYLES]
+    if unknown:
+        raise SystemExit(f"Unknown --style: {', '.join(unknown)} (доступны: {', '.join(REPORT_STYLES)})")
+    return styles
 
 
 # -------------------- Entrypoint --------------------
@@ -188,14 +118,18 @@ def main():
     if not TELEGRAM_MEETS_THREAD_ID:
         raise RuntimeError("Missing TELEGRAM_MEETS_THREAD_ID")
 
-    cards = build_cards()
-
-    for c in cards:
-        event_id = c.get("event_id") or ""
-        kb = _meeting_keyboard(event_id) if event_id else None
-        tg_send_message(c["text"], thread_id=TELEGRAM_MEETS_THREAD_ID, reply_markup=kb)
+    period = _target_range()
+    if period is not None:
+        start, end = period
+        meetings = fetch_meetings_between(start, end)
+        sent = send_reports(render_range(meetings, start_day=start, end_day=end))
+    else:
+        day = _target_date()
+        meetings = fetch_meetings(day)
+        sent = send_reports(iter_reports(meetings, _styles(), day=day))
 
-    print("OK: report sent")
+    print(f"OK: report sent ({len(meetings)} event(s), {sent} message(s))")
+    print("Google API:", format_retry_metrics())
 
 
 if __name__ == "__main__":
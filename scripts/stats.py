@@ -0,0 +1,62 @@
+# scripts/stats.py
+"""
+Встречи по менеджерам и неделям из агрегатов (те же, что у /stats в боте).
+
+python scripts/stats.py               # последние 4 недели
+python scripts/stats.py --weeks 12    # последние 12 недель
+python scripts/stats.py --rebuild     # пересчитать с нуля по всем листам, включая архив
+
+Агрегаты читаются из STATS_STATE_PATH (бот сохраняет их раз в STATS_SAVE_INTERVAL секунд);
+если файла ещё нет — сначала полный пересчёт. После --rebuild запущенный бот берёт новый файл
+при следующем /stats или сохранении, свои записи с прошлого сохранения применяет поверх.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+# --- fix imports when running directly ---
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.sheets.meetings_stats import get_meetings_stats, last_weeks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Meetings per manager per week")
+    parser.add_argument("--weeks", type=int, default=4, help="сколько последних недель (включая текущую)")
+    parser.add_argument("--rebuild", action="store_true", help="пересчитать агрегаты по всем листам")
+    args = parser.parse_args()
+    if args.weeks < 1:
+        parser.error("--weeks должно быть >= 1")
+
+    stats = get_meetings_stats()
+    t0 = time.monotonic()
+    if args.rebuild:
+        print(f"Rebuilt: {stats.rebuild()} meeting(s) in {time.monotonic() - t0:.1f}s")
+    else:
+        stats.ensure_built()
+
+    weeks = last_weeks(args.weeks)
+    rows = stats.summary(weeks)
+    width = max([len("manager")] + [len(r["manager"]) for r in rows])
+    print(f"{'manager':<{width}}  " + "  ".join(f"{w[5:]:>4}" for w in weeks) + "  total  canceled")
+    for r in rows:
+        per_week = "  ".join(f"{r['by_week'].get(w, 0):>4}" for w in weeks)
+        rate = f"{100 * r['canceled'] / r['total']:.0f}%" if r["total"] else "0%"
+        print(f"{r['manager']:<{width}}  {per_week}  {r['total'] - r['canceled']:>5}  {r['canceled']:>3} ({rate})")
+
+    totals = stats.status_totals(weeks)
+    total = sum(totals.values())
+    canceled = totals.get("canceled", 0)
+    rate = f"{100 * canceled / total:.1f}%" if total else "0%"
+    print(f"Total: {total - canceled} meeting(s), canceled {canceled} of {total} ({rate})")
+    print("By status:", ", ".join(f"{s}={n}" for s, n in sorted(totals.items())) or "—")
+    print(f"Built at: {stats.built_at}")
+
+
+if __name__ == "__main__":
+    main()
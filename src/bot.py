@@ -1,30 +1,52 @@
 import re
+import sys
 import json
 import time
+import signal
 import requests
-from datetime import datetime, timedelta
-import pytz
+from collections import OrderedDict
+from datetime import timedelta
 
-from src.sheets.managers_repo import append_meeting
+from src.sheets.managers_repo import start_meetings_writer, flush_meetings
 from src.sheets.managers_repo import get_managers
-
-from src.sheets.managers_repo import (
-    get_meeting_by_event_id,
-    update_meeting_by_event_id,
-)
+from src.sheets.meetings_stats import get_meetings_stats, last_weeks, week_monday
+from src.storage.meetings_repository import MeetingConflict, get_meetings_repository
 
 from src.calendar.calendar_service import (
+    build_rrule,
+    describe_rrule,
+    base_event_id,
+    is_instance_id,
     create_meeting_event,
+    create_meeting_events_batch,
     update_meeting_event,
     delete_event,
+    get_event,
+    EventConflict,
 )
 
 from src.config import (
     TELEGRAM_BOT_TOKEN,
     TELEGRAM_FORUM_CHAT_ID,
     TELEGRAM_MEETS_THREAD_ID,
-    TZ,
 )
+from src.utils.dt import (
+    tz_now,
+    today_date_str,
+    tomorrow_date_str,
+    build_dt_from_inputs,
+    parse_date_input,
+    parse_time_input,
+)
+from src.utils.text import escape_html
+from src.utils.retry import format_retry_metrics
+from src.utils.replay import replay_queue
+from src.utils.callback_tokens import callback_token, callback_tokens, is_token
+from src.utils.locks import event_lock
+from src.flows.bulk_import import parse_bulk_text, validate_bulk_rows
+from src.notify.dashboard import dashboard_changed
+from src.notify.scheduler import start_scheduler
+from src.notify.reminders import start_reminders, reminders_schedule, reminders_cancel
 
 TG_API = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}"
 
@@ -60,13 +82,38 @@ def tg_send_message(text: str, reply_markup: dict | None = None, thread_id: int
     return tg_request("sendMessage", payload)
 
 
-def tg_send_message_to(chat_id: int, text: str, thread_id: int | None = None):
+def tg_send_message_to(chat_id: int, text: str, thread_id: int | None = None, reply_markup: dict | None = None):
     payload = {"chat_id": chat_id, "text": text, "parse_mode": "HTML", "disable_web_page_preview": True}
     if thread_id is not None and int(thread_id) > 0:
         payload["message_thread_id"] = int(thread_id)
+    if reply_markup:
+        payload["reply_markup"] = json.dumps(reply_markup, ensure_ascii=False)
     return tg_request("sendMessage", payload)
 
 
+def tg_edit_message(chat_id: int, message_id: int, text: str, reply_markup: dict | None = None):
+    payload = {
+        "chat_id": chat_id,
+        "message_id": message_id,
+        "text": text,
+        "parse_mode": "HTML",
+        "disable_web_page_preview": True,
+    }
+    if reply_markup:
+        payload["reply_markup"] = json.dumps(reply_markup, ensure_ascii=False)
+    return tg_request("editMessageText", payload)
+
+
+def tg_download_file(file_id: str) -> bytes:
+    info = tg_request("getFile", {"file_id": file_id})
+    file_path = (info.get("result") or {}).get("file_path") or ""
+    if not file_path:
+        raise RuntimeError("Telegram не вернул file_path")
+    r = requests.get(f"https://api.telegram.org/file/bot{TELEGRAM_BOT_TOKEN}/{file_path}", timeout=30)
+    r.raise_for_status()
+    return r.content
+
+
 def tg_answer_callback(callback_query_id: str, text: str = ""):
     payload = {"callback_query_id": callback_query_id}
     if text:
@@ -74,19 +121,6 @@ def tg_answer_callback(callback_query_id: str, text: str = ""):
     return tg_request("answerCallbackQuery", payload)
 
 
-# -------------------- Time helpers --------------------
-def tz_now():
-    return datetime.now(pytz.timezone(TZ))
-
-
-def today_date_str():
-    return tz_now().strftime("%d.%m.%Y")
-
-
-def tomorrow_date_str():
-    return (tz_now() + timedelta(days=1)).strftime("%d.%m.%Y")
-
-
 # -------------------- Forum / identity helpers --------------------
 def normalize_thread_id() -> str:
     return str(TELEGRAM_MEETS_THREAD_ID or "").strip()
@@ -130,14 +164,41 @@ def resolve_user_id_from_message(message: dict) -> int | None:
     return None
 
 
-def escape_html(s: str) -> str:
-    return (s or "").replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+def build_meeting_texts(client: str, manager_name: str, manager_pretty: str, comment: str) -> tuple[str, str]:
+    """
+    (client_for_title, pretty_comment) — заголовок события и комментарий с менеджером.
+    """
+    if manager_pretty.startswith("@"):
+        client_for_title = f"{client} — {manager_pretty}"
+    else:
+        client_for_title = f"{client} — {manager_name}"
+
+    pretty_prefix = f"Менеджер: {manager_name}"
+    if manager_pretty.startswith("@"):
+        pretty_prefix += f" ({manager_pretty})"
+    pretty_comment = f"{pretty_prefix}\n{comment}" if comment else pretty_prefix
+    return client_for_title, pretty_comment
+
+
+def forum_ids() -> tuple[int, int | None]:
+    chat_id = int(TELEGRAM_FORUM_CHAT_ID)
+    thread_id = int(TELEGRAM_MEETS_THREAD_ID) if str(TELEGRAM_MEETS_THREAD_ID).isdigit() else None
+    return chat_id, thread_id
 
 
-def build_dt_from_inputs(date_str: str, time_str: str) -> datetime:
-    dd, mm, yyyy = date_str.split(".")
-    hh, mi = time_str.split(":")
-    return datetime(int(yyyy), int(mm), int(dd), int(hh), int(mi), 0)
+def queued_note(result: dict | None) -> str:
+    """
+    Пометка для ответа, если правку в календаре поставили в очередь (Calendar недоступен).
+    """
+    if result and result.get("_queued"):
+        return "\n\n⏳ Календарь сейчас недоступен — изменение сохранено и применится автоматически."
+    return ""
+
+
+def stale_note(meeting: dict | None) -> str:
+    if meeting and meeting.get("_stale"):
+        return "⚠️ Таблица сейчас недоступна — показаны данные из кэша.\n"
+    return ""
 
 
 # -------------------- Keyboards --------------------
@@ -156,7 +217,8 @@ def managers_keyboard():
 
         telegram_id = (m.get("telegram_id") or "").strip() or "0"
 
-        row.append({"text": name, "callback_data": f"meet:manager:{username}|{telegram_id}|{name}"})
+        # длинное имя не влезает в 64 байта callback_data — данные кнопки храним на сервере
+        row.append({"text": name, "callback_data": callback_token("manager", token=username, telegram_id=telegram_id, name=name)})
         if len(row) == 2:
             rows.append(row)
             row = []
@@ -179,8 +241,8 @@ def post_meeting_keyboard(event_id: str):
         "inline_keyboard": [
             [
                 {"text": "➕ Создать новую", "callback_data": "meet:new"},
-                {"text": "✏️ Изменить", "callback_data": f"meet:edit:{event_id}"},
-                {"text": "🗑 Удалить", "callback_data": f"meet:delete:{event_id}"},
+                {"text": "✏️ Изменить", "callback_data": callback_token("edit", event_id=event_id)},
+                {"text": "🗑 Удалить", "callback_data": callback_token("delete", event_id=event_id)},
             ]
         ]
     }
@@ -278,6 +340,60 @@ def ask_comment(user_id: int):
     tg_send_message("📝 <b>Комментарий</b>\n\nНапиши комментарий или нажми «Пропустить».", reply_markup=kb, thread_id=TELEGRAM_MEETS_THREAD_ID)
 
 
+def ask_repeat(user_id: int):
+    STATE[user_id]["step"] = "repeat"
+    kb = {
+        "inline_keyboard": [
+            [{"text": "Не повторять", "callback_data": "meet:repeat:none"}],
+            [{"text": "🔁 Каждую неделю", "callback_data": "meet:repeat:weekly"}],
+            [{"text": "🔁 Раз в 2 недели", "callback_data": "meet:repeat:biweekly"}],
+            [{"text": "🔁 Каждый месяц", "callback_data": "meet:repeat:monthly"}],
+            [{"text": "⬅️ Назад", "callback_data": "meet:back:comment"}, {"text": "❌ Отмена", "callback_data": "meet:cancel"}],
+        ]
+    }
+    tg_send_message("🔁 <b>Повтор</b>\n\nВстреча повторяется?", reply_markup=kb, thread_id=TELEGRAM_MEETS_THREAD_ID)
+
+
+def ask_repeat_end(user_id: int):
+    STATE[user_id]["step"] = "repeat_end"
+    kb = {
+        "inline_keyboard": [
+            [
+                {"text": "4 раза", "callback_data": "meet:repeatend:4"},
+                {"text": "8 раз", "callback_data": "meet:repeatend:8"},
+                {"text": "12 раз", "callback_data": "meet:repeatend:12"},
+            ],
+            [{"text": "📆 До даты / своё число", "callback_data": "meet:repeatend:custom"}],
+            [{"text": "⬅️ Назад", "callback_data": "meet:back:repeat"}, {"text": "❌ Отмена", "callback_data": "meet:cancel"}],
+        ]
+    }
+    tg_send_message("🔁 <b>Сколько раз повторять?</b>", reply_markup=kb, thread_id=TELEGRAM_MEETS_THREAD_ID)
+
+
+def ask_repeat_until(user_id: int):
+    STATE[user_id]["step"] = "repeat_until"
+    kb = {"inline_keyboard": [[{"text": "⬅️ Назад", "callback_data": "meet:back:repeat"}, {"text": "❌ Отмена", "callback_data": "meet:cancel"}]]}
+    tg_send_message(
+        "🔁 Введи дату окончания <code>ДД.ММ</code> / <code>ДД.ММ.ГГГГ</code> или количество повторений числом.\n\n"
+        "Пример: <code>30.06</code> или <code>10</code>",
+        reply_markup=kb,
+        thread_id=TELEGRAM_MEETS_THREAD_ID,
+    )
+
+
+def recurrence_from_state(data: dict) -> str:
+    """
+    RRULE из состояния мастера ("" — встреча не повторяется).
+    """
+    kind = data.get("repeat") or ""
+    if not kind:
+        return ""
+    until_s = data.get("repeat_until") or ""
+    until = build_dt_from_inputs(until_s, "00:00").date() if until_s else None
+    count = data.get("repeat_count")
+    return build_rrule(kind, until=until, count=int(count) if count else None)
+
+
 def show_confirm(user_id: int):
     data = STATE.get(user_id, {})
     client = data.get("client", "—")
@@ -285,6 +401,7 @@ def show_confirm(user_id: int):
     time_s = data.get("time", "—")
     manager = data.get("manager_pretty", data.get("manager", "—"))
     comment = data.get("comment") or "—"
+    recurrence = recurrence_from_state(data)
 
     text = (
         "📅 <b>Новая встреча</b>\n\n"
@@ -292,8 +409,9 @@ def show_confirm(user_id: int):
         f"📅 Дата: <b>{escape_html(date_s)}</b>\n"
         f"⏰ Время: <b>{escape_html(time_s)}</b>\n"
         f"👤 Менеджер: <b>{escape_html(manager)}</b>\n"
-        f"📝 Комментарий: <i>{escape_html(comment)}</i>\n\n"
-        "Нажми ✅ чтобы создать."
+        f"📝 Комментарий: <i>{escape_html(comment)}</i>\n"
+        + (f"🔁 Повтор: <b>{escape_html(describe_rrule(recurrence))}</b>\n" if recurrence else "")
+        + "\nНажми ✅ чтобы создать."
     )
     kb = {
         "inline_keyboard": [
@@ -306,357 +424,852 @@ def show_confirm(user_id: int):
     tg_send_message(text, reply_markup=kb, thread_id=TELEGRAM_MEETS_THREAD_ID)
 
 
-# -------------------- Parsers --------------------
-def parse_date_input(s: str) -> str | None:
-    s = (s or "").strip()
-    m = re.match(r"^(\d{2})\.(\d{2})(?:\.(\d{4}))?$", s)
-    if not m:
-        return None
-    dd, mm, yyyy = m.group(1), m.group(2), m.group(3)
-    if yyyy is None:
-        yyyy = str(tz_now().year)
+# -------------------- Callback handler --------------------
+# callback_data бывает двух видов, оба разбираются в (action, params) один раз:
+#   "t:<token>"           — payload {"action": ..., параметры} на сервере (src/utils/callback_tokens.py);
+#   "meet:<action>[:arg]" — прежний формат: короткие кнопки шагов, отчёты из GitHub Actions
+#                           и сообщения, отправленные до токенов.
+# Обработчик выбирается по action из CALLBACK_HANDLERS.
+
+def _legacy_manager_params(raw: str) -> dict:
+    # "meet:manager:@username|telegram_id|name" (или NAME:имя вместо @username)
+    parts = raw.split("|")
+    token = parts[0] if len(parts) >= 1 else ""
+    return {
+        "token": token,
+        "telegram_id": parts[1] if len(parts) >= 2 else "0",
+        "name": parts[2] if len(parts) >= 3 else token.replace("NAME:", ""),
+    }
 
-    try:
-        datetime(int(yyyy), int(mm), int(dd))
-    except Exception:
-        return None
-    return f"{dd}.{mm}.{yyyy}"
 
+def _legacy_find_params(raw: str) -> dict:
+    qid, _, page = raw.partition(":")
+    return {"qid": qid, "page": int(page) if page.isdigit() else 0}
 
-def parse_time_input(s: str) -> str | None:
-    s = (s or "").strip()
-    m = re.match(r"^([01]\d|2[0-3]):([0-5]\d)$", s)
-    if not m:
-        return None
-    return s
 
+_LEGACY_PARAMS = {
+    "edit": lambda arg: {"event_id": arg.strip()},
+    "delete": lambda arg: {"event_id": arg.strip()},
+    "manager": _legacy_manager_params,
+    "find": _legacy_find_params,
+}
 
-# -------------------- Callback handler --------------------
-def handle_callback(callback: dict):
-    cq_id = callback.get("id")
-    data = callback.get("data", "")
-    user_id = callback.get("from", {}).get("id")
 
-    if cq_id:
-        tg_answer_callback(cq_id)
+def parse_callback_data(data: str) -> tuple[str, dict] | None:
+    """
+    callback_data -> (action, params). None — токен неизвестен (кнопка слишком старая).
+    """
+    if is_token(data):
+        payload = callback_tokens().get(data)
+        if payload is None:
+            return None
+        return payload.pop("action", ""), payload
 
-    if not user_id:
+    prefix, _, rest = (data or "").partition(":")
+    if prefix != "meet":
+        return "", {}
+    action, _, arg = rest.partition(":")
+    parse = _LEGACY_PARAMS.get(action)
+    return action, parse(arg) if parse else {"value": arg}
+
+
+def _cb_new(user_id: int, params: dict, callback: dict):
+    ask_client(user_id)
+
+
+def _cb_deleted(user_id: int, params: dict, callback: dict):
+    tg_send_message("ℹ️ Эта встреча уже удалена. Нажми «➕ Создать новую».", thread_id=TELEGRAM_MEETS_THREAD_ID)
+
+
+def _cb_cancel(user_id: int, params: dict, callback: dict):
+    STATE.pop(user_id, None)
+    tg_send_message("❌ Действие отменено.", thread_id=TELEGRAM_MEETS_THREAD_ID)
+
+
+def _cb_find(user_id: int, params: dict, callback: dict):
+    # листание результатов /find: правим то же сообщение
+    qid = params.get("qid") or ""
+    query = _FIND_QUERIES.get(qid)
+    msg = callback.get("message") or {}
+    if not query or not msg:
+        tg_send_message("ℹ️ Результаты поиска устарели — повтори /find.", thread_id=TELEGRAM_MEETS_THREAD_ID)
         return
+    text, markup = render_find_page(query, qid, int(params.get("page") or 0))
+    tg_edit_message(msg["chat"]["id"], msg["message_id"], text, reply_markup=markup)
 
-    user_id = int(user_id)
 
-    # 1) создать новую встречу (кнопка после создания)
-    if data == "meet:new":
-        ask_client(user_id)
+def _cb_edit(user_id: int, params: dict, callback: dict):
+    # редактирование конкретной встречи по event_id
+    event_id = (params.get("event_id") or "").strip()
+    if not event_id:
+        tg_send_message("⚠️ Не вижу event_id для редактирования.", thread_id=TELEGRAM_MEETS_THREAD_ID)
         return
 
-    if data == "meet:deleted:edit" or data == "meet:deleted:delete":
-        tg_send_message("ℹ️ Эта встреча уже удалена. Нажми «➕ Создать новую».", thread_id=TELEGRAM_MEETS_THREAD_ID)
+    # кнопка из отчёта по повторяющейся встрече несёт id экземпляра — редактируем серию
+    series_note = ""
+    if is_instance_id(event_id):
+        event_id = base_event_id(event_id)
+        series_note = "🔁 Повторяющаяся встреча — изменения применятся ко всей серии.\n"
+
+    meeting = None
+    try:
+        meeting = get_meetings_repository().get_meeting_by_event_id(event_id)
+    except Exception as e:
+        tg_send_message(f"⚠️ Ошибка чтения встречи из таблицы:\n<code>{escape_html(str(e))}</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
         return
 
-    if data == "meet:create":
-        ask_client(user_id)
+    if not meeting:
+        tg_send_message("⚠️ Не нашёл эту встречу в таблице (Meetings).", thread_id=TELEGRAM_MEETS_THREAD_ID)
         return
 
-    if data == "meet:cancel":
-        STATE.pop(user_id, None)
-        tg_send_message("❌ Действие отменено.", thread_id=TELEGRAM_MEETS_THREAD_ID)
+    # что видел пользователь: если к моменту правки встречу изменят — покажем конфликт
+    STATE[user_id] = {
+        "step": "edit_menu",
+        "edit_event_id": event_id,
+        "edit_version": (meeting.get("version") or "").strip(),
+        "edit_etag": _event_etag(event_id),
+    }
+
+    client = (meeting.get("client") or "").strip()
+    date_s = (meeting.get("date") or "").strip()
+    time_s = (meeting.get("time") or "").strip()
+
+    tg_send_message(
+        "✏️ <b>Редактирование встречи</b>\n\n"
+        f"🧑 Клиент: <b>{escape_html(client)}</b>\n"
+        f"📅 Дата: <b>{escape_html(date_s)}</b>\n"
+        f"⏰ Время: <b>{escape_html(time_s)}</b>\n"
+        f"🆔 <code>{escape_html(event_id)}</code>\n\n"
+        f"{series_note}"
+        f"{stale_note(meeting)}"
+        "Что меняем?",
+        reply_markup=edit_fields_keyboard(),
+        thread_id=TELEGRAM_MEETS_THREAD_ID,
+    )
+
+
+def _cb_delete(user_id: int, params: dict, callback: dict):
+    # удаление конкретной встречи по event_id
+    event_id = (params.get("event_id") or "").strip()
+    if not event_id:
+        tg_send_message("⚠️ Не вижу event_id для удаления.", thread_id=TELEGRAM_MEETS_THREAD_ID)
         return
 
-    # 2) редактирование конкретной встречи по event_id
-    if data.startswith("meet:edit:"):
-        event_id = data.split(":", 2)[2].strip()
-        if not event_id:
-            tg_send_message("⚠️ Не вижу event_id для редактирования.", thread_id=TELEGRAM_MEETS_THREAD_ID)
-            return
+    with event_lock(event_id):
+        _delete_meeting(user_id, event_id)
+
 
-        meeting = None
+def _delete_meeting(user_id: int, event_id: str):
+    # экземпляр серии: отменили только это повторение, строка серии в таблице остаётся
+    single_occurrence = is_instance_id(event_id)
+
+    # двойное нажатие / удалили из другого чата — второй раз не удаляем
+    if not single_occurrence:
         try:
-            meeting = get_meeting_by_event_id(event_id)
+            meeting = get_meetings_repository().get_meeting_by_event_id(event_id)
         except Exception as e:
-            tg_send_message(f"⚠️ Ошибка чтения встречи из таблицы:\n<code>{escape_html(str(e))}</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
+            print("Delete: meeting read failed:", repr(e))
+            meeting = None
+        if meeting and (meeting.get("status") or "").strip() == "canceled":
+            _cb_deleted(user_id, {}, {})
             return
 
-        if not meeting:
-            tg_send_message("⚠️ Не нашёл эту встречу в таблице (Meetings).", thread_id=TELEGRAM_MEETS_THREAD_ID)
-            return
+    # удаляем в календаре
+    try:
+        deleted_now = delete_event(event_id)
+    except Exception as e:
+        tg_send_message(
+            f"❌ Ошибка удаления встречи из календаря:\n<code>{escape_html(str(e))}</code>",
+            thread_id=TELEGRAM_MEETS_THREAD_ID,
+        )
+        return
+
+    # помечаем в таблице
+    if not single_occurrence:
+        try:
+            get_meetings_repository().update_meeting_by_event_id(event_id, {"status": "canceled"})
+        except Exception as e:
+            tg_send_message(
+                "⚠️ Встреча удалена из календаря, но не смог обновить статус в таблице.\n"
+                f"<code>{escape_html(str(e))}</code>",
+                thread_id=TELEGRAM_MEETS_THREAD_ID,
+            )
 
-        STATE[user_id] = {
-            "step": "edit_menu",
-            "edit_event_id": event_id,
-        }
+    dashboard_changed()
+    reminders_cancel(event_id)
 
-        client = (meeting.get("client") or "").strip()
-        date_s = (meeting.get("date") or "").strip()
-        time_s = (meeting.get("time") or "").strip()
+    # сбрасываем edit-сессию если вдруг редактировали её же
+    st = STATE.get(user_id) or {}
+    if st.get("edit_event_id") == event_id:
+        STATE.pop(user_id, None)
 
+    kb = {
+        "inline_keyboard": [
+            [{"text": "➕ Создать новую встречу", "callback_data": "meet:new"}]
+        ]
+    }
+
+    title = "🗑 <b>Повторение встречи удалено</b>" if single_occurrence else "🗑 <b>Встреча удалена</b>"
+    if not deleted_now:
+        title += "\n⏳ Календарь сейчас недоступен — событие удалится автоматически."
+    tg_send_message(
+        f"{title}\n\nМожешь сразу создать новую встречу 👇",
+        reply_markup=kb,
+        thread_id=TELEGRAM_MEETS_THREAD_ID,
+    )
+
+
+def _cb_editfield(user_id: int, params: dict, callback: dict):
+    # выбор поля для редактирования
+    field = (params.get("value") or "").strip()
+    st = STATE.get(user_id) or {}
+    event_id = (st.get("edit_event_id") or "").strip()
+    if not event_id:
+        tg_send_message("⚠️ Сессия редактирования устарела. Нажми «Изменить» на нужной встрече ещё раз.", thread_id=TELEGRAM_MEETS_THREAD_ID)
+        STATE.pop(user_id, None)
+        return
+
+    # ДОБАВИЛИ: редактирование даты
+    if field == "date":
+        STATE[user_id]["step"] = "edit_date"
         tg_send_message(
-            "✏️ <b>Редактирование встречи</b>\n\n"
-            f"🧑 Клиент: <b>{escape_html(client)}</b>\n"
-            f"📅 Дата: <b>{escape_html(date_s)}</b>\n"
-            f"⏰ Время: <b>{escape_html(time_s)}</b>\n"
-            f"🆔 <code>{escape_html(event_id)}</code>\n\n"
-            "Что меняем?",
-            reply_markup=edit_fields_keyboard(),
+            "📅 Введи новую дату в формате <code>ДД.ММ</code> или <code>ДД.ММ.ГГГГ</code>\nПример: <code>05.02</code>",
             thread_id=TELEGRAM_MEETS_THREAD_ID,
         )
         return
 
-    # 3) удаление конкретной встречи по event_id
-    if data.startswith("meet:delete:"):
-        event_id = data.split(":", 2)[2].strip()
-        if not event_id:
-            tg_send_message("⚠️ Не вижу event_id для удаления.", thread_id=TELEGRAM_MEETS_THREAD_ID)
+    if field == "time":
+        STATE[user_id]["step"] = "edit_time"
+        tg_send_message("⏰ Введи новое время в формате <code>ЧЧ:ММ</code>\nПример: <code>15:30</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
+        return
+
+    if field == "client":
+        STATE[user_id]["step"] = "edit_client"
+        tg_send_message("🧑 Введи новое название клиента одним сообщением.", thread_id=TELEGRAM_MEETS_THREAD_ID)
+        return
+
+    if field == "comment":
+        STATE[user_id]["step"] = "edit_comment"
+        tg_send_message("📝 Введи новый комментарий (если удалить — отправь <code>-</code>)", thread_id=TELEGRAM_MEETS_THREAD_ID)
+        return
+
+
+def _cb_editretry(user_id: int, params: dict, callback: dict):
+    # повтор правки после конфликта: версии в STATE уже обновлены на текущие
+    st = STATE.get(user_id) or {}
+    text = st.pop("pending_text", None)
+    if not text or not st.get("edit_event_id"):
+        tg_send_message("⚠️ Сессия редактирования устарела. Нажми «Изменить» на нужной встрече ещё раз.", thread_id=TELEGRAM_MEETS_THREAD_ID)
+        STATE.pop(user_id, None)
+        return
+    _handle_fsm_text(user_id, text)
+
+
+# --- исходный create-flow ---
+def _cb_back(user_id: int, params: dict, callback: dict):
+    step = params.get("value") or ""
+    if step == "client":
+        ask_client(user_id)
+    elif step == "date":
+        ask_date(user_id)
+    elif step == "time":
+        ask_time(user_id)
+    elif step == "manager":
+        ask_manager(user_id)
+    elif step == "comment" and user_id in STATE:
+        ask_comment(user_id)
+    elif step == "repeat" and user_id in STATE:
+        ask_repeat(user_id)
+
+
+def _cb_date(user_id: int, params: dict, callback: dict):
+    choice = params.get("value") or ""
+    if user_id not in STATE:
+        ask_client(user_id)
+        return
+    if choice == "today":
+        STATE[user_id]["date"] = today_date_str()
+        ask_time(user_id)
+    elif choice == "tomorrow":
+        STATE[user_id]["date"] = tomorrow_date_str()
+        ask_time(user_id)
+    elif choice == "custom":
+        ask_custom_date(user_id)
+
+
+def _cb_time(user_id: int, params: dict, callback: dict):
+    choice = params.get("value") or ""
+    if user_id not in STATE:
+        ask_client(user_id)
+        return
+    if choice == "custom":
+        ask_custom_time(user_id)
+    else:
+        STATE[user_id]["time"] = choice
+        ask_manager(user_id)
+
+
+def _cb_manager(user_id: int, params: dict, callback: dict):
+    if user_id not in STATE:
+        ask_client(user_id)
+        return
+
+    manager_token = (params.get("token") or "").strip()
+    manager_name = (params.get("name") or "").strip()
+    telegram_id = (params.get("telegram_id") or "0").strip()
+
+    manager_pretty = manager_name
+    if manager_token.startswith("@"):
+        manager_pretty = manager_token
+    elif manager_token.startswith("NAME:"):
+        manager_pretty = manager_name
+
+    STATE[user_id]["manager"] = manager_token
+    STATE[user_id]["manager_pretty"] = manager_pretty
+    STATE[user_id]["manager_name"] = manager_name
+    STATE[user_id]["manager_id"] = telegram_id
+
+    ask_comment(user_id)
+
+
+def _cb_comment(user_id: int, params: dict, callback: dict):
+    choice = params.get("value") or ""
+    if user_id not in STATE:
+        ask_client(user_id)
+        return
+    if choice == "skip":
+        STATE[user_id]["comment"] = ""
+        ask_repeat(user_id)
+
+
+def _cb_repeat(user_id: int, params: dict, callback: dict):
+    choice = params.get("value") or ""
+    if user_id not in STATE:
+        ask_client(user_id)
+        return
+    for k in ("repeat", "repeat_count", "repeat_until"):
+        STATE[user_id].pop(k, None)
+    if choice == "none":
+        show_confirm(user_id)
+        return
+    STATE[user_id]["repeat"] = choice
+    ask_repeat_end(user_id)
+
+
+def _cb_repeatend(user_id: int, params: dict, callback: dict):
+    choice = params.get("value") or ""
+    if user_id not in STATE or not STATE[user_id].get("repeat"):
+        ask_client(user_id)
+        return
+    if choice == "custom":
+        ask_repeat_until(user_id)
+        return
+    if choice.isdigit():
+        STATE[user_id]["repeat_count"] = int(choice)
+        STATE[user_id].pop("repeat_until", None)
+        show_confirm(user_id)
+
+
+def _cb_confirm(user_id: int, params: dict, callback: dict):
+    action = params.get("value") or ""
+    if user_id not in STATE:
+        ask_client(user_id)
+        return
+
+    if action == "edit":
+        # редактирование ДО создания (предпросмотр) — оставляем как возврат к клиенту
+        ask_client(user_id)
+        return
+
+    if action == "create":
+        d = STATE.get(user_id, {})
+
+        client = (d.get("client") or "").strip()
+        date_s = (d.get("date") or "").strip()
+        time_s = (d.get("time") or "").strip()
+        comment = (d.get("comment") or "").strip()
+
+        manager_id = (d.get("manager_id") or "").strip()
+        manager_name = (d.get("manager_name") or "").strip()
+        manager_pretty = (d.get("manager_pretty") or manager_name or "").strip()
+
+        if not (client and date_s and time_s and manager_id and manager_name):
+            tg_send_message("⚠️ Не хватает данных для создания встречи. Заполни заново.", thread_id=TELEGRAM_MEETS_THREAD_ID)
             return
 
-        # удаляем в календаре
+        start_dt = build_dt_from_inputs(date_s, time_s)
+        end_dt = start_dt + timedelta(minutes=60)
+        recurrence = recurrence_from_state(d)
+
+        # title for calendar
+        client_for_title, pretty_comment = build_meeting_texts(client, manager_name, manager_pretty, comment)
+
         try:
-            delete_event(event_id)
+            event_id = create_meeting_event(
+                client=client_for_title,
+                start_dt=start_dt,
+                end_dt=end_dt,
+                manager_id=int(manager_id) if str(manager_id).isdigit() else 0,
+                manager_name=manager_name,
+                comment=pretty_comment,
+                recurrence=recurrence or None,
+            )
         except Exception as e:
             tg_send_message(
-                f"❌ Ошибка удаления встречи из календаря:\n<code>{escape_html(str(e))}</code>",
+                f"❌ Ошибка создания события в календаре:\n<code>{escape_html(str(e))}</code>",
                 thread_id=TELEGRAM_MEETS_THREAD_ID,
             )
             return
 
-        # помечаем в таблице
+        # ---- Save to Google Sheet (Meetings) ----
+        chat_id, thread_id = forum_ids()
         try:
-            update_meeting_by_event_id(event_id, {"status": "canceled"})
+            get_meetings_repository().append_meeting(
+                created_by_id=user_id,
+                created_by_username="",  # позже улучшим (можно вытянуть из update)
+                chat_id=chat_id,
+                thread_id=thread_id,
+                client=client,  # оригинальное имя клиента (без приписки менеджера)
+                date=date_s,
+                time=time_s,
+                start_iso=start_dt.isoformat(),
+                end_iso=end_dt.isoformat(),
+                manager_name=manager_name,
+                manager_username=manager_pretty if manager_pretty.startswith("@") else "",
+                manager_telegram_id=int(manager_id) if str(manager_id).isdigit() else 0,
+                comment=pretty_comment,
+                event_id=event_id,
+                status="created",
+                recurrence=recurrence,
+            )
         except Exception as e:
             tg_send_message(
-                "⚠️ Встреча удалена из календаря, но не смог обновить статус в таблице.\n"
+                "⚠️ Встреча создана в календаре, но не смог записать в таблицу.\n"
                 f"<code>{escape_html(str(e))}</code>",
                 thread_id=TELEGRAM_MEETS_THREAD_ID,
             )
 
-        # сбрасываем edit-сессию если вдруг редактировали её же
-        st = STATE.get(user_id) or {}
-        if st.get("edit_event_id") == event_id:
-            STATE.pop(user_id, None)
-
-        kb = {
-            "inline_keyboard": [
-                [{"text": "➕ Создать новую встречу", "callback_data": "meet:new"}]
-            ]
-        }
+        STATE.pop(user_id, None)
+        dashboard_changed()
+        reminders_schedule({
+            "event_id": event_id,
+            "client": client,
+            "date": date_s,
+            "time": time_s,
+            "start_iso": start_dt.isoformat(),
+            "manager_telegram_id": manager_id,
+            "comment": pretty_comment,
+            "recurrence": recurrence,
+        })
 
         tg_send_message(
-            "🗑 <b>Встреча удалена</b>\n\nМожешь сразу создать новую встречу 👇",
-            reply_markup=kb,
+            "✅ <b>Встреча создана</b>\n\n"
+            f"🧑 Клиент: <b>{escape_html(client)}</b>\n"
+            f"📅 {escape_html(date_s)} ⏰ {escape_html(time_s)}\n"
+            f"👤 Менеджер: <b>{escape_html(manager_name)}</b> {escape_html(manager_pretty) if manager_pretty.startswith('@') else ''}\n"
+            + (f"🔁 Повтор: <b>{escape_html(describe_rrule(recurrence))}</b>\n" if recurrence else "")
+            + f"🆔 Event ID: <code>{escape_html(event_id)}</code>",
+            reply_markup=post_meeting_keyboard(event_id),
             thread_id=TELEGRAM_MEETS_THREAD_ID,
         )
         return
 
-    # выбор поля для редактирования
-    if data.startswith("meet:editfield:"):
-        field = data.split(":", 2)[2].strip()
-        st = STATE.get(user_id) or {}
-        event_id = (st.get("edit_event_id") or "").strip()
-        if not event_id:
-            tg_send_message("⚠️ Сессия редактирования устарела. Нажми «Изменить» на нужной встрече ещё раз.", thread_id=TELEGRAM_MEETS_THREAD_ID)
-            STATE.pop(user_id, None)
-            return
 
-        # ДОБАВИЛИ: редактирование даты
-        if field == "date":
-            STATE[user_id]["step"] = "edit_date"
-            tg_send_message(
-                "📅 Введи новую дату в формате <code>ДД.ММ</code> или <code>ДД.ММ.ГГГГ</code>\nПример: <code>05.02</code>",
-                thread_id=TELEGRAM_MEETS_THREAD_ID,
-            )
-            return
+CALLBACK_HANDLERS = {
+    "new": _cb_new,
+    "create": _cb_new,
+    "deleted": _cb_deleted,
+    "cancel": _cb_cancel,
+    "find": _cb_find,
+    "edit": _cb_edit,
+    "delete": _cb_delete,
+    "editfield": _cb_editfield,
+    "editretry": _cb_editretry,
+    "back": _cb_back,
+    "date": _cb_date,
+    "time": _cb_time,
+    "manager": _cb_manager,
+    "comment": _cb_comment,
+    "repeat": _cb_repeat,
+    "repeatend": _cb_repeatend,
+    "confirm": _cb_confirm,
+}
 
-        if field == "time":
-            STATE[user_id]["step"] = "edit_time"
-            tg_send_message("⏰ Введи новое время в формате <code>ЧЧ:ММ</code>\nПример: <code>15:30</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
-            return
 
-        if field == "client":
-            STATE[user_id]["step"] = "edit_client"
-            tg_send_message("🧑 Введи новое название клиента одним сообщением.", thread_id=TELEGRAM_MEETS_THREAD_ID)
-            return
+def handle_callback(callback: dict):
+    cq_id = callback.get("id")
+    data = callback.get("data", "")
+    user_id = callback.get("from", {}).get("id")
 
-        if field == "comment":
-            STATE[user_id]["step"] = "edit_comment"
-            tg_send_message("📝 Введи новый комментарий (если удалить — отправь <code>-</code>)", thread_id=TELEGRAM_MEETS_THREAD_ID)
-            return
+    if cq_id:
+        tg_answer_callback(cq_id)
 
+    if not user_id:
         return
 
-    # --- исходный create-flow ---
-    if data.startswith("meet:back:"):
-        step = data.split(":", 2)[2]
-        if step == "client":
-            ask_client(user_id)
-        elif step == "date":
-            ask_date(user_id)
-        elif step == "time":
-            ask_time(user_id)
-        elif step == "manager":
-            ask_manager(user_id)
+    parsed = parse_callback_data(data)
+    if parsed is None:
+        tg_send_message("ℹ️ Кнопка устарела — найди встречу заново через /find.", thread_id=TELEGRAM_MEETS_THREAD_ID)
         return
 
-    if data.startswith("meet:date:"):
-        choice = data.split(":", 2)[2]
-        if user_id not in STATE:
-            ask_client(user_id)
-            return
-        if choice == "today":
-            STATE[user_id]["date"] = today_date_str()
-            ask_time(user_id)
-        elif choice == "tomorrow":
-            STATE[user_id]["date"] = tomorrow_date_str()
-            ask_time(user_id)
-        elif choice == "custom":
-            ask_custom_date(user_id)
-        return
-
-    if data.startswith("meet:time:"):
-        choice = data.split(":", 2)[2]
-        if user_id not in STATE:
-            ask_client(user_id)
-            return
-        if choice == "custom":
-            ask_custom_time(user_id)
-        else:
-            STATE[user_id]["time"] = choice
-            ask_manager(user_id)
-        return
+    action, params = parsed
+    handler = CALLBACK_HANDLERS.get(action)
+    if handler is not None:
+        handler(int(user_id), params, callback)
 
-    if data.startswith("meet:manager:"):
-        raw = data.split(":", 2)[2]
-        if user_id not in STATE:
-            ask_client(user_id)
-            return
 
-        parts = raw.split("|")
-        manager_token = parts[0] if len(parts) >= 1 else ""
-        telegram_id = parts[1] if len(parts) >= 2 else "0"
-        manager_name = parts[2] if len(parts) >= 3 else manager_token.replace("NAME:", "")
+# -------------------- Bulk import (/bulk) --------------------
+BULK_HELP = (
+    "📥 <b>Массовый импорт встреч</b>\n\n"
+    "Отправь список (по одной встрече в строке) или CSV-файл:\n"
+    "<code>клиент; ДД.ММ; ЧЧ:ММ; менеджер; комментарий</code>\n\n"
+    "Менеджер — @username, telegram_id или имя из листа Managers.\n"
+    "Пример:\n<code>ТОО Ромашка; 05.02; 15:30; @ivan; первая встреча</code>"
+)
+
 
-        manager_token = (manager_token or "").strip()
-        manager_name = (manager_name or "").strip()
-        telegram_id = (telegram_id or "0").strip()
+def ask_bulk(user_id: int):
+    STATE[user_id] = {"step": "bulk"}
+    kb = {"inline_keyboard": [[{"text": "❌ Отмена", "callback_data": "meet:cancel"}]]}
+    tg_send_message(BULK_HELP, reply_markup=kb, thread_id=TELEGRAM_MEETS_THREAD_ID)
 
-        manager_pretty = manager_name
-        if manager_token.startswith("@"):
-            manager_pretty = manager_token
-        elif manager_token.startswith("NAME:"):
-            manager_pretty = manager_name
 
-        STATE[user_id]["manager"] = manager_token
-        STATE[user_id]["manager_pretty"] = manager_pretty
-        STATE[user_id]["manager_name"] = manager_name
-        STATE[user_id]["manager_id"] = telegram_id
+def run_bulk_import(user_id: int, raw_text: str):
+    """
+    Проверяет все строки заранее; если есть ошибки — ничего не создаём.
+    Потом: batch-вставка в календарь + один append_rows в таблицу + одна сводка.
+    """
+    STATE.pop(user_id, None)
 
-        ask_comment(user_id)
+    rows = parse_bulk_text(raw_text)
+    if not rows:
+        tg_send_message("⚠️ Не нашёл ни одной строки для импорта.", thread_id=TELEGRAM_MEETS_THREAD_ID)
         return
 
-    if data.startswith("meet:comment:"):
-        choice = data.split(":", 2)[2]
-        if user_id not in STATE:
-            ask_client(user_id)
-            return
-        if choice == "skip":
-            STATE[user_id]["comment"] = ""
-            show_confirm(user_id)
+    try:
+        managers = get_managers()
+    except Exception as e:
+        tg_send_message(f"⚠️ Ошибка чтения менеджеров:\n<code>{escape_html(str(e))}</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
         return
 
-    if data.startswith("meet:confirm:"):
-        action = data.split(":", 2)[2]
-        if user_id not in STATE:
-            ask_client(user_id)
-            return
+    valid, errors = validate_bulk_rows(rows, managers)
+    if errors:
+        shown = errors[:20]
+        more = f"\n… и ещё {len(errors) - len(shown)}" if len(errors) > len(shown) else ""
+        tg_send_message(
+            "⚠️ <b>Импорт не выполнен</b> — исправь ошибки и отправь заново:\n\n"
+            + "\n".join(escape_html(x) for x in shown)
+            + more,
+            thread_id=TELEGRAM_MEETS_THREAD_ID,
+        )
+        return
 
-        if action == "edit":
-            # редактирование ДО создания (предпросмотр) — оставляем как возврат к клиенту
-            ask_client(user_id)
-            return
+    prepared = []
+    for item in valid:
+        m = item["manager"]
+        manager_name = (m.get("name") or "").strip()
+        username = (m.get("username") or "").strip()
+        if username and not username.startswith("@"):
+            username = "@" + username
+        manager_pretty = username or manager_name
+        telegram_id = (m.get("telegram_id") or "").strip()
+
+        client_for_title, pretty_comment = build_meeting_texts(item["client"], manager_name, manager_pretty, item["comment"])
+        start_dt = build_dt_from_inputs(item["date"], item["time"])
+        end_dt = start_dt + timedelta(minutes=60)
+
+        prepared.append(
+            {
+                "item": item,
+                "manager_name": manager_name,
+                "manager_pretty": manager_pretty,
+                "manager_id": int(telegram_id) if telegram_id.isdigit() else 0,
+                "pretty_comment": pretty_comment,
+                "start_dt": start_dt,
+                "end_dt": end_dt,
+                "event": {
+                    "client": client_for_title,
+                    "start_dt": start_dt,
+                    "end_dt": end_dt,
+                    "manager_id": int(telegram_id) if telegram_id.isdigit() else 0,
+                    "manager_name": manager_name,
+                    "comment": pretty_comment,
+                },
+            }
+        )
 
-        if action == "create":
-            d = STATE.get(user_id, {})
-
-            client = (d.get("client") or "").strip()
-            date_s = (d.get("date") or "").strip()
-            time_s = (d.get("time") or "").strip()
-            comment = (d.get("comment") or "").strip()
-
-            manager_id = (d.get("manager_id") or "").strip()
-            manager_name = (d.get("manager_name") or "").strip()
-            manager_pretty = (d.get("manager_pretty") or manager_name or "").strip()
-
-            if not (client and date_s and time_s and manager_id and manager_name):
-                tg_send_message("⚠️ Не хватает данных для создания встречи. Заполни заново.", thread_id=TELEGRAM_MEETS_THREAD_ID)
-                return
-
-            start_dt = build_dt_from_inputs(date_s, time_s)
-            end_dt = start_dt + timedelta(minutes=60)
-
-            # title for calendar
-            if manager_pretty.startswith("@"):
-                client_for_title = f"{client} — {manager_pretty}"
-            else:
-                client_for_title = f"{client} — {manager_name}"
-
-            pretty_prefix = f"Менеджер: {manager_name}"
-            if manager_pretty.startswith("@"):
-                pretty_prefix += f" ({manager_pretty})"
-            pretty_comment = f"{pretty_prefix}\n{comment}" if comment else pretty_prefix
-
-            try:
-                event_id = create_meeting_event(
-                    client=client_for_title,
-                    start_dt=start_dt,
-                    end_dt=end_dt,
-                    manager_id=int(manager_id) if str(manager_id).isdigit() else 0,
-                    manager_name=manager_name,
-                    comment=pretty_comment,
-                )
-            except Exception as e:
-                tg_send_message(
-                    f"❌ Ошибка создания события в календаре:\n<code>{escape_html(str(e))}</code>",
-                    thread_id=TELEGRAM_MEETS_THREAD_ID,
-                )
-                return
-
-            # ---- Save to Google Sheet (Meetings) ----
-            try:
-                append_meeting(
-                    created_by_id=user_id,
-                    created_by_username="",  # позже улучшим (можно вытянуть из update)
-                    chat_id=int(TELEGRAM_FORUM_CHAT_ID),
-                    thread_id=int(TELEGRAM_MEETS_THREAD_ID) if str(TELEGRAM_MEETS_THREAD_ID).isdigit() else None,
-                    client=client,  # оригинальное имя клиента (без приписки менеджера)
-                    date=date_s,
-                    time=time_s,
-                    start_iso=start_dt.isoformat(),
-                    end_iso=end_dt.isoformat(),
-                    manager_name=manager_name,
-                    manager_username=manager_pretty if manager_pretty.startswith("@") else "",
-                    manager_telegram_id=int(manager_id) if str(manager_id).isdigit() else 0,
-                    comment=pretty_comment,
-                    event_id=event_id,
-                    status="created",
-                )
-            except Exception as e:
-                tg_send_message(
-                    "⚠️ Встреча создана в календаре, но не смог записать в таблицу.\n"
-                    f"<code>{escape_html(str(e))}</code>",
-                    thread_id=TELEGRAM_MEETS_THREAD_ID,
-                )
+    try:
+        results = create_meeting_events_batch([p["event"] for p in prepared])
+    except Exception as e:
+        tg_send_message(
+            f"❌ Ошибка пакетного создания событий в календаре:\n<code>{escape_html(str(e))}</code>",
+            thread_id=TELEGRAM_MEETS_THREAD_ID,
+        )
+        return
 
-            STATE.pop(user_id, None)
+    chat_id, thread_id = forum_ids()
+    sheet_rows = []
+    created_lines = []
+    failed_lines = []
+    for p, res in zip(prepared, results):
+        item = p["item"]
+        label = f"{item['date']} {item['time']} — {item['client']}"
+        event_id = res.get("event_id")
+        if not event_id:
+            failed_lines.append(f"❌ {escape_html(label)}: <code>{escape_html(res.get('error') or '?')}</code>")
+            continue
+
+        created_lines.append(f"✅ {escape_html(label)} ({escape_html(p['manager_pretty'])})")
+        sheet_rows.append(
+            {
+                "created_by_id": user_id,
+                "created_by_username": "",
+                "chat_id": chat_id,
+                "thread_id": thread_id,
+                "client": item["client"],
+                "date": item["date"],
+                "time": item["time"],
+                "start_iso": p["start_dt"].isoformat(),
+                "end_iso": p["end_dt"].isoformat(),
+                "manager_name": p["manager_name"],
+                "manager_username": p["manager_pretty"] if p["manager_pretty"].startswith("@") else "",
+                "manager_telegram_id": p["manager_id"],
+                "comment": p["pretty_comment"],
+                "event_id": event_id,
+                "status": "created",
+            }
+        )
 
-            tg_send_message(
-                "✅ <b>Встреча создана</b>\n\n"
-                f"🧑 Клиент: <b>{escape_html(client)}</b>\n"
-                f"📅 {escape_html(date_s)} ⏰ {escape_html(time_s)}\n"
-                f"👤 Менеджер: <b>{escape_html(manager_name)}</b> {escape_html(manager_pretty) if manager_pretty.startswith('@') else ''}\n"
-                f"🆔 Event ID: <code>{escape_html(event_id)}</code>",
-                reply_markup=post_meeting_keyboard(event_id),
-                thread_id=TELEGRAM_MEETS_THREAD_ID,
-            )
-            return
+    if created_lines:
+        dashboard_changed()
+    for row in sheet_rows:
+        reminders_schedule(row)
+
+    sheet_warning = ""
+    try:
+        get_meetings_repository().append_meetings(sheet_rows)
+    except Exception as e:
+        sheet_warning = (
+            "\n\n⚠️ События созданы в календаре, но не смог записать их в таблицу.\n"
+            f"<code>{escape_html(str(e))}</code>"
+        )
+
+    text = (
+        "📥 <b>Импорт завершён</b>\n\n"
+        f"Создано: <b>{len(created_lines)}</b> из {len(prepared)}\n\n"
+        + "\n".join(created_lines + failed_lines)
+        + sheet_warning
+    )
+    tg_send_message(text, thread_id=TELEGRAM_MEETS_THREAD_ID)
+
+
+def _bulk_payload_from_message(message: dict) -> str | None:
+    """
+    Текст для импорта: CSV-документ (если прислали файл) или текст после /bulk.
+    None — если в сообщении нет данных для импорта.
+    """
+    doc = message.get("document") or {}
+    if doc.get("file_id"):
+        raw = tg_download_file(doc["file_id"])
+        return raw.decode("utf-8-sig", errors="replace")
+
+    text = (message.get("text") or "").strip()
+    if text.lower().startswith("/bulk"):
+        text = text[len("/bulk"):].strip()
+    return text or None
+
+
+def _is_bulk_command(message: dict) -> bool:
+    text = (message.get("text") or message.get("caption") or "").strip().lower()
+    return text.startswith("/bulk")
+
+
+def handle_bulk_message(user_id: int, message: dict) -> bool:
+    """
+    True, если сообщение относилось к /bulk (команда или данные на шаге bulk).
+    """
+    st = STATE.get(user_id) or {}
+    if not _is_bulk_command(message) and st.get("step") != "bulk":
+        return False
+
+    # правка уже отправленного сообщения приходит как edited_message — повторный импорт создал бы дубли
+    if message.get("edit_date"):
+        tg_send_message(
+            "ℹ️ Правка сообщения не импортируется повторно. Пришли исправленные строки новым сообщением /bulk.",
+            thread_id=TELEGRAM_MEETS_THREAD_ID,
+        )
+        return True
+
+    try:
+        payload = _bulk_payload_from_message(message)
+    except Exception as e:
+        tg_send_message(f"⚠️ Не смог скачать файл:\n<code>{escape_html(str(e))}</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
+        return True
+
+    if not payload:
+        ask_bulk(user_id)
+        return True
+
+    run_bulk_import(user_id, payload)
+    return True
+
+
+# -------------------- Search (/find) --------------------
+FIND_PAGE_SIZE = 5
+# запросы последних поисков для кнопок листания (callback_data ограничен 64 байтами)
+FIND_QUERIES_MAX = 200
+_FIND_QUERIES: OrderedDict[str, str] = OrderedDict()
+_FIND_SEQ = 0
+
+
+def _remember_find_query(query: str) -> str:
+    global _FIND_SEQ
+    _FIND_SEQ += 1
+    qid = format(_FIND_SEQ, "x")
+    _FIND_QUERIES[qid] = query
+    while len(_FIND_QUERIES) > FIND_QUERIES_MAX:
+        _FIND_QUERIES.popitem(last=False)
+    return qid
+
+
+def _is_find_command(text: str) -> bool:
+    head = (text or "").split(maxsplit=1)[0].lower() if text else ""
+    return head == "/find" or head.startswith("/find@")
+
+
+def render_find_page(query: str, qid: str, page: int) -> tuple[str, dict | None]:
+    """
+    Страница результатов поиска: FIND_PAGE_SIZE встреч, кнопки «✏️N» и листание.
+    """
+    results = get_meetings_repository().search_meetings(query)
+    if not results:
+        return f"🔎 По запросу «{escape_html(query)}» ничего не нашёл.", None
+
+    pages = (len(results) + FIND_PAGE_SIZE - 1) // FIND_PAGE_SIZE
+    page = max(0, min(page, pages - 1))
+    chunk = results[page * FIND_PAGE_SIZE:(page + 1) * FIND_PAGE_SIZE]
+
+    lines = [f"🔎 <b>{escape_html(query)}</b> — найдено: <b>{len(results)}</b> (стр. {page + 1}/{pages})", ""]
+    edit_row = []
+    for n, m in enumerate(chunk, page * FIND_PAGE_SIZE + 1):
+        lines.append(
+            f"<b>{n}.</b> 📅 {escape_html((m.get('date') or '').strip())} ⏰ {escape_html((m.get('time') or '').strip())}"
+            f" — <b>{escape_html((m.get('client') or '').strip())}</b>"
+        )
+        manager = (m.get("manager_username") or "").strip() or (m.get("manager_name") or "").strip()
+        if manager:
+            lines.append(f"👤 {escape_html(manager)}")
+        comment = " ".join((m.get("comment") or "").split())
+        if comment:
+            lines.append(f"📝 {escape_html(comment[:120])}{'…' if len(comment) > 120 else ''}")
+        lines.append("")
+        edit_row.append({"text": f"✏️{n}", "callback_data": callback_token("edit", event_id=m["event_id"])})
+
+    keyboard = [edit_row]
+    nav = []
+    if page > 0:
+        nav.append({"text": "◀️", "callback_data": f"meet:find:{qid}:{page - 1}"})
+    if page < pages - 1:
+        nav.append({"text": "▶️", "callback_data": f"meet:find:{qid}:{page + 1}"})
+    if nav:
+        keyboard.append(nav)
+    return "\n".join(lines).strip(), {"inline_keyboard": keyboard}
+
+
+def handle_find(text: str, *, chat_id: int | None = None):
+    """
+    /find <запрос>. chat_id — ответить в личку, None — в тему встреч.
+    """
+    parts = text.split(maxsplit=1)
+    query = parts[1].strip() if len(parts) > 1 else ""
+    if not query:
+        body, markup = "🔎 Напиши, что искать: <code>/find Иванов</code> (клиент, комментарий или менеджер).", None
+    else:
+        try:
+            body, markup = render_find_page(query, _remember_find_query(query), 0)
+        except Exception as e:
+            body, markup = f"⚠️ Поиск недоступен:\n<code>{escape_html(str(e))}</code>", None
+
+    if chat_id is None:
+        tg_send_message(body, reply_markup=markup, thread_id=TELEGRAM_MEETS_THREAD_ID)
+    else:
+        tg_send_message_to(chat_id, body, reply_markup=markup)
+
+
+# -------------------- Stats (/stats) --------------------
+STATS_DEFAULT_WEEKS = 4
+STATS_MAX_WEEKS = 52
+# разбивку по неделям показываем, только если недель немного (иначе строка не читается)
+STATS_WEEKS_INLINE = 8
+
+
+def _is_stats_command(text: str) -> bool:
+    head = (text or "").split(maxsplit=1)[0].lower() if text else ""
+    return head == "/stats" or head.startswith("/stats@")
+
+
+def _percent(part: int, total: int) -> str:
+    return f"{round(100 * part / total)}%" if total else "0%"
+
+
+def render_stats(weeks: list[str]) -> str:
+    """
+    Встречи по менеджерам за недели weeks: по неделям (без отменённых), всего и доля отмен.
+    """
+    stats = get_meetings_stats()
+    rows = stats.summary(weeks)
+    first, last = week_monday(weeks[0]), week_monday(weeks[-1]) + timedelta(days=6)
+    inline = len(weeks) <= STATS_WEEKS_INLINE
+    lines = [f"📊 <b>Встречи за {len(weeks)} нед.</b> ({first.strftime('%d.%m')} – {last.strftime('%d.%m.%Y')})"]
+    if inline:
+        lines.append(f"<i>по неделям: {' / '.join(w.split('-')[1] for w in weeks)}</i>")
+    lines.append("")
+    if not rows:
+        lines.append("Встреч нет.")
+    for r in rows:
+        per_week = " (" + " / ".join(str(r["by_week"].get(w, 0)) for w in weeks) + ")" if inline else ""
+        lines.append(
+            f"👤 <b>{escape_html(r['manager'])}</b> — {r['total'] - r['canceled']}{per_week}"
+            + (f", отмен {r['canceled']} ({_percent(r['canceled'], r['total'])})" if r["canceled"] else "")
+        )
+
+    totals = stats.status_totals(weeks)
+    total = sum(totals.values())
+    canceled = totals.get("canceled", 0)
+    lines.append("")
+    lines.append(
+        f"Итого: <b>{total - canceled}</b>, отменено {canceled} из {total} ({_percent(canceled, total)})"
+    )
+    if stats.built_at:
+        lines.append(f"<i>пересчёт с нуля: {escape_html(stats.built_at[:16].replace('T', ' '))}, /stats rebuild — заново</i>")
+    return "\n".join(lines)
+
+
+def handle_stats(text: str, *, chat_id: int | None = None):
+    """
+    /stats [недель] — агрегаты по менеджерам; /stats rebuild — полный пересчёт по всем листам.
+    chat_id — ответить в личку, None — в тему встреч.
+    """
+    parts = text.split(maxsplit=1)
+    arg = parts[1].strip().lower() if len(parts) > 1 else ""
+    try:
+        stats = get_meetings_stats()
+        if arg == "rebuild":
+            n = stats.rebuild()
+            body = f"📊 Статистика пересчитана: {n} встреч(и).\n\n" + render_stats(last_weeks(STATS_DEFAULT_WEEKS))
+        elif arg and not arg.isdigit():
+            body = "📊 <code>/stats</code>, <code>/stats 12</code> (недель) или <code>/stats rebuild</code>."
+        else:
+            stats.ensure_built()
+            n_weeks = min(int(arg or STATS_DEFAULT_WEEKS), STATS_MAX_WEEKS)
+            body = render_stats(last_weeks(n_weeks))
+    except Exception as e:
+        body = f"⚠️ Статистика недоступна:\n<code>{escape_html(str(e))}</code>"
+
+    if chat_id is None:
+        tg_send_message(body, thread_id=TELEGRAM_MEETS_THREAD_ID)
+    else:
+        tg_send_message_to(chat_id, body)
 
 
 # -------------------- Message handler --------------------
@@ -672,10 +1285,21 @@ def handle_message(message: dict):
             return
         user_id = int(user_id)
 
+        if handle_bulk_message(user_id, message):
+            return
+
         if text.lower() in ("/meet", "создать встречу", "+ встреча"):
             ask_client(user_id)
             return
 
+        if _is_find_command(text):
+            handle_find(text, chat_id=chat.get("id"))
+            return
+
+        if _is_stats_command(text):
+            handle_stats(text, chat_id=chat.get("id"))
+            return
+
         st = STATE.get(user_id)
         if not st:
             return
@@ -696,6 +1320,9 @@ def handle_message(message: dict):
             )
         return
 
+    if handle_bulk_message(user_id, message):
+        return
+
     if not text:
         return
 
@@ -704,6 +1331,14 @@ def handle_message(message: dict):
         ask_client(user_id)
         return
 
+    if _is_find_command(text):
+        handle_find(text)
+        return
+
+    if _is_stats_command(text):
+        handle_stats(text)
+        return
+
     return _handle_fsm_text(user_id, text)
 
 
@@ -740,6 +1375,25 @@ def _handle_fsm_text(user_id: int, text: str):
 
     if step == "comment":
         STATE[user_id]["comment"] = text
+        ask_repeat(user_id)
+        return
+
+    if step == "repeat_until":
+        if text.isdigit() and 2 <= int(text) <= 100:
+            STATE[user_id]["repeat_count"] = int(text)
+            STATE[user_id].pop("repeat_until", None)
+            show_confirm(user_id)
+            return
+        parsed = parse_date_input(text)
+        start_date = st.get("date") or ""
+        if not parsed or (start_date and build_dt_from_inputs(parsed, "00:00") < build_dt_from_inputs(start_date, "00:00")):
+            tg_send_message(
+                "⚠️ Нужна дата не раньше даты встречи или число от 2 до 100. Пример: <code>30.06</code> или <code>10</code>",
+                thread_id=TELEGRAM_MEETS_THREAD_ID,
+            )
+            return
+        STATE[user_id]["repeat_until"] = parsed
+        STATE[user_id].pop("repeat_count", None)
         show_confirm(user_id)
         return
 
@@ -751,185 +1405,262 @@ def _handle_fsm_text(user_id: int, text: str):
             STATE.pop(user_id, None)
             return
 
-        meeting = None
+        # чтение, проверка версии и запись — без гонок с другими правками этой встречи в процессе
+        with event_lock(event_id):
+            _apply_edit(user_id, st, step, event_id, text)
+        return
+
+
+def _event_etag(event_id: str) -> str | None:
+    # ETag события на момент открытия правки; Calendar недоступен — правим без проверки
+    try:
+        return get_event(event_id).get("etag")
+    except Exception as e:
+        print("Edit: event etag read failed:", repr(e))
+        return None
+
+
+def _edit_conflict(user_id: int, event_id: str, meeting: dict, text: str):
+    """
+    Встречу изменили после того, как пользователь начал правку: показываем текущие значения
+    и предлагаем применить его правку поверх (meet:editretry) или отменить.
+    """
+    try:
+        meeting = get_meetings_repository().get_meeting_by_event_id(event_id) or meeting
+    except Exception as e:
+        print("Edit: meeting re-read failed:", repr(e))
+
+    st = STATE.get(user_id)
+    if st is None:
+        return
+    st["edit_version"] = (meeting.get("version") or "").strip()
+    st["edit_etag"] = _event_etag(event_id)
+    st["pending_text"] = text
+
+    comment = (meeting.get("comment") or "").strip()
+    kb = {
+        "inline_keyboard": [
+            [{"text": "🔁 Применить мою правку", "callback_data": "meet:editretry"}],
+            [{"text": "❌ Отмена", "callback_data": "meet:cancel"}],
+        ]
+    }
+    tg_send_message(
+        "⚠️ <b>Встречу только что изменил кто-то другой</b> — твоя правка не применена.\n\n"
+        "Сейчас:\n"
+        f"🧑 Клиент: <b>{escape_html((meeting.get('client') or '').strip())}</b>\n"
+        f"📅 {escape_html((meeting.get('date') or '').strip())} ⏰ {escape_html((meeting.get('time') or '').strip())}\n"
+        f"📝 Комментарий: <i>{escape_html(comment) if comment else '—'}</i>\n\n"
+        f"Твоя правка: <code>{escape_html(text)}</code>",
+        reply_markup=kb,
+        thread_id=TELEGRAM_MEETS_THREAD_ID,
+    )
+
+
+def _update_edited_row(event_id: str, updates: dict, version: str):
+    # календарь уже обновлён: строку пишем только если её не поменяли с момента чтения
+    try:
+        get_meetings_repository().update_meeting_by_event_id(event_id, updates, expected_version=version)
+    except MeetingConflict:
+        tg_send_message(
+            "⚠️ В календаре обновил, но строку в таблице только что изменил кто-то другой — "
+            "проверь встречу и при необходимости повтори правку.",
+            thread_id=TELEGRAM_MEETS_THREAD_ID,
+        )
+    except Exception as e:
+        tg_send_message(
+            "⚠️ В календаре обновил, но не смог обновить строку в таблице.\n"
+            f"<code>{escape_html(str(e))}</code>",
+            thread_id=TELEGRAM_MEETS_THREAD_ID,
+        )
+
+
+def _apply_edit(user_id: int, st: dict, step: str, event_id: str, text: str):
+    meeting = None
+    try:
+        meeting = get_meetings_repository().get_meeting_by_event_id(event_id)
+    except Exception as e:
+        tg_send_message(f"⚠️ Ошибка чтения встречи из таблицы:\n<code>{escape_html(str(e))}</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
+        return
+
+    if not meeting:
+        tg_send_message("⚠️ Не нашёл эту встречу в таблице (Meetings).", thread_id=TELEGRAM_MEETS_THREAD_ID)
+        STATE.pop(user_id, None)
+        return
+
+    if (meeting.get("status") or "").strip() == "canceled":
+        STATE.pop(user_id, None)
+        tg_send_message("ℹ️ Пока ты редактировал, встречу удалили — правка не применена.", thread_id=TELEGRAM_MEETS_THREAD_ID)
+        return
+
+    # строку изменили после «Изменить» (другой пользователь, /reconcile, другой процесс)
+    version = (meeting.get("version") or "").strip()
+    if version != st.get("edit_version", version):
+        _edit_conflict(user_id, event_id, meeting, text)
+        return
+
+    date_s = (meeting.get("date") or "").strip()
+    old_time = (meeting.get("time") or "").strip()
+    old_client = (meeting.get("client") or "").strip()
+    old_comment = (meeting.get("comment") or "").strip()
+
+    manager_name = (meeting.get("manager_name") or "").strip()
+    manager_username = (meeting.get("manager_username") or "").strip()  # может быть "@xxx"
+    manager_pretty = manager_username if manager_username.startswith("@") else manager_name
+
+    # --- НОВОЕ: edit_date ---
+    if step == "edit_date":
+        parsed_date = parse_date_input(text)
+        if not parsed_date:
+            tg_send_message("⚠️ Неверный формат даты. Пример: <code>05.02</code> или <code>05.02.2026</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
+            return
+
+        # сохраняем время как было
+        if not old_time:
+            tg_send_message("⚠️ Не вижу текущее время встречи в таблице, не могу пересобрать дату/время.", thread_id=TELEGRAM_MEETS_THREAD_ID)
+            return
+
+        start_dt = build_dt_from_inputs(parsed_date, old_time)
+        end_dt = start_dt + timedelta(minutes=60)
+
         try:
-            meeting = get_meeting_by_event_id(event_id)
+            cal = update_meeting_event(event_id=event_id, start_dt=start_dt, end_dt=end_dt, if_match=st.get("edit_etag"))
+        except EventConflict:
+            _edit_conflict(user_id, event_id, meeting, text)
+            return
         except Exception as e:
-            tg_send_message(f"⚠️ Ошибка чтения встречи из таблицы:\n<code>{escape_html(str(e))}</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
+            tg_send_message(f"❌ Ошибка обновления даты в календаре:\n<code>{escape_html(str(e))}</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
             return
 
-        if not meeting:
-            tg_send_message("⚠️ Не нашёл эту встречу в таблице (Meetings).", thread_id=TELEGRAM_MEETS_THREAD_ID)
-            STATE.pop(user_id, None)
-            return
+        _update_edited_row(event_id, {
+            "date": parsed_date,
+            "start_iso": start_dt.isoformat(),
+            "end_iso": end_dt.isoformat(),
+            "status": "created",
+        }, version)
 
-        date_s = (meeting.get("date") or "").strip()
-        old_time = (meeting.get("time") or "").strip()
-        old_client = (meeting.get("client") or "").strip()
-        old_comment = (meeting.get("comment") or "").strip()
-
-        manager_name = (meeting.get("manager_name") or "").strip()
-        manager_username = (meeting.get("manager_username") or "").strip()  # может быть "@xxx"
-        manager_pretty = manager_username if manager_username.startswith("@") else manager_name
-
-        # --- НОВОЕ: edit_date ---
-        if step == "edit_date":
-            parsed_date = parse_date_input(text)
-            if not parsed_date:
-                tg_send_message("⚠️ Неверный формат даты. Пример: <code>05.02</code> или <code>05.02.2026</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
-                return
-
-            # сохраняем время как было
-            if not old_time:
-                tg_send_message("⚠️ Не вижу текущее время встречи в таблице, не могу пересобрать дату/время.", thread_id=TELEGRAM_MEETS_THREAD_ID)
-                return
-
-            start_dt = build_dt_from_inputs(parsed_date, old_time)
-            end_dt = start_dt + timedelta(minutes=60)
-
-            try:
-                update_meeting_event(event_id=event_id, start_dt=start_dt, end_dt=end_dt)
-            except Exception as e:
-                tg_send_message(f"❌ Ошибка обновления даты в календаре:\n<code>{escape_html(str(e))}</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
-                return
-
-            try:
-                update_meeting_by_event_id(event_id, {
-                    "date": parsed_date,
-                    "start_iso": start_dt.isoformat(),
-                    "end_iso": end_dt.isoformat(),
-                    "status": "created",
-                })
-            except Exception as e:
-                tg_send_message(
-                    "⚠️ В календаре обновил, но не смог обновить строку в таблице.\n"
-                    f"<code>{escape_html(str(e))}</code>",
-                    thread_id=TELEGRAM_MEETS_THREAD_ID,
-                )
+        STATE.pop(user_id, None)
+        dashboard_changed()
+        reminders_schedule({**meeting, "date": parsed_date, "start_iso": start_dt.isoformat(), "status": "created"})
 
-            STATE.pop(user_id, None)
+        tg_send_message(
+            "✅ <b>Встреча обновлена</b>\n\n"
+            f"🧑 Клиент: <b>{escape_html(old_client)}</b>\n"
+            f"📅 <b>{escape_html(parsed_date)}</b> ⏰ {escape_html(old_time)}\n"
+            f"👤 Менеджер: <b>{escape_html(manager_name)}</b> {escape_html(manager_pretty) if manager_pretty.startswith('@') else ''}\n"
+            f"🆔 Event ID: <code>{escape_html(event_id)}</code>"
+            f"{queued_note(cal)}",
+            reply_markup=post_meeting_keyboard(event_id),
+            thread_id=TELEGRAM_MEETS_THREAD_ID,
+        )
+        return
 
-            tg_send_message(
-                "✅ <b>Встреча обновлена</b>\n\n"
-                f"🧑 Клиент: <b>{escape_html(old_client)}</b>\n"
-                f"📅 <b>{escape_html(parsed_date)}</b> ⏰ {escape_html(old_time)}\n"
-                f"👤 Менеджер: <b>{escape_html(manager_name)}</b> {escape_html(manager_pretty) if manager_pretty.startswith('@') else ''}\n"
-                f"🆔 Event ID: <code>{escape_html(event_id)}</code>",
-                reply_markup=post_meeting_keyboard(event_id),
-                thread_id=TELEGRAM_MEETS_THREAD_ID,
-            )
+    if step == "edit_time":
+        parsed = parse_time_input(text)
+        if not parsed:
+            tg_send_message("⚠️ Неверный формат времени. Пример: <code>15:30</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
             return
 
-        if step == "edit_time":
-            parsed = parse_time_input(text)
-            if not parsed:
-                tg_send_message("⚠️ Неверный формат времени. Пример: <code>15:30</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
-                return
-
-            start_dt = build_dt_from_inputs(date_s, parsed)
-            end_dt = start_dt + timedelta(minutes=60)
-
-            try:
-                update_meeting_event(event_id=event_id, start_dt=start_dt, end_dt=end_dt)
-            except Exception as e:
-                tg_send_message(f"❌ Ошибка обновления в календаре:\n<code>{escape_html(str(e))}</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
-                return
-
-            try:
-                update_meeting_by_event_id(event_id, {
-                    "time": parsed,
-                    "start_iso": start_dt.isoformat(),
-                    "end_iso": end_dt.isoformat(),
-                    "status": "created",
-                })
-            except Exception as e:
-                tg_send_message(
-                    "⚠️ В календаре обновил, но не смог обновить строку в таблице.\n"
-                    f"<code>{escape_html(str(e))}</code>",
-                    thread_id=TELEGRAM_MEETS_THREAD_ID,
-                )
+        start_dt = build_dt_from_inputs(date_s, parsed)
+        end_dt = start_dt + timedelta(minutes=60)
 
-            STATE.pop(user_id, None)
-
-            tg_send_message(
-                "✅ <b>Встреча обновлена</b>\n\n"
-                f"🧑 Клиент: <b>{escape_html(old_client)}</b>\n"
-                f"📅 {escape_html(date_s)} ⏰ <b>{escape_html(parsed)}</b>\n"
-                f"👤 Менеджер: <b>{escape_html(manager_name)}</b> {escape_html(manager_pretty) if manager_pretty.startswith('@') else ''}\n"
-                f"🆔 Event ID: <code>{escape_html(event_id)}</code>",
-                reply_markup=post_meeting_keyboard(event_id),
-                thread_id=TELEGRAM_MEETS_THREAD_ID,
-            )
+        try:
+            cal = update_meeting_event(event_id=event_id, start_dt=start_dt, end_dt=end_dt, if_match=st.get("edit_etag"))
+        except EventConflict:
+            _edit_conflict(user_id, event_id, meeting, text)
+            return
+        except Exception as e:
+            tg_send_message(f"❌ Ошибка обновления в календаре:\n<code>{escape_html(str(e))}</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
             return
 
-        if step == "edit_client":
-            new_client = text.strip()
-            if not new_client:
-                tg_send_message("⚠️ Клиент не может быть пустым.", thread_id=TELEGRAM_MEETS_THREAD_ID)
-                return
-
-            # обновляем calendar summary + client внутри description
-            try:
-                update_meeting_event(event_id=event_id, client=new_client)
-            except Exception as e:
-                tg_send_message(f"❌ Ошибка обновления клиента в календаре:\n<code>{escape_html(str(e))}</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
-                return
-
-            try:
-                update_meeting_by_event_id(event_id, {"client": new_client})
-            except Exception as e:
-                tg_send_message(
-                    "⚠️ В календаре обновил, но не смог обновить строку в таблице.\n"
-                    f"<code>{escape_html(str(e))}</code>",
-                    thread_id=TELEGRAM_MEETS_THREAD_ID,
-                )
+        _update_edited_row(event_id, {
+            "time": parsed,
+            "start_iso": start_dt.isoformat(),
+            "end_iso": end_dt.isoformat(),
+            "status": "created",
+        }, version)
 
-            STATE.pop(user_id, None)
+        STATE.pop(user_id, None)
+        dashboard_changed()
+        reminders_schedule({**meeting, "time": parsed, "start_iso": start_dt.isoformat(), "status": "created"})
 
-            tg_send_message(
-                "✅ <b>Встреча обновлена</b>\n\n"
-                f"🧑 Клиент: <b>{escape_html(new_client)}</b>\n"
-                f"📅 {escape_html(date_s)} ⏰ <b>{escape_html(old_time)}</b>\n"
-                f"👤 Менеджер: <b>{escape_html(manager_name)}</b> {escape_html(manager_pretty) if manager_pretty.startswith('@') else ''}\n"
-                f"🆔 Event ID: <code>{escape_html(event_id)}</code>",
-                reply_markup=post_meeting_keyboard(event_id),
-                thread_id=TELEGRAM_MEETS_THREAD_ID,
-            )
+        tg_send_message(
+            "✅ <b>Встреча обновлена</b>\n\n"
+            f"🧑 Клиент: <b>{escape_html(old_client)}</b>\n"
+            f"📅 {escape_html(date_s)} ⏰ <b>{escape_html(parsed)}</b>\n"
+            f"👤 Менеджер: <b>{escape_html(manager_name)}</b> {escape_html(manager_pretty) if manager_pretty.startswith('@') else ''}\n"
+            f"🆔 Event ID: <code>{escape_html(event_id)}</code>"
+            f"{queued_note(cal)}",
+            reply_markup=post_meeting_keyboard(event_id),
+            thread_id=TELEGRAM_MEETS_THREAD_ID,
+        )
+        return
+
+    if step == "edit_client":
+        new_client = text.strip()
+        if not new_client:
+            tg_send_message("⚠️ Клиент не может быть пустым.", thread_id=TELEGRAM_MEETS_THREAD_ID)
             return
 
-        if step == "edit_comment":
-            new_comment = text.strip()
-            if new_comment == "-":
-                new_comment = ""
-
-            try:
-                update_meeting_event(event_id=event_id, comment=new_comment)
-            except Exception as e:
-                tg_send_message(f"❌ Ошибка обновления комментария в календаре:\n<code>{escape_html(str(e))}</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
-                return
-
-            try:
-                update_meeting_by_event_id(event_id, {"comment": new_comment})
-            except Exception as e:
-                tg_send_message(
-                    "⚠️ В календаре обновил, но не смог обновить строку в таблице.\n"
-                    f"<code>{escape_html(str(e))}</code>",
-                    thread_id=TELEGRAM_MEETS_THREAD_ID,
-                )
+        # обновляем calendar summary + client внутри description
+        try:
+            cal = update_meeting_event(event_id=event_id, client=new_client, if_match=st.get("edit_etag"))
+        except EventConflict:
+            _edit_conflict(user_id, event_id, meeting, text)
+            return
+        except Exception as e:
+            tg_send_message(f"❌ Ошибка обновления клиента в календаре:\n<code>{escape_html(str(e))}</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
+            return
 
-            STATE.pop(user_id, None)
+        _update_edited_row(event_id, {"client": new_client}, version)
 
-            tg_send_message(
-                "✅ <b>Встреча обновлена</b>\n\n"
-                f"🧑 Клиент: <b>{escape_html(old_client)}</b>\n"
-                f"📅 {escape_html(date_s)} ⏰ <b>{escape_html(old_time)}</b>\n"
-                f"👤 Менеджер: <b>{escape_html(manager_name)}</b> {escape_html(manager_pretty) if manager_pretty.startswith('@') else ''}\n"
-                f"📝 Комментарий: <i>{escape_html(new_comment) if new_comment else '—'}</i>\n"
-                f"🆔 Event ID: <code>{escape_html(event_id)}</code>",
-                reply_markup=post_meeting_keyboard(event_id),
-                thread_id=TELEGRAM_MEETS_THREAD_ID,
-            )
+        STATE.pop(user_id, None)
+        dashboard_changed()
+        reminders_schedule({**meeting, "client": new_client})
+
+        tg_send_message(
+            "✅ <b>Встреча обновлена</b>\n\n"
+            f"🧑 Клиент: <b>{escape_html(new_client)}</b>\n"
+            f"📅 {escape_html(date_s)} ⏰ <b>{escape_html(old_time)}</b>\n"
+            f"👤 Менеджер: <b>{escape_html(manager_name)}</b> {escape_html(manager_pretty) if manager_pretty.startswith('@') else ''}\n"
+            f"🆔 Event ID: <code>{escape_html(event_id)}</code>"
+            f"{queued_note(cal)}",
+            reply_markup=post_meeting_keyboard(event_id),
+            thread_id=TELEGRAM_MEETS_THREAD_ID,
+        )
+        return
+
+    if step == "edit_comment":
+        new_comment = text.strip()
+        if new_comment == "-":
+            new_comment = ""
+
+        try:
+            cal = update_meeting_event(event_id=event_id, comment=new_comment, if_match=st.get("edit_etag"))
+        except EventConflict:
+            _edit_conflict(user_id, event_id, meeting, text)
             return
+        except Exception as e:
+            tg_send_message(f"❌ Ошибка обновления комментария в календаре:\n<code>{escape_html(str(e))}</code>", thread_id=TELEGRAM_MEETS_THREAD_ID)
+            return
+
+        _update_edited_row(event_id, {"comment": new_comment}, version)
+
+        STATE.pop(user_id, None)
+        dashboard_changed()
+        reminders_schedule({**meeting, "comment": new_comment})
+
+        tg_send_message(
+            "✅ <b>Встреча обновлена</b>\n\n"
+            f"🧑 Клиент: <b>{escape_html(old_client)}</b>\n"
+            f"📅 {escape_html(date_s)} ⏰ <b>{escape_html(old_time)}</b>\n"
+            f"👤 Менеджер: <b>{escape_html(manager_name)}</b> {escape_html(manager_pretty) if manager_pretty.startswith('@') else ''}\n"
+            f"📝 Комментарий: <i>{escape_html(new_comment) if new_comment else '—'}</i>\n"
+            f"🆔 Event ID: <code>{escape_html(event_id)}</code>"
+            f"{queued_note(cal)}",
+            reply_markup=post_meeting_keyboard(event_id),
+            thread_id=TELEGRAM_MEETS_THREAD_ID,
+        )
+        return
 
 
 # -------------------- Polling loop --------------------
@@ -977,7 +1708,25 @@ def main():
     if not TELEGRAM_MEETS_THREAD_ID:
         raise RuntimeError("Missing TELEGRAM_MEETS_THREAD_ID")
 
-    poll_updates()
+    get_meetings_repository()  # SQLite + зеркало стартуют сразу, а не на первой встрече
+    replay_queue().start()  # отложенные (на время сбоя Google) записи из прошлого запуска
+    dashboard_changed()  # закреплённое расписание на сегодня (если DASHBOARD_ENABLED)
+    start_scheduler()  # отчёты по расписанию из процесса бота (если задан REPORT_SCHEDULE)
+    start_reminders()  # напоминания менеджерам в личку (если задан REMINDER_MINUTES)
+    get_meetings_stats()  # агрегаты /stats: состояние с диска, дальше — инкрементально на записях
+    recovered = start_meetings_writer()
+    if recovered:
+        print(f"Meetings spool: {recovered} row(s) pending from previous run")
+
+    # SIGTERM (остановка сервиса) → обычный выход, чтобы успеть сбросить буфер записи в таблицу
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        poll_updates()
+    finally:
+        get_meetings_repository().close()
+        if not flush_meetings():
+            print("WARNING: not all meetings were written to the sheet; they stay in the local spool")
+        print("Google API:", format_retry_metrics())
 
 
 if __name__ == "__main__":
@@ -1,25 +1,50 @@
 # src/calendar/calendar_service.py
 from __future__ import annotations
 
+import re
+import time
+import threading
 from datetime import datetime, timedelta, date
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 
 import pytz
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
 
 from src.config import GOOGLE_CALENDAR_ID, TZ
+from src.utils.replay import register_handler, replay_queue
+from src.utils.retry import call_google, http_status, is_outage, is_rejected
 
 SCOPES = ["https://www.googleapis.com/auth/calendar"]
 
 
 # -------------------- Google Calendar service --------------------
+# httplib2 внутри клиента не потокобезопасен — свой service на поток, но один на весь поток
+_SERVICE_LOCAL = threading.local()
+
+
 def _get_calendar_service():
-    creds = service_account.Credentials.from_service_account_file(
-        "credentials.json",
-        scopes=SCOPES,
-    )
-    return build("calendar", "v3", credentials=creds, cache_discovery=False)
+    """
+    google-api-python-client импортируется здесь, а не при импорте модуля:
+    пути, которые не ходят в Calendar (нормализация, отчёты из кэша), его не грузят.
+    """
+    service = getattr(_SERVICE_LOCAL, "service", None)
+    if service is None:
+        from google.oauth2 import service_account
+        from googleapiclient.discovery import build
+
+        creds = service_account.Credentials.from_service_account_file(
+            "credentials.json",
+            scopes=SCOPES,
+        )
+        service = build("calendar", "v3", credentials=creds, cache_discovery=False)
+        _SERVICE_LOCAL.service = service
+    return service
+
+
+def _execute(request, *, idempotent: bool = True):
+    """
+    request.execute() через общую политику повторов/квот (src/utils/retry.py).
+    """
+    return call_google("calendar", request.execute, idempotent=idempotent)
 
 
 # -------------------- TZ helpers --------------------
@@ -35,6 +60,101 @@ def _ensure_tz(dt: datetime) -> datetime:
     return dt.astimezone(tz)
 
 
+# -------------------- Recurrence helpers --------------------
+# kind -> (FREQ, INTERVAL)
+RECURRENCE_KINDS = {
+    "weekly": ("WEEKLY", 1),
+    "biweekly": ("WEEKLY", 2),
+    "monthly": ("MONTHLY", 1),
+}
+
+_RECURRENCE_TITLES = {
+    "weekly": "каждую неделю",
+    "biweekly": "раз в 2 недели",
+    "monthly": "каждый месяц",
+}
+
+# id экземпляра повторяющегося события: <base>_20260205T100000Z (или <base>_20260205 для all-day)
+_INSTANCE_ID_RE = re.compile(r"^(.+)_\d{8}(?:T\d{6}Z)?$")
+
+
+def build_rrule(kind: str, *, until: Optional[date] = None, count: Optional[int] = None) -> str:
+    """
+    Собирает RRULE для Google Calendar.
+    kind: weekly / biweekly / monthly
+    until: последняя дата (включительно, по TZ) или count: количество повторений.
+    """
+    if kind not in RECURRENCE_KINDS:
+        raise ValueError(f"Unknown recurrence kind: {kind}")
+    freq, interval = RECURRENCE_KINDS[kind]
+
+    parts = [f"FREQ={freq}"]
+    if interval > 1:
+        parts.append(f"INTERVAL={interval}")
+
+    if count is not None:
+        parts.append(f"COUNT={int(count)}")
+    elif until is not None:
+        # UNTIL должен быть в UTC, если у DTSTART есть timeZone
+        end_local = _ensure_tz(datetime(until.year, until.month, until.day, 23, 59, 59))
+        parts.append("UNTIL=" + end_local.astimezone(pytz.utc).strftime("%Y%m%dT%H%M%SZ"))
+
+    return "RRULE:" + ";".join(parts)
+
+
+def parse_rrule(rule: str) -> Dict[str, str]:
+    """
+    "RRULE:FREQ=WEEKLY;COUNT=4" -> {"FREQ": "WEEKLY", "COUNT": "4"}
+    """
+    body = (rule or "").strip()
+    if body.upper().startswith("RRULE:"):
+        body = body[len("RRULE:"):]
+    out: Dict[str, str] = {}
+    for part in body.split(";"):
+        if "=" in part:
+            k, v = part.split("=", 1)
+            out[k.strip().upper()] = v.strip()
+    return out
+
+
+def describe_rrule(rule: str) -> str:
+    """
+    Человекочитаемое описание RRULE (для сообщений бота).
+    """
+    p = parse_rrule(rule)
+    if not p:
+        return ""
+
+    interval = int(p.get("INTERVAL", "1") or 1)
+    kind = next(
+        (k for k, (freq, iv) in RECURRENCE_KINDS.items() if freq == p.get("FREQ") and iv == interval),
+        None,
+    )
+    text = _RECURRENCE_TITLES.get(kind, rule)
+
+    if p.get("COUNT"):
+        text += f", повторений: {p['COUNT']}"
+    elif p.get("UNTIL"):
+        try:
+            until_utc = pytz.utc.localize(datetime.strptime(p["UNTIL"], "%Y%m%dT%H%M%SZ"))
+            text += " до " + _ensure_tz(until_utc).strftime("%d.%m.%Y")
+        except ValueError:
+            text += f" до {p['UNTIL']}"
+    return text
+
+
+def base_event_id(event_id: str) -> str:
+    """
+    Для экземпляра повторяющегося события возвращает id серии, иначе — тот же id.
+    """
+    m = _INSTANCE_ID_RE.match((event_id or "").strip())
+    return m.group(1) if m else (event_id or "").strip()
+
+
+def is_instance_id(event_id: str) -> bool:
+    return base_event_id(event_id) != (event_id or "").strip()
+
+
 # -------------------- Description helpers --------------------
 def _build_description(
     *,
@@ -44,7 +164,9 @@ def _build_description(
     comment: str = "",
 ) -> str:
     """
-    Структурированное описание (удобно обновлять и парсить).
+    Описание события для людей. Программно поля читаются из extendedProperties
+    (read_meeting_meta); разбор description остался для событий до миграции
+    и для текстов длиннее META_VALUE_LIMIT.
 
     Поддержка многострочного comment:
     comment<<<
@@ -134,13 +256,72 @@ def parse_qeepe_description(description: str) -> Dict[str, Any]:
     return data
 
 
+# -------------------- Metadata (extendedProperties.private) --------------------
+# Поля встречи хранятся типизированно в extendedProperties.private (читаются словарём),
+# description остаётся только для людей. События до миграции (scripts/migrate_event_meta.py)
+# читаются по-старому — разбором description.
+META_SCHEMA_VERSION = 1
+META_VERSION_KEY = "qeepe_schema"
+META_TEXT_FIELDS = ("manager_name", "client", "comment")
+# Calendar ограничивает значение свойства 1024 символами: длиннее — обрезаем и ставим флаг,
+# полный текст в этом случае берётся из description
+META_VALUE_LIMIT = 1024
+
+
+def build_meeting_meta(*, manager_id: int, manager_name: str, client: str, comment: str = "") -> Dict[str, Optional[str]]:
+    """
+    extendedProperties.private для встречи бота (все значения — строки).
+    Флаги *_truncated, которые не нужны, выставлены в None: при PATCH это удаляет старый флаг.
+    """
+    meta: Dict[str, Optional[str]] = {
+        META_VERSION_KEY: str(META_SCHEMA_VERSION),
+        "source": "qeepe_meets",
+        "manager_id": str(int(manager_id or 0)),
+        "manager_name": manager_name or "",
+        "client": client or "",
+        "comment": (comment or "").strip(),
+    }
+    for key in META_TEXT_FIELDS:
+        truncated = len(meta[key]) > META_VALUE_LIMIT
+        meta[key] = meta[key][:META_VALUE_LIMIT]
+        meta[f"{key}_truncated"] = "1" if truncated else None
+    return meta
+
+
+def _meta_version(private: Dict[str, Any]) -> int:
+    raw = str(private.get(META_VERSION_KEY) or "").strip()
+    return int(raw) if raw.isdigit() else 0
+
+
+def read_meeting_meta(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    source, manager_id (int), manager_name, client, comment и version (0 — событие без схемы).
+    """
+    private = (event.get("extendedProperties") or {}).get("private") or {}
+    version = _meta_version(private)
+    if not version:
+        return {**parse_qeepe_description(event.get("description") or ""), "version": 0}
+
+    meta: Dict[str, Any] = {"source": private.get("source") or "", "version": version}
+    try:
+        meta["manager_id"] = int(private.get("manager_id") or 0)
+    except ValueError:
+        meta["manager_id"] = 0
+    truncated = [k for k in META_TEXT_FIELDS if private.get(f"{k}_truncated")]
+    parsed = parse_qeepe_description(event.get("description") or "") if truncated else {}
+    for key in META_TEXT_FIELDS:
+        meta[key] = private.get(key) or ""
+        if key in truncated:
+            meta[key] = parsed.get(key) or meta[key]
+    return meta
+
+
 def extract_qeepe_fields_from_event(event: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Нормализатор: вытаскивает основные поля из event, включая распарсенный description.
+    Нормализатор: вытаскивает основные поля из event (метаданные — см. read_meeting_meta).
     Удобно для отчётов и кнопок.
     """
-    desc = event.get("description") or ""
-    parsed = parse_qeepe_description(desc)
+    parsed = read_meeting_meta(event)
 
     # start/end (RFC3339)
     start_raw = (event.get("start") or {}).get("dateTime") or ""
@@ -172,31 +353,34 @@ def extract_qeepe_fields_from_event(event: Dict[str, Any]) -> Dict[str, Any]:
         "manager_name": parsed.get("manager_name", "") or "",
         "client": parsed.get("client", "") or "",
         "comment": parsed.get("comment", "") or "",
+        "meta_version": parsed["version"],
         "start_dt": start_dt,
         "end_dt": end_dt,
+        "recurring_event_id": event.get("recurringEventId") or "",
         "raw": event,
     }
 
 
 # -------------------- CRUD --------------------
-def create_meeting_event(
+# Calendar API принимает не больше 50 запросов в одном batch
+BATCH_LIMIT = 50
+
+
+def _build_event_body(
+    *,
     client: str,
     start_dt: datetime,
     end_dt: datetime,
     manager_id: int,
     manager_name: str,
     comment: str = "",
-) -> str:
-    """
-    Создаёт событие в общем календаре.
-    Возвращает event_id.
-    """
-    service = _get_calendar_service()
-
+    recurrence: Optional[str] = None,
+) -> Dict[str, Any]:
     start_dt = _ensure_tz(start_dt)
     end_dt = _ensure_tz(end_dt)
 
-    event = {
+    meta = build_meeting_meta(manager_id=manager_id, manager_name=manager_name, client=client, comment=comment)
+    body = {
         "summary": f"Встреча: {client}",
         "description": _build_description(
             manager_id=manager_id,
@@ -204,23 +388,193 @@ def create_meeting_event(
             client=client,
             comment=comment,
         ),
+        "extendedProperties": {"private": {k: v for k, v in meta.items() if v is not None}},
         "start": {"dateTime": start_dt.isoformat(), "timeZone": TZ},
         "end": {"dateTime": end_dt.isoformat(), "timeZone": TZ},
     }
+    if recurrence:
+        # одно повторяющееся событие; экземпляры раскрывает singleEvents=True при чтении
+        body["recurrence"] = [recurrence]
+    return body
 
-    created = service.events().insert(calendarId=GOOGLE_CALENDAR_ID, body=event).execute()
+
+def create_meeting_event(
+    client: str,
+    start_dt: datetime,
+    end_dt: datetime,
+    manager_id: int,
+    manager_name: str,
+    comment: str = "",
+    recurrence: Optional[str] = None,
+) -> str:
+    """
+    Создаёт событие в общем календаре.
+    recurrence: RRULE (см. build_rrule) — тогда создаётся одно повторяющееся событие.
+    Возвращает event_id.
+    """
+    service = _get_calendar_service()
+
+    event = _build_event_body(
+        client=client,
+        start_dt=start_dt,
+        end_dt=end_dt,
+        manager_id=manager_id,
+        manager_name=manager_name,
+        comment=comment,
+        recurrence=recurrence,
+    )
+
+    created = _execute(service.events().insert(calendarId=GOOGLE_CALENDAR_ID, body=event), idempotent=False)
     return created["id"]
 
 
+def create_meeting_events_batch(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Пакетное создание событий (batch HTTP, до BATCH_LIMIT вставок за запрос).
+
+    items: список dict с аргументами как у create_meeting_event().
+    Возвращает список той же длины и в том же порядке:
+      {"event_id": "..."} — успех
+      {"error": "..."}    — ошибка конкретной вставки
+
+    Если пачка целиком упала (batch.execute), уже созданные события предыдущих пачек
+    возвращаются как есть, а вставки этой пачки и всех следующих — с ошибкой.
+    """
+    service = _get_calendar_service()
+    results: List[Dict[str, Any]] = [{} for _ in items]
+
+    def _callback(request_id, response, exception):
+        i = int(request_id)
+        if exception is not None:
+            results[i] = {"error": str(exception), "rate_limited": http_status(exception) == 429}
+        else:
+            results[i] = {"event_id": response["id"]}
+
+    todo = list(range(len(items)))
+    failed = False
+    for attempt in range(3):
+        for offset in range(0, len(todo), BATCH_LIMIT):
+            chunk = todo[offset: offset + BATCH_LIMIT]
+            batch = service.new_batch_http_request(callback=_callback)
+            for i in chunk:
+                body = _build_event_body(**items[i])
+                batch.add(
+                    service.events().insert(calendarId=GOOGLE_CALENDAR_ID, body=body),
+                    request_id=str(i),
+                )
+            try:
+                call_google("calendar", batch.execute, idempotent=False, cost=len(chunk))
+            except Exception as e:
+                # таймаут / 5xx: часть вставок пачки могла пройти — повторять вслепую нельзя
+                error = str(e) if is_rejected(e) else f"{e} (исход неизвестен — проверь календарь перед повтором)"
+                for i in todo[offset:]:
+                    if not results[i] or "rate_limited" in results[i]:
+                        results[i] = {"error": error}
+                failed = True
+                break
+        if failed:
+            break
+
+        # вставки, отклонённые по квоте (429), сервер не выполнил — их можно безопасно повторить
+        todo = [i for i in todo if results[i].get("rate_limited")]
+        if not todo:
+            break
+        time.sleep(2 ** attempt)
+
+    for r in results:
+        r.pop("rate_limited", None)
+    return results
+
+
 def get_event(event_id: str) -> Dict[str, Any]:
     """
     Получить событие по event_id.
     """
     service = _get_calendar_service()
-    return service.events().get(calendarId=GOOGLE_CALENDAR_ID, eventId=event_id).execute()
+    return _execute(service.events().get(calendarId=GOOGLE_CALENDAR_ID, eventId=event_id))
+
+
+def _execute_batch(keys: List[str], make_request) -> Dict[str, Any]:
+    """
+    Запросы make_request(key) пачками по BATCH_LIMIT (batch HTTP).
+    Возвращает {key: ответ или исключение}; отклонённые по квоте (429) повторяются.
+    """
+    service = _get_calendar_service()
+    results: Dict[str, Any] = {}
+
+    def _callback(request_id, response, exception):
+        results[request_id] = exception if exception is not None else response
+
+    todo = list(dict.fromkeys(keys))
+    for attempt in range(3):
+        for offset in range(0, len(todo), BATCH_LIMIT):
+            chunk = todo[offset: offset + BATCH_LIMIT]
+            batch = service.new_batch_http_request(callback=_callback)
+            for key in chunk:
+                batch.add(make_request(service, key), request_id=key)
+            call_google("calendar", batch.execute, cost=len(chunk))
+
+        todo = [k for k in todo if isinstance(results.get(k), Exception) and http_status(results[k]) == 429]
+        if not todo:
+            break
+        time.sleep(2 ** attempt)
+    return results
+
+
+def get_events_batch(event_ids: List[str]) -> Dict[str, Any]:
+    """
+    Несколько событий по event_id. {event_id: событие или исключение (например, HttpError 404)}.
+    """
+    return _execute_batch(
+        event_ids,
+        lambda service, event_id: service.events().get(calendarId=GOOGLE_CALENDAR_ID, eventId=event_id),
+    )
+
+
+def patch_events_batch(patches: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    PATCH нескольких событий: {event_id: body}. {event_id: событие или исключение}.
+    """
+    return _execute_batch(
+        list(patches),
+        lambda service, event_id: service.events().patch(
+            calendarId=GOOGLE_CALENDAR_ID, eventId=event_id, body=patches[event_id]
+        ),
+    )
 
 
-def update_meeting_event(
+class EventConflict(RuntimeError):
+    """
+    Событие изменили после того, как его прочитали (ETag не совпал, 412 на If-Match).
+    """
+
+
+# сколько раз пересобираем description, если событие поменяли между чтением и PATCH
+PATCH_CONFLICT_ATTEMPTS = 3
+
+
+def update_meeting_event(*, event_id: str, **fields) -> Dict[str, Any]:
+    """
+    PATCH-update события (см. _update_meeting_event_now).
+
+    Если Calendar недоступен (breaker открыт / сетевой сбой) или в очереди уже есть
+    отложенные записи — правка ставится в очередь повторов, возвращается {"id": event_id, "_queued": True}.
+    Отложенная правка применяется без If-Match: к моменту повтора ETag всё равно устареет.
+    """
+    queue = replay_queue()
+    kwargs = {"event_id": event_id, **fields}
+    if not queue.has_pending("calendar"):
+        try:
+            return _update_meeting_event_now(**kwargs)
+        except Exception as e:
+            if not is_outage(e):
+                raise
+    kwargs.pop("if_match", None)
+    queue.enqueue("calendar", "calendar.update", kwargs)
+    return {"id": event_id, "_queued": True}
+
+
+def _update_meeting_event_now(
     *,
     event_id: str,
     client: Optional[str] = None,            # обновит summary + client в description
@@ -231,6 +585,7 @@ def update_meeting_event(
     comment: Optional[str] = None,           # для description
     summary: Optional[str] = None,           # ручной summary
     description: Optional[str] = None,       # ручной description
+    if_match: Optional[str] = None,          # ETag, который видел пользователь
 ) -> Dict[str, Any]:
     """
     PATCH-update события.
@@ -238,33 +593,42 @@ def update_meeting_event(
     Если переданы client/manager/comment — description собираем автоматически,
     но можно переопределить вручную через description=...
     summary можно авто (Встреча: client) или вручную через summary=...
+
+    if_match — событие с тех пор изменили → EventConflict (PATCH с If-Match, атомарно на стороне
+    Calendar). Без него description, собранный из прочитанного события, тоже пишется с If-Match:
+    если событие поменяли между чтением и записью, перечитываем и собираем заново.
     """
     service = _get_calendar_service()
-    patch: Dict[str, Any] = {}
+    base: Dict[str, Any] = {}
 
     # ---- time ----
     if start_dt is not None:
         start_dt = _ensure_tz(start_dt)
-        patch["start"] = {"dateTime": start_dt.isoformat(), "timeZone": TZ}
+        base["start"] = {"dateTime": start_dt.isoformat(), "timeZone": TZ}
 
     if end_dt is not None:
         end_dt = _ensure_tz(end_dt)
-        patch["end"] = {"dateTime": end_dt.isoformat(), "timeZone": TZ}
+        base["end"] = {"dateTime": end_dt.isoformat(), "timeZone": TZ}
 
     # ---- summary ----
     if summary is not None:
-        patch["summary"] = summary
+        base["summary"] = summary
     elif client is not None:
-        patch["summary"] = f"Встреча: {client}"
+        base["summary"] = f"Встреча: {client}"
 
     # ---- description ----
     if description is not None:
-        patch["description"] = description
-    else:
-        need_rebuild = any(x is not None for x in [client, manager_id, manager_name, comment])
+        base["description"] = description
+    need_rebuild = description is None and any(x is not None for x in [client, manager_id, manager_name, comment])
+
+    for attempt in range(1, PATCH_CONFLICT_ATTEMPTS + 1):
+        patch = dict(base)
+        current: Dict[str, Any] = {}
         if need_rebuild:
             current = get_event(event_id)
-            parsed = parse_qeepe_description(current.get("description") or "")
+            if if_match is not None and current.get("etag") != if_match:
+                raise EventConflict(f"event {event_id} was changed concurrently")
+            parsed = read_meeting_meta(current)
 
             curr_manager_id = int(parsed.get("manager_id", 0) or 0)
             curr_manager_name = str(parsed.get("manager_name", "") or "")
@@ -282,31 +646,79 @@ def update_meeting_event(
                 client=new_client,
                 comment=new_comment,
             )
+            # заодно переводит на схему событие, созданное до миграции
+            patch["extendedProperties"] = {
+                "private": build_meeting_meta(
+                    manager_id=new_manager_id,
+                    manager_name=new_manager_name,
+                    client=new_client,
+                    comment=new_comment,
+                )
+            }
+
+        if not patch:
+            return get_event(event_id)
+
+        request = service.events().patch(
+            calendarId=GOOGLE_CALENDAR_ID,
+            eventId=event_id,
+            body=patch,
+        )
+        etag = if_match or current.get("etag")
+        if etag:
+            request.headers["If-Match"] = etag
+        try:
+            return _execute(request)
+        except Exception as e:
+            if http_status(e) != 412:
+                raise
+            if if_match is not None or not need_rebuild or attempt == PATCH_CONFLICT_ATTEMPTS:
+                raise EventConflict(f"event {event_id} was changed concurrently") from e
+            # description собран из устаревшей версии события — перечитываем
 
-    if not patch:
-        return get_event(event_id)
-
-    updated = service.events().patch(
-        calendarId=GOOGLE_CALENDAR_ID,
-        eventId=event_id,
-        body=patch,
-    ).execute()
 
-    return updated
+def delete_event(event_id: str) -> bool:
+    """
+    Удалить событие по event_id.
+    True — удалено сейчас; False — Calendar недоступен, удаление поставлено в очередь повторов.
+    """
+    queue = replay_queue()
+    if not queue.has_pending("calendar"):
+        try:
+            _delete_event_now(event_id)
+            return True
+        except Exception as e:
+            if not is_outage(e):
+                raise
+    queue.enqueue("calendar", "calendar.delete", {"event_id": event_id})
+    return False
 
 
-def delete_event(event_id: str) -> None:
+def _delete_event_now(event_id: str) -> None:
     """
-    Удалить событие по event_id.
+    Уже удалённое (410 Gone — например, после повтора запроса) считаем успехом.
     """
     service = _get_calendar_service()
-    service.events().delete(calendarId=GOOGLE_CALENDAR_ID, eventId=event_id).execute()
+    try:
+        _execute(service.events().delete(calendarId=GOOGLE_CALENDAR_ID, eventId=event_id))
+    except Exception as e:
+        if http_status(e) != 410:
+            raise
+
+
+register_handler("calendar.update", _update_meeting_event_now)
+register_handler("calendar.delete", _delete_event_now)
 
 
 # -------------------- Listing --------------------
+# последний успешный ответ по дню — отдаём его, пока Calendar недоступен
+_STALE_EVENTS: Dict[date, List[Dict[str, Any]]] = {}
+
+
 def list_events_for_date(day: date) -> List[Dict[str, Any]]:
     """
     Список событий на конкретный день (по TZ).
+    При недоступности Calendar — последний успешный ответ за этот день, события помечены "_stale".
     """
     service = _get_calendar_service()
     tz = pytz.timezone(TZ)
@@ -314,20 +726,92 @@ def list_events_for_date(day: date) -> List[Dict[str, Any]]:
     start = tz.localize(datetime(day.year, day.month, day.day, 0, 0, 0))
     end = start + timedelta(days=1)
 
-    events_result = (
-        service.events()
-        .list(
-            calendarId=GOOGLE_CALENDAR_ID,
-            timeMin=start.isoformat(),
-            timeMax=end.isoformat(),
-            singleEvents=True,
-            orderBy="startTime",
-            maxResults=250,
+    try:
+        events_result = _execute(
+            service.events()
+            .list(
+                calendarId=GOOGLE_CALENDAR_ID,
+                timeMin=start.isoformat(),
+                timeMax=end.isoformat(),
+                singleEvents=True,
+                orderBy="startTime",
+                maxResults=250,
+            )
         )
-        .execute()
-    )
+    except Exception as e:
+        if not is_outage(e) or day not in _STALE_EVENTS:
+            raise
+        print(f"Calendar unavailable, serving cached events for {day}:", repr(e))
+        return [{**ev, "_stale": True} for ev in _STALE_EVENTS[day]]
+
+    items = events_result.get("items", [])
+    _STALE_EVENTS[day] = items
+    return items
+
+
+# Calendar отдаёт не больше 2500 событий на страницу
+LIST_PAGE_SIZE = 2500
+
+
+def iter_events_between(
+    start_day: date,
+    end_day: date,
+    *,
+    single_events: bool = True,
+    show_deleted: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """
+    События с start_day по end_day включительно (по TZ) постранично (nextPageToken),
+    по мере загрузки страниц.
+
+    single_events=False — повторяющаяся встреча приходит одним событием серии (как строка в таблице),
+    без сортировки по времени; show_deleted=True — удалённые события со status="cancelled".
+    """
+    service = _get_calendar_service()
+    tz = pytz.timezone(TZ)
+
+    start = tz.localize(datetime(start_day.year, start_day.month, start_day.day, 0, 0, 0))
+    end = tz.localize(datetime(end_day.year, end_day.month, end_day.day, 0, 0, 0)) + timedelta(days=1)
 
-    return events_result.get("items", [])
+    params: Dict[str, Any] = {
+        "calendarId": GOOGLE_CALENDAR_ID,
+        "timeMin": start.isoformat(),
+        "timeMax": end.isoformat(),
+        "singleEvents": single_events,
+        "showDeleted": show_deleted,
+        "maxResults": LIST_PAGE_SIZE,
+    }
+    if single_events:
+        params["orderBy"] = "startTime"
+
+    page_token = None
+    while True:
+        result = _execute(service.events().list(pageToken=page_token, **params))
+        yield from result.get("items", [])
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            return
+
+
+def list_events_between(start_day: date, end_day: date) -> List[Dict[str, Any]]:
+    """
+    Все события с start_day по end_day включительно (по TZ) — один постраничный запрос
+    (nextPageToken), без отдельного запроса на каждый день.
+    """
+    return list(iter_events_between(start_day, end_day))
+
+
+def list_qeepe_meetings_between(start_day: date, end_day: date, *, only_source: bool = True) -> List[Dict[str, Any]]:
+    """
+    Как list_qeepe_meetings_for_date, но за диапазон дней (одна выборка).
+    """
+    out: List[Dict[str, Any]] = []
+    for ev in list_events_between(start_day, end_day):
+        fields = extract_qeepe_fields_from_event(ev)
+        if only_source and (fields.get("source") or "").strip() != "qeepe_meets":
+            continue
+        out.append(fields)
+    return out
 
 
 def list_qeepe_meetings_for_date(day: date, *, only_source: bool = True) -> List[Dict[str, Any]]:
@@ -344,6 +828,46 @@ def list_qeepe_meetings_for_date(day: date, *, only_source: bool = True) -> List
         if only_source:
             if (fields.get("source") or "").strip() != "qeepe_meets":
                 continue
+        if ev.get("_stale"):
+            fields["_stale"] = True
         out.append(fields)
 
     return out
+
+
+# -------------------- Metadata migration --------------------
+def migrate_events_meta(start_day: date, end_day: date, *, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Переводит встречи бота за период на extendedProperties (META_SCHEMA_VERSION):
+    поля берутся из description, PATCH — batch-запросами. Уже переведённые пропускаются,
+    так что повторный запуск безопасен. Возвращает {"checked", "migrated", "failed"}.
+    """
+    patches: Dict[str, Dict[str, Any]] = {}
+    checked = 0
+    for ev in iter_events_between(start_day, end_day, single_events=False):
+        private = (ev.get("extendedProperties") or {}).get("private") or {}
+        if ev.get("status") == "cancelled" or _meta_version(private) >= META_SCHEMA_VERSION:
+            continue
+        meta = read_meeting_meta(ev)
+        if (meta.get("source") or "").strip() != "qeepe_meets":
+            continue
+        checked += 1
+        patches[ev["id"]] = {
+            "extendedProperties": {
+                "private": build_meeting_meta(
+                    manager_id=meta.get("manager_id", 0),
+                    manager_name=meta.get("manager_name", ""),
+                    client=meta.get("client", ""),
+                    comment=meta.get("comment", ""),
+                )
+            }
+        }
+
+    if dry_run or not patches:
+        return {"checked": checked, "migrated": 0, "failed": 0}
+
+    results = patch_events_batch(patches)
+    failed = [event_id for event_id, r in results.items() if isinstance(r, Exception)]
+    for event_id in failed:
+        print(f"Meta migration failed for {event_id}:", repr(results[event_id]))
+    return {"checked": checked, "migrated": len(patches) - len(failed), "failed": len(failed)}
@@ -1,7 +1,22 @@
+"""
+Настройки из окружения (.env).
+
+Значения считаются лениво, при первом обращении (module __getattr__):
+.env читается один раз, обязательная настройка падает, только если она реально нужна
+(например, скрипту архивации не нужен токен Telegram).
+"""
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+_ENV_LOADED = False
+
+
+def _load_env() -> None:
+    global _ENV_LOADED
+    if not _ENV_LOADED:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _ENV_LOADED = True
 
 
 def _need(name: str) -> str:
@@ -11,17 +26,106 @@ def _need(name: str) -> str:
     return v
 
 
-# -------------------- Telegram (обязательно всегда) --------------------
-TELEGRAM_BOT_TOKEN = _need("TELEGRAM_BOT_TOKEN")
-TELEGRAM_FORUM_CHAT_ID = _need("TELEGRAM_FORUM_CHAT_ID")
-TELEGRAM_MEETS_THREAD_ID = os.getenv("TELEGRAM_MEETS_THREAD_ID", "").strip()
+def _str(name: str, default: str = "") -> str:
+    return os.getenv(name, default).strip()
+
+
+def _float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)) or default)
+
+
+def _int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)) or default)
+
+
+def _flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes")
+
+
+_SETTINGS = {
+    # -------------------- Telegram (обязательно всегда) --------------------
+    "TELEGRAM_BOT_TOKEN": lambda: _need("TELEGRAM_BOT_TOKEN"),
+    "TELEGRAM_FORUM_CHAT_ID": lambda: _need("TELEGRAM_FORUM_CHAT_ID"),
+    "TELEGRAM_MEETS_THREAD_ID": lambda: _str("TELEGRAM_MEETS_THREAD_ID"),
+
+    # -------------------- Google Calendar (нужно для отчётов и бота) --------------------
+    "GOOGLE_CALENDAR_ID": lambda: os.getenv("GOOGLE_CALENDAR_ID", "primary"),
+    "TZ": lambda: os.getenv("TZ", "Asia/Almaty"),
+
+    # -------------------- Google Sheets (нужно только для бота на сервере) --------------------
+    "GOOGLE_SHEET_URL": lambda: _str("GOOGLE_SHEET_URL"),
+    "GOOGLE_MANAGERS_SHEET": lambda: os.getenv("GOOGLE_MANAGERS_SHEET", "Managers"),
+    # таймаут одного HTTP-запроса к Sheets (секунды): зависший запрос не держит поток бесконечно
+    "SHEETS_HTTP_TIMEOUT": lambda: _float("SHEETS_HTTP_TIMEOUT", 30),
+
+    # write-behind буфер для листа Meetings: строки копятся SHEETS_FLUSH_WINDOW секунд
+    # и уходят одним append_rows; до успешной записи лежат в локальном spool-файле
+    "MEETINGS_SPOOL_PATH": lambda: os.getenv("MEETINGS_SPOOL_PATH", "data/meetings_spool.jsonl"),
+    "SHEETS_FLUSH_WINDOW": lambda: _float("SHEETS_FLUSH_WINDOW", 2),
+
+    # -------------------- Local storage (опционально) --------------------
+    # Если задан путь — встречи хранятся в SQLite, а лист Meetings становится зеркалом,
+    # которое фоновый поток догоняет раз в SHEETS_MIRROR_INTERVAL секунд.
+    "MEETINGS_DB_PATH": lambda: _str("MEETINGS_DB_PATH"),
+    "SHEETS_MIRROR_INTERVAL": lambda: _float("SHEETS_MIRROR_INTERVAL", 5),
+
+    # -------------------- Google API quotas / retries --------------------
+    # Клиентский token bucket под поминутные квоты (запросов в минуту на процесс)
+    "SHEETS_RATE_PER_MIN": lambda: _float("SHEETS_RATE_PER_MIN", 60),
+    "CALENDAR_RATE_PER_MIN": lambda: _float("CALENDAR_RATE_PER_MIN", 300),
+    # Бюджет на повторы одного запроса (секунды) и максимум попыток
+    "GOOGLE_RETRY_BUDGET": lambda: _float("GOOGLE_RETRY_BUDGET", 30),
+    "GOOGLE_RETRY_ATTEMPTS": lambda: _int("GOOGLE_RETRY_ATTEMPTS", 5),
+    # Очередь записей, отложенных из-за недоступности Google (circuit open)
+    "REPLAY_SPOOL_PATH": lambda: os.getenv("REPLAY_SPOOL_PATH", "data/replay_queue.jsonl"),
+
+    # -------------------- Pinned dashboard (опционально) --------------------
+    # Закреплённое сообщение «встречи на сегодня» в теме, бот правит его после каждого изменения
+    "DASHBOARD_ENABLED": lambda: _flag("DASHBOARD_ENABLED"),
+    "DASHBOARD_STATE_PATH": lambda: os.getenv("DASHBOARD_STATE_PATH", "data/dashboard.json"),
+    # не чаще одной правки в N секунд (изменения за это время склеиваются в одну)
+    "DASHBOARD_MIN_INTERVAL": lambda: _float("DASHBOARD_MIN_INTERVAL", 10),
+
+    # -------------------- In-process scheduler (опционально) --------------------
+    # Отчёты из процесса бота вместо cron в GitHub Actions, время — локальное (TZ):
+    #   REPORT_SCHEDULE=today@09:00,tomorrow@17:00,week@09:00/mon (дни через +: /mon+thu)
+    # виды: today, tomorrow (карточки), digest (сводка по менеджерам), week (на 7 дней)
+    "REPORT_SCHEDULE": lambda: _str("REPORT_SCHEDULE"),
+    "SCHEDULER_STATE_PATH": lambda: os.getenv("SCHEDULER_STATE_PATH", "data/scheduler.json"),
+
+    # -------------------- Reminders (опционально) --------------------
+    # Личное сообщение менеджеру за N минут до встречи (0 — выключено).
+    # Менеджер должен хотя бы раз написать боту в личку, иначе Telegram не даст отправить.
+    "REMINDER_MINUTES": lambda: _int("REMINDER_MINUTES", 0),
+
+    # -------------------- Inline buttons --------------------
+    # Токены callback_data (src/utils/callback_tokens.py): файл, TTL в памяти (секунды)
+    # и сколько дней хранить ненажимавшиеся токены на диске
+    "CALLBACK_TOKENS_PATH": lambda: os.getenv("CALLBACK_TOKENS_PATH", "data/callback_tokens.sqlite3"),
+    "CALLBACK_TOKEN_TTL": lambda: _float("CALLBACK_TOKEN_TTL", 3600),
+    "CALLBACK_TOKEN_DAYS": lambda: _float("CALLBACK_TOKEN_DAYS", 90),
+
+    # -------------------- Stats (/stats) --------------------
+    # Агрегаты по менеджерам/неделям/статусам: файл состояния и как часто его сохранять (секунды)
+    "STATS_STATE_PATH": lambda: os.getenv("STATS_STATE_PATH", "data/stats.json"),
+    "STATS_SAVE_INTERVAL": lambda: _float("STATS_SAVE_INTERVAL", 60),
+
+    # -------------------- Export --------------------
+    # На сколько секунд курсор выгрузки отступает назад: строки попадают в лист позже,
+    # чем проставлен их updated_at (write-behind буфер, очередь повторов при сбое Sheets)
+    "EXPORT_CURSOR_OVERLAP": lambda: _float("EXPORT_CURSOR_OVERLAP", 3600),
+}
 
 
-# -------------------- Google Calendar (нужно для отчётов и бота) --------------------
-GOOGLE_CALENDAR_ID = os.getenv("GOOGLE_CALENDAR_ID", "primary")
-TZ = os.getenv("TZ", "Asia/Almaty")
+def __getattr__(name: str):
+    factory = _SETTINGS.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    _load_env()
+    value = factory()
+    globals()[name] = value  # дальше — обычный атрибут модуля, без __getattr__
+    return value
 
 
-# -------------------- Google Sheets (нужно только для бота на сервере) --------------------
-GOOGLE_SHEET_URL = os.getenv("GOOGLE_SHEET_URL", "").strip()
-GOOGLE_MANAGERS_SHEET = os.getenv("GOOGLE_MANAGERS_SHEET", "Managers")
+def __dir__():
+    return sorted(set(globals()) | set(_SETTINGS))
@@ -0,0 +1,102 @@
+# src/flows/bulk_import.py
+"""
+Массовый импорт встреч (/bulk): разбор вставленного текста или CSV и проверка строк.
+
+Формат строки (разделитель ; , | или TAB):
+    клиент; ДД.ММ[.ГГГГ]; ЧЧ:ММ; менеджер; комментарий (необязательно)
+
+Менеджер — @username, telegram_id или имя из листа Managers.
+"""
+from __future__ import annotations
+
+import csv
+import io
+
+from src.sheets.managers_repo import find_manager
+from src.utils.dt import parse_date_input, parse_time_input
+
+BULK_MAX_ROWS = 100
+
+_DELIMITERS = (";", "\t", "|", ",")
+_HEADER_FIRST_CELLS = ("client", "клиент")
+
+
+def _detect_delimiter(text: str) -> str:
+    first = next((ln for ln in text.splitlines() if ln.strip()), "")
+    for d in _DELIMITERS:
+        if d in first:
+            return d
+    return ";"
+
+
+def parse_bulk_text(text: str) -> list[list[str]]:
+    """
+    Разбивает текст/CSV на строки-ячейки.
+    Пустые строки и строка заголовков (client/клиент) пропускаются.
+    """
+    text = (text or "").replace("\r\n", "\n").replace("\r", "\n").lstrip("\ufeff")
+    delimiter = _detect_delimiter(text)
+
+    rows = []
+    for cells in csv.reader(io.StringIO(text), delimiter=delimiter):
+        cells = [c.strip() for c in cells]
+        if not any(cells):
+            continue
+        if not rows and cells[0].lower() in _HEADER_FIRST_CELLS:
+            continue
+        rows.append(cells)
+    return rows
+
+
+def validate_bulk_rows(rows: list[list[str]], managers: list[dict]) -> tuple[list[dict], list[str]]:
+    """
+    Проверяет все строки заранее.
+    Возвращает (valid, errors): valid — список dict с client/date/time/manager/comment,
+    errors — человекочитаемые ошибки с номером строки.
+    """
+    valid: list[dict] = []
+    errors: list[str] = []
+
+    if len(rows) > BULK_MAX_ROWS:
+        errors.append(f"Слишком много строк: {len(rows)} (максимум {BULK_MAX_ROWS}).")
+        return [], errors
+
+    for n, cells in enumerate(rows, start=1):
+        if len(cells) < 4:
+            errors.append(f"Строка {n}: нужно минимум 4 поля (клиент; дата; время; менеджер).")
+            continue
+
+        client, date_raw, time_raw, manager_raw = cells[:4]
+        comment = cells[4] if len(cells) > 4 else ""
+
+        row_errors = []
+        if not client:
+            row_errors.append("пустой клиент")
+
+        date_s = parse_date_input(date_raw)
+        if not date_s:
+            row_errors.append(f"неверная дата «{date_raw}»")
+
+        time_s = parse_time_input(time_raw)
+        if not time_s:
+            row_errors.append(f"неверное время «{time_raw}»")
+
+        manager = find_manager(manager_raw, managers)
+        if not manager:
+            row_errors.append(f"менеджер «{manager_raw}» не найден")
+
+        if row_errors:
+            errors.append(f"Строка {n}: " + ", ".join(row_errors))
+            continue
+
+        valid.append(
+            {
+                "client": client,
+                "date": date_s,
+                "time": time_s,
+                "manager": manager,
+                "comment": comment,
+            }
+        )
+
+    return valid, errors
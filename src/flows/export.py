@@ -0,0 +1,118 @@
+# src/flows/export.py
+"""
+Выгрузка встреч в CSV / JSONL для внешних систем (scripts/export_meetings.py).
+
+- источник — хранилище встреч: SQLite (MEETINGS_DB_PATH) или лист Meetings с архивом;
+  без фонового зеркала, чтобы не мешать боту;
+- строки читаются пачками (iter_meetings) и сразу пишутся в поток — память не растёт с историей;
+- курсор «с прошлой выгрузки»: максимальный updated_at выгруженных строк (в SQLite — вместе
+  с id строки); в следующий раз берутся только строки после него — новые и изменённые;
+- updated_at ставится, когда запись ставится в очередь, а в лист строка попадает позже
+  (write-behind буфер, очередь повторов): строка со временем раньше уже выгруженных иначе
+  потерялась бы навсегда. Поэтому сохранённый курсор отступает на EXPORT_CURSOR_OVERLAP секунд;
+- выгрузка at-least-once (окно отступа и граничная секунда повторяются): получатель
+  дедуплицирует по event_id.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import os
+from datetime import datetime, timedelta
+
+from src.config import MEETINGS_DB_PATH
+from src.sheets.managers_repo import MEETINGS_HEADERS
+from src.storage.meetings_repository import MeetingsRepository, SheetsMeetingsRepository
+
+EXPORT_FORMATS = ("csv", "jsonl")
+CURSOR_VERSION = 1
+
+# форматы updated_at в курсоре: лист (по TZ) и SQLite (UTC, "updated_at|id")
+_CURSOR_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def export_repository() -> tuple[str, MeetingsRepository]:
+    """
+    (название источника, репозиторий). Курсоры разных источников несовместимы.
+    """
+    if MEETINGS_DB_PATH:
+        from src.storage.sqlite_repo import SqliteMeetingsRepository
+
+        return "sqlite", SqliteMeetingsRepository(MEETINGS_DB_PATH)
+    return "sheets", SheetsMeetingsRepository()
+
+
+def load_cursor(path: str, source: str) -> str:
+    """
+    Курсор прошлой выгрузки для источника source; "" — выгрузки ещё не было.
+    """
+    if not os.path.exists(path):
+        return ""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        print("Export: broken cursor file, exporting everything:", repr(e))
+        return ""
+    if state.get("version") != CURSOR_VERSION or state.get("source") != source:
+        print(f"Export: cursor is for another source ({state.get('source')}), exporting everything")
+        return ""
+    return state.get("since") or ""
+
+
+def save_cursor(path: str, source: str, since: str, rows: int) -> None:
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": CURSOR_VERSION, "source": source, "since": since, "rows": rows}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def rewind_cursor(cursor: str, seconds: float) -> str:
+    """
+    Курсор на seconds секунд раньше (в SQLite id сбрасывается: строки с тем же временем — снова).
+    Непонятный формат — "" (следующая выгрузка будет полной, но ничего не потеряется).
+    """
+    if not cursor or seconds <= 0:
+        return cursor
+    at, sep, _ = cursor.partition("|")
+    for fmt in _CURSOR_FORMATS:
+        try:
+            moved = (datetime.strptime(at, fmt) - timedelta(seconds=seconds)).strftime(fmt)
+        except ValueError:
+            continue
+        return f"{moved}|{0:012d}" if sep else moved
+    return ""
+
+
+def export_meetings(
+    repo: MeetingsRepository, out, fmt: str, *, since: str = "", start_day=None, end_day=None, overlap: float = 0
+) -> dict:
+    """
+    Пишет встречи в текстовый поток out (колонки MEETINGS_HEADERS).
+    Возвращает {"rows", "cursor"}: cursor — для следующей выгрузки, отступив на overlap секунд
+    от последней выгруженной строки (since, если строк не было).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format: {fmt}")
+
+    writer = None
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(MEETINGS_HEADERS)
+
+    rows = 0
+    cursor = since
+    for row_cursor, item in repo.iter_meetings(since=since, start_day=start_day, end_day=end_day):
+        values = [item.get(h, "") or "" for h in MEETINGS_HEADERS]
+        if writer is not None:
+            writer.writerow(values)
+        else:
+            out.write(json.dumps(dict(zip(MEETINGS_HEADERS, values)), ensure_ascii=False) + "\n")
+        rows += 1
+        cursor = max(cursor, row_cursor)
+    if cursor != since:
+        cursor = rewind_cursor(cursor, overlap)
+    return {"rows": rows, "cursor": cursor}
@@ -0,0 +1,208 @@
+# src/flows/reconcile.py
+"""
+Сверка календаря с листом Meetings за период (scripts/reconcile.py).
+
+Бот пишет встречу в два места (Calendar, потом таблица), и вторая запись может не пройти:
+строка остаётся "created" для удалённого события, в таблице старое время и т.п.
+Календарь считается источником правды.
+
+- обе стороны читаются потоком за период: события — постранично (серии — одним событием,
+  удалённые — со status="cancelled"), строки — одним get_all_values на лист;
+- hash-join по event_id: словарь строк таблицы, события календаря проходят по нему один раз;
+- сравниваются нормализованные поля (extract_qeepe_fields_from_event): дата/время, клиент,
+  комментарий, статус;
+- строки без события в выборке (перенесли за пределы периода или удалили давно) —
+  дочитываются batch-запросами по BATCH_LIMIT событий;
+- все правки уходят одним values_batch_update; строки, которые с момента чтения сдвинулись,
+  ищутся заново по event_id, а изменённые (другая version) пропускаются; dry_run — только отчёт.
+
+При MEETINGS_DB_PATH основное хранилище — SQLite, лист только зеркало: строки читаются
+и правятся в базе (compare-and-set по version), в лист правки уносит зеркало бота.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from src.config import MEETINGS_DB_PATH
+from src.calendar.calendar_service import extract_qeepe_fields_from_event, get_events_batch, iter_events_between
+from src.sheets.managers_repo import MeetingConflict, iter_meeting_rows_between, write_meeting_cells
+from src.sheets.meetings_index import parse_start
+from src.utils.retry import http_status
+
+SOURCE = "qeepe_meets"
+SQLITE_TITLE = "sqlite"
+
+
+def _calendar_client(fields: dict) -> str:
+    """
+    При создании бот пишет в календарь «Клиент — менеджер», в таблицу — просто клиента.
+    """
+    client = (fields.get("client") or "").strip()
+    head, sep, tail = client.rpartition(" — ")
+    manager = (fields.get("manager_name") or "").strip()
+    if sep and (tail.startswith("@") or (manager and tail == manager)):
+        return head.strip()
+    return client
+
+
+def expected_row(event: dict) -> dict | None:
+    """
+    Поля строки Meetings, как их должен видеть календарь. None — событие не от бота.
+    """
+    # у удалённого события Calendar может не отдать description — статус проверяем первым
+    if (event.get("status") or "") == "cancelled":
+        return {"status": "canceled"}
+    fields = extract_qeepe_fields_from_event(event)
+    if (fields.get("source") or "").strip() != SOURCE:
+        return None
+
+    row = {
+        "client": _calendar_client(fields),
+        "comment": (fields.get("comment") or "").strip(),
+        "status": "created",
+    }
+    start_dt, end_dt = fields.get("start_dt"), fields.get("end_dt")
+    if start_dt is not None:
+        row.update({
+            "date": start_dt.strftime("%d.%m.%Y"),
+            "time": start_dt.strftime("%H:%M"),
+            "start_iso": start_dt.isoformat(),
+            "end_iso": end_dt.isoformat() if end_dt is not None else "",
+        })
+    return row
+
+
+def diff_row(item: dict, expected: dict) -> dict:
+    """
+    {колонка: новое значение} — что поменять в строке, чтобы она совпала с календарём.
+    """
+    status = (item.get("status") or "").strip()
+    if expected.get("status") == "canceled":
+        return {} if status == "canceled" else {"status": "canceled"}
+
+    updates = {}
+    if status == "canceled":
+        updates["status"] = "created"
+
+    if "start_iso" in expected:
+        sheet_start = parse_start(item)
+        if sheet_start is None or sheet_start.isoformat() != expected["start_iso"]:
+            updates.update({k: expected[k] for k in ("date", "time", "start_iso", "end_iso")})
+
+    for key in ("client", "comment"):
+        if (item.get(key) or "").strip() != expected[key]:
+            updates[key] = expected[key]
+    return updates
+
+
+def _starts_within(row: dict, start_day: date) -> bool:
+    # серия, начавшаяся до периода, лежит в таблице под датой первой встречи — это не «пропажа»
+    try:
+        return datetime.strptime(row.get("date") or "", "%d.%m.%Y").date() >= start_day
+    except ValueError:
+        return False
+
+
+def _fetch_expected(event_ids: list[str]) -> dict[str, dict]:
+    out = {}
+    for event_id, result in get_events_batch(event_ids).items():
+        if isinstance(result, Exception):
+            if http_status(result) not in (404, 410):
+                raise result
+            out[event_id] = {"status": "canceled"}
+        else:
+            row = expected_row(result)
+            if row is not None:
+                out[event_id] = row
+    return out
+
+
+def _sqlite_rows(repo, start_day: date, end_day: date):
+    # те же кортежи, что iter_meeting_rows_between; номера строки у базы нет
+    for _, item in repo.iter_meetings(start_day=start_day, end_day=end_day):
+        yield SQLITE_TITLE, 0, [], item
+
+
+def _write_sqlite(repo, writes: list[tuple]) -> tuple[int, list[str]]:
+    """
+    Правки в SQLite; строку, изменённую после чтения (правка в боте), не трогаем.
+    """
+    cells = 0
+    skipped = []
+    for _, item, updates in writes:
+        event_id = (item.get("event_id") or "").strip()
+        try:
+            if repo.update_meeting_by_event_id(event_id, updates, expected_version=(item.get("version") or "").strip()):
+                cells += len(updates)
+        except MeetingConflict:
+            skipped.append(event_id)
+    return cells, skipped
+
+
+def reconcile(start_day: date, end_day: date, *, dry_run: bool = False) -> dict:
+    """
+    Сверяет период [start_day, end_day]. Возвращает отчёт:
+    {"rows", "events", "changes": [(event_id, лист, строка, {колонка: (было, стало)})],
+     "missing_in_sheet": [event_id, ...], "cells": записано ячеек,
+     "skipped": [event_id строк, изменённых после чтения]}.
+    """
+    # event_id -> [(лист, строка, заголовки, dict)]; одна встреча может быть и в архивном листе
+    sqlite_repo = None
+    if MEETINGS_DB_PATH:
+        from src.storage.sqlite_repo import SqliteMeetingsRepository
+
+        sqlite_repo = SqliteMeetingsRepository(MEETINGS_DB_PATH)
+        source_rows = _sqlite_rows(sqlite_repo, start_day, end_day)
+    else:
+        source_rows = iter_meeting_rows_between(start_day, end_day)
+
+    sheet: dict[str, list[tuple]] = {}
+    rows = 0
+    for title, row_num, headers, item in source_rows:
+        rows += 1
+        event_id = (item.get("event_id") or "").strip()
+        if event_id:
+            sheet.setdefault(event_id, []).append((title, row_num, headers, item))
+
+    expected: dict[str, dict] = {}
+    missing_in_sheet: list[str] = []
+    events = 0
+    for ev in iter_events_between(start_day, end_day, single_events=False, show_deleted=True):
+        if ev.get("recurringEventId"):
+            continue  # изменённый/отменённый экземпляр серии: в таблице одна строка на серию
+        row = expected_row(ev)
+        if row is None:
+            continue
+        events += 1
+        event_id = ev.get("id") or ""
+        if event_id in sheet:
+            expected[event_id] = row
+        elif row.get("status") != "canceled" and _starts_within(row, start_day):
+            missing_in_sheet.append(event_id)
+
+    # строки без события в выборке: перенесли за пределы периода или удалили давно
+    expected.update(_fetch_expected(sorted(sheet.keys() - expected.keys())))
+
+    changes = []
+    writes = []
+    for event_id, row in expected.items():
+        for title, row_num, headers, item in sheet[event_id]:
+            updates = diff_row(item, row)
+            if updates:
+                changes.append((event_id, title, row_num, {k: ((item.get(k) or "").strip(), v) for k, v in updates.items()}))
+                writes.append((title, item, updates))
+
+    if dry_run:
+        cells, skipped = 0, []
+    elif sqlite_repo is not None:
+        cells, skipped = _write_sqlite(sqlite_repo, writes)
+    else:
+        cells, skipped = write_meeting_cells(writes)
+    return {
+        "rows": rows,
+        "events": events,
+        "changes": changes,
+        "missing_in_sheet": missing_in_sheet,
+        "cells": cells,
+        "skipped": skipped,
+    }
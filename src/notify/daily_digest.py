@@ -0,0 +1,480 @@
+# src/notify/daily_digest.py
+"""
+Движок отчётов по встречам: события за день читаются из Calendar один раз,
+нормализуются, а дальше из тех же данных собираются отчёты разных стилей:
+
+    cards    — карточки встреч бота, упакованные в сообщения до 4096 символов,
+               с сеткой кнопок «Изменить» / «Удалить» по номеру карточки;
+    managers — сводка, сгруппированная по менеджеру (все события календаря);
+    compact  — одна строка на встречу.
+
+    meetings = fetch_meetings(day)
+    send_reports(iter_reports(meetings, ["managers", "cards"], day=day))
+
+Несколько дней (неделя / диапазон) — тоже одна выборка: fetch_meetings_between + render_range.
+"""
+from __future__ import annotations
+
+import re
+from datetime import date, datetime, timedelta
+
+import pytz
+
+from src.calendar.calendar_service import list_qeepe_meetings_for_date, list_qeepe_meetings_between
+from src.config import TZ
+from src.notify.telegram_api import tg_send_message
+from src.utils.text import escape_html
+
+SOURCE = "qeepe_meets"
+
+USERNAME_RE = re.compile(r"@([a-zA-Z0-9_]{5,32})")
+MANAGER_LINE_RE = re.compile(r"(?im)^\s*менеджер\s*:\s*(.+?)\s*$")
+# тег, HTML-сущность, пробелы, слово — куски, между которыми строку можно резать
+HTML_TOKEN_RE = re.compile(r"<[^>]*>|&#?\w+;|\s+|[^<&\s]+|[<&]")
+
+REPORT_STYLES = ("cards", "managers", "compact")
+
+# лимит длины текста одного сообщения Telegram
+TELEGRAM_TEXT_LIMIT = 4096
+
+WEEKDAYS = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+
+# карточки: до 100 кнопок на сообщение (2 на встречу), 4 встречи в ряду кнопок
+MAX_CARDS_PER_MESSAGE = 48
+CARD_BUTTONS_PER_ROW = 4
+
+
+# -------------------- Normalize --------------------
+def _time_str(fields: dict) -> str:
+    start_dt = fields.get("start_dt")
+    if start_dt is not None:
+        return start_dt.strftime("%H:%M")
+    # all-day событие: в start только date
+    if ((fields.get("raw") or {}).get("start") or {}).get("date"):
+        return "Весь день"
+    return "??:??"
+
+
+def _split_manager_comment(comment: str) -> tuple[str, str]:
+    """
+    Комментарий встреч бота начинается со строки «Менеджер: Имя (@user)» — отделяем её.
+    """
+    lines = (comment or "").strip().splitlines()
+    if lines and MANAGER_LINE_RE.match(lines[0]):
+        return lines[0].split(":", 1)[1].strip(), "\n".join(lines[1:]).strip()
+    return "", (comment or "").strip()
+
+
+def _event_day(fields: dict) -> date | None:
+    if fields.get("start_dt") is not None:
+        return fields["start_dt"].date()
+    raw_date = ((fields.get("raw") or {}).get("start") or {}).get("date")
+    try:
+        return date.fromisoformat(raw_date) if raw_date else None
+    except ValueError:
+        return None
+
+
+def normalize_meeting(fields: dict) -> dict:
+    """
+    Поля extract_qeepe_fields_from_event -> встреча для отчётов:
+    event_id, day, time, start_dt, title, client, comment, manager_name, manager_key, manager_title, ours.
+    """
+    raw = fields.get("raw") or {}
+    summary = (fields.get("summary") or "").strip() or "Без названия"
+    title = summary.split(":", 1)[1].strip() if summary.lower().startswith("встреча:") else summary
+
+    manager_line, comment = _split_manager_comment(fields.get("comment") or "")
+    if not manager_line and not fields.get("meta_version"):
+        # события не из бота (или до миграции) — ищем строку «Менеджер:» в описании
+        m = MANAGER_LINE_RE.search(raw.get("description") or "")
+        manager_line = m.group(1).strip() if m else ""
+
+    m = USERNAME_RE.search(summary) or USERNAME_RE.search(manager_line)
+    username = f"@{m.group(1)}" if m else ""
+    manager_name = (fields.get("manager_name") or "").strip() or USERNAME_RE.sub("", manager_line).strip(" ()")
+
+    # группируем по @username, если он есть, иначе по имени
+    manager_key = username or manager_name or None
+
+    return {
+        "event_id": (fields.get("event_id") or "").strip(),
+        "day": _event_day(fields),
+        "time": _time_str(fields),
+        "start_dt": fields.get("start_dt"),
+        "title": title,
+        "client": (fields.get("client") or "").strip() or title,
+        "comment": comment,
+        "manager_name": manager_name,
+        "manager_key": manager_key,
+        "manager_title": username or manager_name,
+        "ours": (fields.get("source") or "").strip() == SOURCE,
+        "stale": bool(fields.get("_stale")),
+    }
+
+
+def _normalize_all(items: list[dict]) -> list[dict]:
+    out = []
+    for fields in items:
+        if ((fields.get("raw") or {}).get("status") or "") == "cancelled":
+            continue
+        out.append(normalize_meeting(fields))
+    # all-day события — первыми в своём дне
+    out.sort(key=lambda m: (m["day"] or date.min, m["start_dt"] is not None, m["start_dt"] or datetime.min, m["title"]))
+    return out
+
+
+def fetch_meetings(day: date) -> list[dict]:
+    """
+    Все события дня одним запросом к Calendar, нормализованные и отсортированные по времени.
+    """
+    return _normalize_all(list_qeepe_meetings_for_date(day, only_source=False))
+
+
+def fetch_meetings_between(start_day: date, end_day: date) -> list[dict]:
+    """
+    События с start_day по end_day включительно — один постраничный запрос на весь диапазон.
+    """
+    return _normalize_all(list_qeepe_meetings_between(start_day, end_day, only_source=False))
+
+
+# -------------------- Titles / keyboards --------------------
+def report_title(day: date) -> tuple[str, str]:
+    """
+    (иконка, заголовок) относительно сегодняшней даты по TZ.
+    """
+    today = datetime.now(pytz.timezone(TZ)).date()
+    if day == today:
+        return "☀️", "Встречи на сегодня"
+    if day == today + timedelta(days=1):
+        return "🌙", "Встречи на завтра"
+    return "📅", f"Встречи на {day.strftime('%d.%m.%Y')}"
+
+
+def cards_keyboard(numbered: list[tuple[int, str]]) -> dict | None:
+    """
+    Компактная сетка кнопок для пачки карточек: «✏️N» / «🗑N» на встречу,
+    CARD_BUTTONS_PER_ROW встреч в ряду (до 8 кнопок — максимум Telegram в ряду).
+    """
+    buttons = []
+    for n, event_id in numbered:
+        if event_id:
+            buttons.append({"text": f"✏️{n}", "callback_data": f"meet:edit:{event_id}"})
+            buttons.append({"text": f"🗑{n}", "callback_data": f"meet:delete:{event_id}"})
+    if not buttons:
+        return None
+    per_row = CARD_BUTTONS_PER_ROW * 2
+    return {"inline_keyboard": [buttons[i:i + per_row] for i in range(0, len(buttons), per_row)]}
+
+
+CREATE_KEYBOARD = {
+    "inline_keyboard": [
+        [{"text": "➕ Создать встречу", "callback_data": "meet:create"}]
+    ]
+}
+
+
+def _stale_line(meetings: list[dict]) -> str:
+    if any(m["stale"] for m in meetings):
+        return "⚠️ Календарь недоступен — данные из кэша.\n\n"
+    return ""
+
+
+# -------------------- Renderers --------------------
+def _card_parts(n: int, m: dict) -> tuple[str, str]:
+    """
+    (тело карточки, строка event_id): при разбиении длинной карточки строка id остаётся в последнем куске.
+    """
+    text = f"<b>{n}.</b> 📌 <b>{escape_html(m['time'])}</b> — {escape_html(m['title'])}"
+    if m["manager_name"]:
+        text += f"\n👤 {escape_html(m['manager_name'])}"
+    if m["comment"]:
+        text += f"\n📝 {escape_html(m['comment'])}"
+    tail = f"\n🆔 <code>{escape_html(m['event_id'])}</code>" if m["event_id"] else ""
+    return text, tail
+
+
+def iter_card_messages(meetings: list[dict], *, day: date, limit: int = TELEGRAM_TEXT_LIMIT):
+    """
+    Потоковый упаковщик карточек: копит карточки, пока следующая не перевалит за limit
+    символов или MAX_CARDS_PER_MESSAGE встреч, и отдаёт готовое сообщение с сеткой кнопок.
+    Сообщений (и запросов к Telegram) столько, сколько пачек, а не встреч.
+    Карточка, которая не влезает и в пустое сообщение (длинный комментарий), режется
+    split_html_line на несколько сообщений; строка event_id и кнопки — с последним куском.
+    """
+    icon, title = report_title(day)
+    header = f"{icon} <b>{title}</b> — <code>{day.strftime('%d.%m.%Y')}</code>\n\n{_stale_line(meetings)}"
+
+    ours = [m for m in meetings if m["ours"]]
+    if not ours:
+        yield {"text": header + "Нет встреч ✅", "reply_markup": None}
+        return
+
+    text = header.rstrip()
+    numbered: list[tuple[int, str]] = []
+    for n, m in enumerate(ours, 1):
+        body, tail = _card_parts(n, m)
+        card = body + tail
+        if numbered and (len(text) + 2 + len(card) > limit or len(numbered) >= MAX_CARDS_PER_MESSAGE):
+            yield {"text": text, "reply_markup": cards_keyboard(numbered)}
+            text, numbered = "", []
+
+        room = limit - (len(text) + 2 if text else 0)
+        if len(card) > room:
+            # все куски не длиннее room - len(tail): первый встаёт после заголовка, в последний — id
+            pieces = split_html_line(body, room - len(tail))
+            for piece in pieces[:-1]:
+                yield {"text": f"{text}\n\n{piece}" if text else piece, "reply_markup": None}
+                text = ""
+            card = pieces[-1] + tail
+
+        text = f"{text}\n\n{card}" if text else card
+        numbered.append((n, m["event_id"]))
+
+    yield {"text": text, "reply_markup": cards_keyboard(numbered)}
+
+
+def render_cards(meetings: list[dict], *, day: date) -> list[dict]:
+    """
+    Карточки встреч бота, упакованные в минимум сообщений (см. iter_card_messages).
+    """
+    return list(iter_card_messages(meetings, day=day))
+
+
+def render_by_manager(meetings: list[dict], *, day: date) -> list[dict]:
+    """
+    Одна сводка: блок на менеджера (сначала @username, потом по имени), затем «без менеджера».
+    """
+    icon, title = report_title(day)
+    if not meetings:
+        text = f"{icon} <b>{title}:</b>\n\n✅ Встреч нет."
+        return [{"text": text, "reply_markup": None}]
+
+    grouped: dict[str, dict] = {}
+    no_manager = []
+    for m in meetings:
+        line = f"• <b>{escape_html(m['time'])}</b> — {escape_html(m['title'])}"
+        if m["manager_key"]:
+            grouped.setdefault(m["manager_key"], {"title": m["manager_title"], "items": []})["items"].append(line)
+        else:
+            no_manager.append(line)
+
+    lines = [f"{icon} <b>{title}:</b>\n"]
+    if _stale_line(meetings):
+        lines.append(_stale_line(meetings))
+
+    def sort_key(k: str):
+        return (0, k.lower()) if k.startswith("@") else (1, k.lower())
+
+    for key in sorted(grouped, key=sort_key):
+        block = grouped[key]
+        lines.append(f"👤 <b>{escape_html(block['title'])}</b>")
+        lines.extend(block["items"])
+        lines.append("")
+
+    if no_manager:
+        lines.append("⚠️ <b>Без назначенного менеджера</b>")
+        lines.extend(no_manager)
+
+    text = "\n".join(lines).strip()
+    return [{"text": text, "reply_markup": CREATE_KEYBOARD}]
+
+
+def render_compact(meetings: list[dict], *, day: date) -> list[dict]:
+    """
+    Одна строка на встречу: время, клиент, менеджер.
+    """
+    icon, title = report_title(day)
+    header = f"{icon} <b>{title}</b> — <code>{day.strftime('%d.%m.%Y')}</code>"
+    if not meetings:
+        return [{"text": f"{header}\n\nНет встреч ✅", "reply_markup": None}]
+
+    lines = [header, ""]
+    if _stale_line(meetings):
+        lines.append(_stale_line(meetings).strip())
+    for m in meetings:
+        who = f" — {escape_html(m['manager_title'])}" if m["manager_title"] else ""
+        lines.append(f"• <b>{escape_html(m['time'])}</b> {escape_html(m['client'])}{who}")
+    lines.append(f"\nВсего: <b>{len(meetings)}</b>")
+    return [{"text": "\n".join(lines), "reply_markup": None}]
+
+
+def split_html_line(line: str, limit: int) -> list[str]:
+    """
+    Строка длиннее limit -> куски не длиннее limit (HTML-разметка Telegram).
+    Режем по пробелам и между тегами / сущностями, слово длиннее куска — посимвольно;
+    открытые теги закрываются в конце куска и открываются заново в следующем.
+    """
+    pieces: list[str] = []
+    stack: list[tuple[str, str]] = []  # открытые теги: (имя, исходный тег)
+
+    def closing() -> str:
+        return "".join(f"</{name}>" for name, _ in reversed(stack))
+
+    part = ""
+    start = 0  # длина повторно открытых тегов в начале куска
+
+    def flush() -> None:
+        nonlocal part, start
+        pieces.append(part + closing())
+        part = "".join(tag for _, tag in stack)
+        start = len(part)
+
+    for tok in HTML_TOKEN_RE.findall(line):
+        if len(tok) > 1 and tok[0] == "<" and tok[-1] == ">":
+            m = re.match(r"<(/?)\s*(\w+)", tok)
+            if m and m.group(1):
+                part += tok
+                if stack and stack[-1][0] == m.group(2).lower():
+                    stack.pop()
+                continue
+            name = m.group(2).lower() if m else ""
+            if len(part) + len(closing()) + len(tok) + len(name) + 3 > limit and len(part) > start:
+                flush()
+            part += tok
+            if name:
+                stack.append((name, tok))
+            continue
+
+        while tok:
+            room = limit - len(part) - len(closing())
+            if len(tok) <= room:
+                part += tok
+                break
+            if tok.isspace():
+                # пробел на границе кусков не нужен
+                if len(part) > start:
+                    flush()
+                break
+            if len(part) > start and (tok[0] == "&" or len(tok) <= limit - start - len(closing())):
+                flush()  # слово / сущность целиком — в следующий кусок
+                continue
+            if tok[0] == "&" or room <= 0:
+                # сущность не режем; кусок из одних открытых тегов — тег не влез, пишем как есть
+                part += tok
+                break
+            part += tok[:room]
+            tok = tok[room:]
+            flush()
+
+    if len(part) > start or not pieces:
+        pieces.append(part + closing())
+    return pieces
+
+
+def pack_text(blocks: list[str], *, limit: int = TELEGRAM_TEXT_LIMIT) -> list[str]:
+    """
+    Склеивает блоки (через пустую строку) в как можно меньше сообщений не длиннее limit.
+    Блок длиннее limit режется по строкам, строка длиннее limit — на несколько кусков
+    (split_html_line), без потери текста и без разрезанных тегов.
+    """
+    chunks: list[str] = []
+    current = ""
+    for block in blocks:
+        parts = [block]
+        if len(block) > limit:
+            parts, part = [], ""
+            for line in block.split("\n"):
+                pieces = split_html_line(line, limit) if len(line) > limit else [line]
+                for piece in pieces:
+                    if part and len(part) + 1 + len(piece) > limit:
+                        parts.append(part)
+                        part = ""
+                    part = f"{part}\n{piece}" if part else piece
+            if part:
+                parts.append(part)
+
+        for part in parts:
+            if current and len(current) + 2 + len(part) > limit:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{part}" if current else part
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def range_title(start_day: date, end_day: date) -> str:
+    if (end_day - start_day).days == 6:
+        return "Встречи на неделю"
+    return "Встречи за период"
+
+
+def render_range(meetings: list[dict], *, start_day: date, end_day: date) -> list[dict]:
+    """
+    Сводка за несколько дней: блок на день, внутри — строка на менеджера.
+    Длинная сводка делится на несколько сообщений по границам дней.
+    """
+    period = f"{start_day.strftime('%d.%m')} – {end_day.strftime('%d.%m.%Y')}"
+    header = f"🗓 <b>{range_title(start_day, end_day)}</b> — <code>{period}</code>"
+    if _stale_line(meetings):
+        header += "\n" + _stale_line(meetings).strip()
+
+    by_day: dict[date, list[dict]] = {}
+    for m in meetings:
+        if m["day"] is not None:
+            by_day.setdefault(m["day"], []).append(m)
+
+    if not by_day:
+        return [{"text": f"{header}\n\nНет встреч ✅", "reply_markup": None}]
+
+    def sort_key(k: str):
+        return (0, k.lower()) if k.startswith("@") else (1, k.lower())
+
+    blocks = [header]
+    for day in sorted(by_day):
+        items = by_day[day]
+        lines = [f"📆 <b>{WEEKDAYS[day.weekday()]} {day.strftime('%d.%m')}</b> — {len(items)}"]
+
+        grouped: dict[str, dict] = {}
+        no_manager = []
+        for m in items:
+            entry = f"{escape_html(m['time'])} {escape_html(m['client'])}"
+            if m["manager_key"]:
+                grouped.setdefault(m["manager_key"], {"title": m["manager_title"], "items": []})["items"].append(entry)
+            else:
+                no_manager.append(entry)
+
+        for key in sorted(grouped, key=sort_key):
+            block = grouped[key]
+            lines.append(f"👤 <b>{escape_html(block['title'])}</b>: {', '.join(block['items'])}")
+        if no_manager:
+            lines.append(f"⚠️ без менеджера: {', '.join(no_manager)}")
+        blocks.append("\n".join(lines))
+
+    blocks.append(f"Всего: <b>{sum(len(v) for v in by_day.values())}</b>")
+    return [{"text": text, "reply_markup": None} for text in pack_text(blocks)]
+
+
+_RENDERERS = {
+    "cards": iter_card_messages,
+    "managers": render_by_manager,
+    "compact": render_compact,
+}
+
+
+def iter_reports(meetings: list[dict], styles, *, day: date):
+    """
+    Сообщения ({"text", "reply_markup"}) для всех стилей по одной и той же выборке — по мере готовности.
+    """
+    unknown = [x for x in styles if x not in _RENDERERS]
+    if unknown:
+        raise ValueError(f"Unknown report style: {', '.join(unknown)} (доступны: {', '.join(REPORT_STYLES)})")
+    for style in styles:
+        yield from _RENDERERS[style](meetings, day=day)
+
+
+def build_reports(meetings: list[dict], styles, *, day: date) -> list[dict]:
+    return list(iter_reports(meetings, styles, day=day))
+
+
+def send_reports(messages, **send_kwargs) -> int:
+    """
+    messages — список или генератор (например, iter_card_messages): отправляем по мере готовности.
+    """
+    sent = 0
+    for msg in messages:
+        tg_send_message(msg["text"], reply_markup=msg.get("reply_markup"), **send_kwargs)
+        sent += 1
+    return sent
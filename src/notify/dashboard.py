@@ -0,0 +1,178 @@
+# src/notify/dashboard.py
+"""
+Закреплённое сообщение «встречи на сегодня» в теме встреч.
+
+- одно сообщение на день: первое обновление дня публикует и закрепляет новое (старое открепляется);
+- дальше — только editMessageText того же сообщения;
+- правки не чаще DASHBOARD_MIN_INTERVAL: изменения за это время склеиваются в одну;
+- хэш текста: если расписание не поменялось, Telegram не трогаем;
+- состояние (дата, message_id, хэш) — в DASHBOARD_STATE_PATH, переживает перезапуск бота.
+
+Бот вызывает dashboard_changed() после создания, изменения и удаления встречи.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from src.config import DASHBOARD_ENABLED, DASHBOARD_STATE_PATH, DASHBOARD_MIN_INTERVAL, TELEGRAM_MEETS_THREAD_ID
+from src.notify.daily_digest import CREATE_KEYBOARD, fetch_meetings, pack_text, render_compact
+from src.notify.telegram_api import (
+    tg_send_message,
+    tg_edit_message_text,
+    tg_pin_message,
+    tg_unpin_message,
+    tg_error_text,
+)
+from src.utils.dt import tz_now
+
+# как часто без изменений проверяем смену дня (секунды)
+DAY_CHECK_INTERVAL = 60.0
+
+
+def render_dashboard(day) -> tuple[str, str]:
+    """
+    (текст, хэш). Хэш считается без строки «обновлено», чтобы время не считалось изменением.
+    """
+    body = render_compact(fetch_meetings(day), day=day)[0]["text"]
+    digest = hashlib.sha256(body.encode("utf-8")).hexdigest()
+    footer = f"\n\n🕒 Обновлено: {tz_now().strftime('%H:%M')}"
+    text = pack_text([body], limit=4096 - len(footer) - 2)[0]
+    if text != body:
+        text += "\n…"
+    return text + footer, digest
+
+
+class PinnedDashboard:
+    def __init__(self, state_path: str, min_interval: float):
+        self._path = state_path
+        self._min_interval = min_interval
+        self._lock = threading.Lock()  # держится на время запросов к Telegram
+        self._thread_lock = threading.Lock()
+        self._state: dict = self._load()
+        self._changed = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._last_update = 0.0
+
+    # -------------------- state --------------------
+    def _load(self) -> dict:
+        if not os.path.exists(self._path):
+            return {}
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print("Dashboard: broken state file, starting fresh:", repr(e))
+            return {}
+
+    def _save(self) -> None:
+        d = os.path.dirname(self._path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        tmp = self._path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._state, f, ensure_ascii=False)
+        os.replace(tmp, self._path)
+
+    # -------------------- render / publish --------------------
+    def refresh(self, *, force: bool = False) -> str:
+        """
+        Обновляет дашборд сейчас. Возвращает "posted" / "edited" / "skipped".
+        """
+        day = tz_now().date()
+        text, digest = render_dashboard(day)
+
+        with self._lock:
+            st = self._state
+            message_id = st.get("message_id") if st.get("date") == day.isoformat() else None
+
+            if message_id and st.get("hash") == digest and not force:
+                return "skipped"
+
+            result = "edited"
+            if message_id:
+                try:
+                    tg_edit_message_text(message_id, text, reply_markup=CREATE_KEYBOARD)
+                except Exception as e:
+                    err = tg_error_text(e).lower()
+                    if "not modified" in err:
+                        pass
+                    elif "not found" in err or "can't be edited" in err:
+                        message_id = None  # сообщение удалили руками — публикуем заново
+                    else:
+                        raise
+
+            if not message_id:
+                message_id = self._post(text, old_message_id=st.get("message_id"))
+                result = "posted"
+
+            self._state = {"date": day.isoformat(), "message_id": message_id, "hash": digest}
+            self._save()
+            self._last_update = time.monotonic()
+            return result
+
+    def _post(self, text: str, *, old_message_id: int | None) -> int:
+        resp = tg_send_message(text, reply_markup=CREATE_KEYBOARD, thread_id=TELEGRAM_MEETS_THREAD_ID)
+        message_id = int(resp["result"]["message_id"])
+        try:
+            tg_pin_message(message_id)
+            if old_message_id:
+                tg_unpin_message(old_message_id)
+        except Exception as e:
+            print("Dashboard: pin/unpin failed:", tg_error_text(e))
+        return message_id
+
+    # -------------------- background worker --------------------
+    def mark_changed(self) -> None:
+        self.start()
+        self._changed.set()
+
+    def start(self) -> None:
+        with self._thread_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="dashboard", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            changed = self._changed.wait(DAY_CHECK_INTERVAL)
+            if not changed and self._state.get("date") == tz_now().date().isoformat():
+                continue
+
+            # throttle: ждём остаток интервала, всё, что придёт за это время, попадёт в одну правку
+            wait = self._min_interval - (time.monotonic() - self._last_update)
+            if wait > 0:
+                time.sleep(wait)
+            self._changed.clear()
+
+            try:
+                result = self.refresh()
+                if result != "skipped":
+                    print(f"Dashboard: {result}")
+            except Exception as e:
+                print("Dashboard error:", repr(e))
+                self._last_update = time.monotonic()
+
+
+_DASHBOARD: PinnedDashboard | None = None
+_DASHBOARD_LOCK = threading.Lock()
+
+
+def get_dashboard() -> PinnedDashboard:
+    global _DASHBOARD
+    with _DASHBOARD_LOCK:
+        if _DASHBOARD is None:
+            _DASHBOARD = PinnedDashboard(DASHBOARD_STATE_PATH, DASHBOARD_MIN_INTERVAL)
+    return _DASHBOARD
+
+
+def dashboard_changed() -> None:
+    """
+    Расписание могло измениться — запланировать обновление дашборда (если он включён).
+    """
+    if DASHBOARD_ENABLED:
+        get_dashboard().mark_changed()
@@ -0,0 +1,103 @@
+# src/notify/personal_digest.py
+"""
+Личные сводки: каждому менеджеру в личку — только его встречи за день.
+
+- встречи — та же выборка, что и для общей сводки (fetch_meetings), группировка по manager_key;
+- менеджер из встречи (@username или имя) сопоставляется с листом Managers → telegram_id;
+- отправка параллельно: пул из DM_WORKERS потоков, общий token bucket на DM_RATE_PER_MIN,
+  чтобы не упереться в лимит Telegram (~30 сообщений в секунду на бота);
+- 429 от Telegram — ждём retry_after и пробуем ещё раз.
+
+Менеджер без встреч сообщение не получает. Менеджер должен хотя бы раз написать боту в личку.
+"""
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from src.notify.daily_digest import pack_text, report_title
+from src.notify.telegram_api import tg_send_message, tg_error_text
+from src.sheets.managers_repo import find_manager, get_managers
+from src.utils.retry import TokenBucket
+from src.utils.text import escape_html
+
+DM_WORKERS = 8
+DM_RATE_PER_MIN = 1200  # 20 сообщений в секунду — с запасом до лимита Telegram
+DM_ATTEMPTS = 3
+
+
+def group_by_manager(meetings: list[dict], managers: list[dict]) -> tuple[dict[int, dict], list[str]]:
+    """
+    {telegram_id: {"manager": строка Managers, "meetings": [...]}} и список ключей менеджеров,
+    которых не удалось сопоставить с telegram_id.
+    """
+    groups: dict[int, dict] = {}
+    unresolved: set[str] = set()
+    for m in meetings:
+        key = m["manager_key"]
+        if not key:
+            continue
+        manager = find_manager(key, managers) or find_manager(m["manager_name"], managers)
+        tid = (manager or {}).get("telegram_id", "").strip()
+        if not tid.isdigit() or int(tid) <= 0:
+            unresolved.add(key)
+            continue
+        groups.setdefault(int(tid), {"manager": manager, "meetings": []})["meetings"].append(m)
+    return groups, sorted(unresolved)
+
+
+def render_personal(meetings: list[dict], *, day: date) -> list[str]:
+    """
+    Сводка одного менеджера: «Ваши встречи на сегодня» + строка на встречу.
+    """
+    icon, title = report_title(day)
+    lines = [f"{icon} <b>Ваши {title[:1].lower()}{title[1:]}</b>", ""]
+    for m in meetings:
+        lines.append(f"• <b>{escape_html(m['time'])}</b> — {escape_html(m['client'])}")
+        if m["comment"]:
+            lines.append(f"   📝 {escape_html(m['comment'])}")
+    lines.append(f"\nВсего: <b>{len(meetings)}</b>")
+    return pack_text(["\n".join(lines)])
+
+
+def _send_dm(chat_id: int, texts: list[str], bucket: TokenBucket) -> None:
+    for text in texts:
+        for attempt in range(1, DM_ATTEMPTS + 1):
+            bucket.acquire()
+            try:
+                tg_send_message(text, chat_id=chat_id, thread_id=None)
+                break
+            except Exception as e:
+                response = getattr(e, "response", None)
+                if getattr(response, "status_code", None) != 429 or attempt == DM_ATTEMPTS:
+                    raise
+                try:
+                    retry_after = float(response.json()["parameters"]["retry_after"])
+                except Exception:
+                    retry_after = 1.0
+                time.sleep(retry_after)
+
+
+def send_personal_digests(meetings: list[dict], *, day: date, workers: int = DM_WORKERS) -> dict:
+    """
+    Рассылает личные сводки параллельно. Возвращает {"sent", "failed", "unresolved"}.
+    """
+    groups, unresolved = group_by_manager(meetings, get_managers())
+    bucket = TokenBucket(DM_RATE_PER_MIN, burst=workers)
+
+    def _task(item):
+        chat_id, group = item
+        try:
+            _send_dm(chat_id, render_personal(group["meetings"], day=day), bucket)
+            return None
+        except Exception as e:
+            name = (group["manager"].get("name") or "").strip() or str(chat_id)
+            # 403 — менеджер не начинал диалог с ботом
+            print(f"DM to {name} failed:", tg_error_text(e))
+            return name
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(groups) or 1)), thread_name_prefix="dm") as pool:
+        failed = [name for name in pool.map(_task, groups.items()) if name]
+
+    return {"sent": len(groups) - len(failed), "failed": failed, "unresolved": unresolved}
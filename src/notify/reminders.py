@@ -0,0 +1,285 @@
+# src/notify/reminders.py
+"""
+Напоминания менеджерам «встреча через N минут» (REMINDER_MINUTES) в личку.
+
+- min-heap моментов отправки (начало встречи минус N минут) по встречам из календаря:
+  окно читается с singleEvents, так что каждое повторение серии — отдельная встреча
+  со своим event_id экземпляра;
+- поток спит на Condition ровно до ближайшего напоминания, без опроса календаря;
+- создание / изменение / удаление встречи в боте сразу правит очередь
+  (reminders_schedule / reminders_cancel), поток будится и пересчитывает сон;
+- устаревшие записи кучи не удаляются, а пропускаются при извлечении (версия записи);
+- встречи подгружаются окнами по LOAD_WINDOW вперёд, следующее окно — заранее.
+
+Напоминание, время которого прошло, пока бот лежал, после перезапуска не отправляется.
+Правка серии в боте (строка с recurrence) перечитывает загруженное окно из календаря.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta
+
+from src.calendar.calendar_service import extract_qeepe_fields_from_event, iter_events_between
+from src.config import REMINDER_MINUTES
+from src.notify.telegram_api import tg_send_message, tg_error_text
+from src.sheets.meetings_index import parse_start
+from src.utils.dt import tz_now
+from src.utils.text import escape_html
+
+SOURCE = "qeepe_meets"
+
+# на сколько вперёд за раз берём встречи из календаря
+LOAD_WINDOW = timedelta(days=1)
+# следующее окно подгружаем с запасом до его первых напоминаний
+LOAD_AHEAD = timedelta(hours=1)
+
+
+def reminder_text(meeting: dict, lead: timedelta) -> str:
+    minutes = int(lead.total_seconds() // 60)
+    client = (meeting.get("client") or "").strip() or "—"
+    lines = [
+        f"⏰ <b>Через {minutes} мин встреча</b>",
+        "",
+        f"🧑 Клиент: <b>{escape_html(client)}</b>",
+        f"📅 {escape_html((meeting.get('date') or '').strip())} ⏰ <b>{escape_html((meeting.get('time') or '').strip())}</b>",
+    ]
+    comment = (meeting.get("comment") or "").strip()
+    if comment:
+        lines.append(f"💬 {escape_html(comment)}")
+    return "\n".join(lines)
+
+
+def meeting_from_event(event: dict) -> dict | None:
+    """
+    Событие календаря (экземпляр серии или обычное) -> поля как в строке Meetings.
+    None — событие не от бота или без времени.
+    """
+    fields = extract_qeepe_fields_from_event(event)
+    start_dt = fields.get("start_dt")
+    if (fields.get("source") or "").strip() != SOURCE or start_dt is None:
+        return None
+    return {
+        "event_id": fields.get("event_id") or "",
+        "series_id": fields.get("recurring_event_id") or "",
+        "client": fields.get("client") or "",
+        "comment": fields.get("comment") or "",
+        "manager_name": fields.get("manager_name") or "",
+        "manager_telegram_id": str(fields.get("manager_id") or ""),
+        "date": start_dt.strftime("%d.%m.%Y"),
+        "time": start_dt.strftime("%H:%M"),
+        "start_iso": start_dt.isoformat(),
+        "status": "created",
+    }
+
+
+def _manager_chat_id(meeting: dict) -> int | None:
+    tid = str(meeting.get("manager_telegram_id") or "").strip()
+    return int(tid) if tid.isdigit() and int(tid) > 0 else None
+
+
+class ReminderEngine:
+    def __init__(self, lead: timedelta):
+        self._lead = lead
+        self._cond = threading.Condition()
+        self._heap: list[tuple[float, int, str]] = []  # (момент отправки, версия, event_id)
+        self._entries: dict[str, tuple[int, dict]] = {}  # event_id -> (актуальная версия, встреча)
+        self._versions = itertools.count()
+        self._sent: dict[str, float] = {}  # event_id -> начало встречи, о которой уже напомнили
+        self._loaded_until: datetime | None = None
+        self._reload = False  # серию изменили — перечитать загруженное окно
+        self._thread: threading.Thread | None = None
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._entries)
+
+    # -------------------- queue --------------------
+    def schedule(self, meeting: dict, *, catch_up: bool = True) -> bool:
+        """
+        Ставит (или переставляет) напоминание по встрече. False — напоминать нечего.
+        catch_up: встреча скоро, момент напоминания уже прошёл — отправить сразу.
+        """
+        event_id = (meeting.get("event_id") or "").strip()
+        if not event_id:
+            return False
+
+        start = parse_start(meeting)
+        due = start - self._lead if start is not None else None
+        now = tz_now()
+        eligible = (
+            due is not None
+            and _manager_chat_id(meeting) is not None
+            and (meeting.get("status") or "created").strip() != "canceled"
+            and not (meeting.get("recurrence") or "").strip()  # строка серии; повторения — из календаря
+            and start > now
+            and (catch_up or due > now)
+        )
+
+        with self._cond:
+            if eligible and self._sent.get(event_id) == start.timestamp():
+                eligible = False  # правка клиента/комментария после напоминания — второе не шлём
+            if not eligible:
+                self._entries.pop(event_id, None)
+                return False
+            version = next(self._versions)
+            self._entries[event_id] = (version, dict(meeting))
+            heapq.heappush(self._heap, (max(due, now).timestamp(), version, event_id))
+            self._cond.notify()
+        return True
+
+    def cancel(self, event_id: str) -> None:
+        # запись в куче останется и будет пропущена при извлечении; id серии снимает все её повторения
+        event_id = (event_id or "").strip()
+        with self._cond:
+            self._entries.pop(event_id, None)
+            for key in [k for k, (_, m) in self._entries.items() if m.get("series_id") == event_id]:
+                del self._entries[key]
+
+    def reload_series(self, series_id: str) -> None:
+        """
+        Серию создали или изменили: её повторения заново берутся из календаря (в потоке напоминаний).
+        """
+        self.cancel(series_id)
+        with self._cond:
+            self._reload = True
+            self._cond.notify()
+
+    def _pop_due(self, now_ts: float) -> list[dict]:
+        due = []
+        while self._heap and self._heap[0][0] <= now_ts:
+            _, version, event_id = heapq.heappop(self._heap)
+            entry = self._entries.get(event_id)
+            if entry is not None and entry[0] == version:
+                del self._entries[event_id]
+                due.append(entry[1])
+                self._sent[event_id] = parse_start(entry[1]).timestamp()
+        # встречи, которые уже начались, больше не нужны для защиты от повтора
+        for event_id in [e for e, start_ts in self._sent.items() if start_ts <= now_ts]:
+            del self._sent[event_id]
+        return due
+
+    def _next_wakeup(self) -> float:
+        # верх кучи без устаревших записей; плюс момент подгрузки следующего окна
+        while self._heap:
+            _, version, event_id = self._heap[0]
+            entry = self._entries.get(event_id)
+            if entry is not None and entry[0] == version:
+                break
+            heapq.heappop(self._heap)
+        if self._reload:
+            return 0.0
+        wakeup = (self._loaded_until - self._lead - LOAD_AHEAD).timestamp()
+        if self._heap:
+            wakeup = min(wakeup, self._heap[0][0])
+        return wakeup
+
+    # -------------------- calendar --------------------
+    def _load_range(self, start: datetime, end: datetime, *, catch_up: bool) -> int:
+        # singleEvents: каждое повторение серии приходит отдельным событием
+        scheduled = 0
+        for ev in iter_events_between(start.date(), end.date(), single_events=True):
+            meeting = meeting_from_event(ev)
+            if meeting is None:
+                continue
+            begin = parse_start(meeting)
+            if begin is not None and start <= begin < end:
+                scheduled += self.schedule(meeting, catch_up=catch_up)
+        return scheduled
+
+    def _load_window(self) -> None:
+        start = self._loaded_until or tz_now()
+        end = start + LOAD_WINDOW
+        scheduled = self._load_range(start, end, catch_up=False)
+        with self._cond:
+            self._loaded_until = end
+        print(f"Reminders: {scheduled} scheduled until {end.strftime('%d.%m %H:%M')}")
+
+    def _reload_window(self) -> None:
+        with self._cond:
+            self._reload = False
+            end = self._loaded_until
+        scheduled = self._load_range(tz_now(), end, catch_up=True)
+        print(f"Reminders: reloaded, {scheduled} scheduled until {end.strftime('%d.%m %H:%M')}")
+
+    # -------------------- background worker --------------------
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="reminders", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                if self._loaded_until is None:
+                    self._load_window()
+                self._step()
+            except Exception as e:
+                print("Reminders error:", repr(e))
+                time.sleep(30)
+
+    def _step(self) -> None:
+        with self._cond:
+            while True:
+                now_ts = time.time()
+                wakeup = self._next_wakeup()
+                if wakeup <= now_ts:
+                    break
+                self._cond.wait(wakeup - now_ts)
+            due = self._pop_due(now_ts)
+            reload = self._reload
+            load = not due and now_ts >= (self._loaded_until - self._lead - LOAD_AHEAD).timestamp()
+
+        if reload:
+            self._reload_window()
+        if load:
+            self._load_window()
+        for meeting in due:
+            self._send(meeting)
+
+    def _send(self, meeting: dict) -> None:
+        chat_id = _manager_chat_id(meeting)
+        try:
+            tg_send_message(reminder_text(meeting, self._lead), chat_id=chat_id, thread_id=None)
+        except Exception as e:
+            # чаще всего менеджер не начинал диалог с ботом (403)
+            print(f"Reminders: can't DM {chat_id} about {meeting.get('event_id')}:", tg_error_text(e))
+
+
+_ENGINE: ReminderEngine | None = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def start_reminders() -> ReminderEngine | None:
+    """
+    Запускает напоминания, если задан REMINDER_MINUTES.
+    """
+    global _ENGINE
+    if REMINDER_MINUTES <= 0:
+        return None
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            _ENGINE = ReminderEngine(timedelta(minutes=REMINDER_MINUTES))
+            _ENGINE.start()
+    return _ENGINE
+
+
+def reminders_schedule(meeting: dict) -> None:
+    """
+    Встречу создали или изменили (поля как в строке Meetings) — переставить напоминание.
+    Серия (recurrence) — повторения перечитываются из календаря.
+    """
+    if _ENGINE is None:
+        return
+    if (meeting.get("recurrence") or "").strip():
+        _ENGINE.reload_series((meeting.get("event_id") or "").strip())
+    else:
+        _ENGINE.schedule(meeting)
+
+
+def reminders_cancel(event_id: str) -> None:
+    if _ENGINE is not None:
+        _ENGINE.cancel(event_id)
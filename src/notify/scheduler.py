@@ -0,0 +1,202 @@
+# src/notify/scheduler.py
+"""
+Планировщик отчётов внутри процесса бота (REPORT_SCHEDULE).
+
+- время задаётся локальное (TZ), дни недели — опционально: week@09:00/mon;
+- раз в TICK_SECONDS проверяем, не пора ли запустить задание;
+- пропущенный из-за простоя запуск выполняется после старта, если его день ещё не прошёл
+  (отчёт строится на дату планового запуска, а не на дату фактического);
+- дата последнего запуска каждого задания — в SCHEDULER_STATE_PATH
+  (новое задание не догоняет уже прошедший сегодня запуск — только следующий).
+
+scripts/run_daily.py остаётся запасным вариантом (cron в GitHub Actions).
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, time as dtime, timedelta
+
+import pytz
+
+from src.config import TZ, REPORT_SCHEDULE, SCHEDULER_STATE_PATH
+from src.notify.daily_digest import (
+    fetch_meetings,
+    fetch_meetings_between,
+    iter_reports,
+    render_range,
+    send_reports,
+)
+
+TICK_SECONDS = 30.0
+
+WEEKDAY_NAMES = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+
+
+@dataclass(frozen=True)
+class ScheduledJob:
+    kind: str  # today / tomorrow / digest / week
+    at: dtime
+    weekdays: frozenset[int] | None = None  # None — каждый день
+
+    @property
+    def name(self) -> str:
+        days = "/" + "+".join(k for k, v in WEEKDAY_NAMES.items() if v in self.weekdays) if self.weekdays else ""
+        return f"{self.kind}@{self.at.strftime('%H:%M')}{days}"
+
+
+# -------------------- Jobs --------------------
+def _run_today(day: date) -> int:
+    return send_reports(iter_reports(fetch_meetings(day), ["cards"], day=day))
+
+
+def _run_tomorrow(day: date) -> int:
+    return _run_today(day + timedelta(days=1))
+
+
+def _run_digest(day: date) -> int:
+    return send_reports(iter_reports(fetch_meetings(day), ["managers"], day=day))
+
+
+def _run_week(day: date) -> int:
+    end = day + timedelta(days=6)
+    return send_reports(render_range(fetch_meetings_between(day, end), start_day=day, end_day=end))
+
+
+JOB_KINDS = {
+    "today": _run_today,
+    "tomorrow": _run_tomorrow,
+    "digest": _run_digest,
+    "week": _run_week,
+}
+
+
+def parse_schedule(spec: str) -> list[ScheduledJob]:
+    """
+    "today@09:00, tomorrow@17:00, week@09:00/mon" -> [ScheduledJob, ...]
+    """
+    jobs = []
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            kind, rest = item.split("@", 1)
+            at_s, _, days_s = rest.partition("/")
+            at = datetime.strptime(at_s.strip(), "%H:%M").time()
+            weekdays = frozenset(WEEKDAY_NAMES[d.strip().lower()] for d in days_s.split("+") if d.strip()) or None
+        except (ValueError, KeyError):
+            raise ValueError(f"REPORT_SCHEDULE: не понял «{item}» (пример: today@09:00, week@09:00/mon)")
+        if kind.strip() not in JOB_KINDS:
+            raise ValueError(f"REPORT_SCHEDULE: неизвестный отчёт «{kind}» (доступны: {', '.join(JOB_KINDS)})")
+        jobs.append(ScheduledJob(kind.strip(), at, weekdays))
+    return jobs
+
+
+def last_due(job: ScheduledJob, now: datetime) -> datetime:
+    """
+    Последний плановый момент запуска не позже now (aware, TZ).
+    """
+    tz = pytz.timezone(TZ)
+    day = now.astimezone(tz).date()
+    for _ in range(8):
+        if job.weekdays is None or day.weekday() in job.weekdays:
+            due = tz.localize(datetime.combine(day, job.at))
+            if due <= now:
+                return due
+        day -= timedelta(days=1)
+    raise AssertionError("unreachable")
+
+
+class ReportScheduler:
+    def __init__(self, jobs: list[ScheduledJob], state_path: str):
+        self._jobs = jobs
+        self._path = state_path
+        self._state: dict[str, str] = self._load()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _load(self) -> dict[str, str]:
+        if not os.path.exists(self._path):
+            return {}
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print("Scheduler: broken state file, starting fresh:", repr(e))
+            return {}
+
+    def _save(self) -> None:
+        d = os.path.dirname(self._path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        tmp = self._path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._state, f, ensure_ascii=False)
+        os.replace(tmp, self._path)
+
+    def run_pending(self, now: datetime | None = None) -> list[str]:
+        """
+        Запускает задания, чей плановый момент наступил и ещё не отработан. Возвращает их имена.
+        """
+        now = now or datetime.now(pytz.timezone(TZ))
+        ran = []
+        for job in self._jobs:
+            due = last_due(job, now)
+            if job.name not in self._state:
+                # новое задание: отсчёт с текущего момента, прошедший сегодня запуск не догоняем
+                self._state[job.name] = due.isoformat()
+                self._save()
+                continue
+            if self._state[job.name] >= due.isoformat():
+                continue
+
+            if due.date() == now.date():
+                try:
+                    sent = JOB_KINDS[job.kind](due.date())
+                    print(f"Scheduler: {job.name} sent {sent} message(s)")
+                    ran.append(job.name)
+                except Exception as e:
+                    # попробуем на следующем тике
+                    print(f"Scheduler: {job.name} failed:", repr(e))
+                    continue
+            else:
+                # день планового запуска уже прошёл (бот лежал) — такой отчёт не актуален
+                print(f"Scheduler: skip missed {job.name} for {due.date()}")
+
+            self._state[job.name] = due.isoformat()
+            self._save()
+        return ran
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        def _loop():
+            while not self._stop.is_set():
+                try:
+                    self.run_pending()
+                except Exception as e:
+                    print("Scheduler error:", repr(e))
+                self._stop.wait(TICK_SECONDS)
+
+        self._thread = threading.Thread(target=_loop, name="report-scheduler", daemon=True)
+        self._thread.start()
+        print("Scheduler: " + ", ".join(j.name for j in self._jobs))
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def start_scheduler() -> ReportScheduler | None:
+    """
+    Запускает планировщик, если задан REPORT_SCHEDULE.
+    """
+    jobs = parse_schedule(REPORT_SCHEDULE)
+    if not jobs:
+        return None
+    scheduler = ReportScheduler(jobs, SCHEDULER_STATE_PATH)
+    scheduler.start()
+    return scheduler
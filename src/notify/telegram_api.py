@@ -0,0 +1,82 @@
+# src/notify/telegram_api.py
+"""
+Отправка сообщений в Telegram для скриптов-отчётов (scripts/run_*.py).
+"""
+from __future__ import annotations
+
+import json
+
+import requests
+
+from src.config import TELEGRAM_BOT_TOKEN, TELEGRAM_FORUM_CHAT_ID, TELEGRAM_MEETS_THREAD_ID
+
+TG_API = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}"
+
+
+def tg_request(method: str, payload: dict):
+    r = requests.post(f"{TG_API}/{method}", data=payload, timeout=30)
+    if r.status_code != 200:
+        print("Telegram error:", r.status_code, r.text)
+        r.raise_for_status()
+    return r.json()
+
+
+def tg_send_message(
+    text: str,
+    *,
+    reply_markup: dict | None = None,
+    chat_id: int | str | None = None,
+    thread_id: int | str | None = TELEGRAM_MEETS_THREAD_ID,
+):
+    """
+    По умолчанию — в форум-чат, в тему встреч.
+    """
+    payload = {
+        "chat_id": TELEGRAM_FORUM_CHAT_ID if chat_id is None else chat_id,
+        "text": text,
+        "parse_mode": "HTML",
+        "disable_web_page_preview": True,
+    }
+    if thread_id is not None and str(thread_id).isdigit() and int(thread_id) > 0:
+        payload["message_thread_id"] = int(thread_id)
+    if reply_markup:
+        payload["reply_markup"] = json.dumps(reply_markup, ensure_ascii=False)
+    return tg_request("sendMessage", payload)
+
+
+def tg_edit_message_text(message_id: int, text: str, *, reply_markup: dict | None = None, chat_id: int | str | None = None):
+    payload = {
+        "chat_id": TELEGRAM_FORUM_CHAT_ID if chat_id is None else chat_id,
+        "message_id": message_id,
+        "text": text,
+        "parse_mode": "HTML",
+        "disable_web_page_preview": True,
+    }
+    if reply_markup:
+        payload["reply_markup"] = json.dumps(reply_markup, ensure_ascii=False)
+    return tg_request("editMessageText", payload)
+
+
+def tg_pin_message(message_id: int, *, chat_id: int | str | None = None):
+    payload = {
+        "chat_id": TELEGRAM_FORUM_CHAT_ID if chat_id is None else chat_id,
+        "message_id": message_id,
+        "disable_notification": True,
+    }
+    return tg_request("pinChatMessage", payload)
+
+
+def tg_unpin_message(message_id: int, *, chat_id: int | str | None = None):
+    payload = {"chat_id": TELEGRAM_FORUM_CHAT_ID if chat_id is None else chat_id, "message_id": message_id}
+    return tg_request("unpinChatMessage", payload)
+
+
+def tg_error_text(exc: BaseException) -> str:
+    """
+    description из ответа Telegram (например, "message is not modified") или repr ошибки.
+    """
+    response = getattr(exc, "response", None)
+    try:
+        return str(response.json().get("description") or "")
+    except Exception:
+        return repr(exc)
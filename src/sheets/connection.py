@@ -0,0 +1,141 @@
+# src/sheets/connection.py
+"""
+Подключение к Google Sheets (google-auth + gspread), общее для всех потоков.
+
+- ленивое подключение под lock: авторизуемся один раз на процесс;
+- токен сервисного аккаунта обновляем заранее, за REFRESH_MARGIN до истечения;
+- кэш объектов листов по названию (worksheet(title) без лишнего запроса к API);
+- reconnect(): при ошибке авторизации обновляем токен, а если не вышло — подключаемся заново.
+"""
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+from src.config import GOOGLE_SHEET_URL, SHEETS_HTTP_TIMEOUT
+from src.utils.retry import call_google
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+
+REFRESH_MARGIN = timedelta(minutes=5)
+
+
+def _auth_request():
+    from google.auth.transport.requests import Request
+
+    return Request()
+
+
+class SheetsConnection:
+    def __init__(self, url: str, credentials_file: str = "credentials.json", *, timeout: float = SHEETS_HTTP_TIMEOUT):
+        self._url = url
+        self._credentials_file = credentials_file
+        self._timeout = timeout
+
+        self._lock = threading.RLock()
+        self._creds = None
+        self._spreadsheet = None
+        self._worksheets: dict[str, object] = {}
+        self._titles: set[str] | None = None
+
+    # -------------------- auth --------------------
+    def _connect(self) -> None:
+        # gspread / google-auth грузим только когда таблица реально понадобилась
+        import gspread
+        from google.oauth2 import service_account
+
+        creds = service_account.Credentials.from_service_account_file(self._credentials_file, scopes=SCOPES)
+        creds.refresh(_auth_request())
+        client = gspread.authorize(creds)
+        client.set_timeout(self._timeout)
+
+        self._creds = creds
+        self._spreadsheet = call_google("sheets", client.open_by_url, self._url)
+        self._worksheets.clear()
+        self._titles = None
+        print("Sheets: connected")
+
+    def _expiring(self) -> bool:
+        expiry = self._creds.expiry  # naive UTC
+        if expiry is None:
+            return not self._creds.valid
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return expiry - now < REFRESH_MARGIN
+
+    def ensure_fresh(self) -> None:
+        """
+        Подключается при первом вызове; обновляет токен, если он скоро истечёт.
+        Обновление на месте: уже выданные объекты листов продолжают работать.
+        """
+        with self._lock:
+            if self._creds is None:
+                self._connect()
+            elif self._expiring():
+                self._creds.refresh(_auth_request())
+
+    def reconnect(self) -> None:
+        with self._lock:
+            if self._creds is not None:
+                try:
+                    self._creds.refresh(_auth_request())
+                    return
+                except Exception as e:
+                    print("Sheets: token refresh failed, reconnecting:", repr(e))
+            self._creds = None
+            self._connect()
+
+    # -------------------- handles --------------------
+    def spreadsheet(self):
+        self.ensure_fresh()
+        return self._spreadsheet
+
+    def titles(self, refresh: bool = False) -> set[str]:
+        """
+        Названия листов таблицы; одним запросом заодно заполняет кэш объектов листов.
+        """
+        with self._lock:
+            if self._titles is not None and not refresh:
+                return set(self._titles)
+        worksheets = call_google("sheets", self.spreadsheet().worksheets)
+        with self._lock:
+            self._worksheets.update({ws.title: ws for ws in worksheets})
+            self._titles = {ws.title for ws in worksheets}
+            return set(self._titles)
+
+    def worksheet(self, title: str):
+        """
+        Объект листа по названию (из кэша). Нет листа — gspread.exceptions.WorksheetNotFound.
+        """
+        with self._lock:
+            ws = self._worksheets.get(title)
+        if ws is not None:
+            return ws
+        ws = call_google("sheets", self.spreadsheet().worksheet, title)
+        with self._lock:
+            self._worksheets[title] = ws
+            if self._titles is not None:
+                self._titles.add(title)
+        return ws
+
+    def add_worksheet(self, title: str, rows: int, cols: int):
+        ws = call_google("sheets", self.spreadsheet().add_worksheet, title=title, rows=rows, cols=cols, idempotent=False)
+        with self._lock:
+            self._worksheets[title] = ws
+            if self._titles is not None:
+                self._titles.add(title)
+        return ws
+
+
+_CONNECTION: SheetsConnection | None = None
+_CONNECTION_LOCK = threading.Lock()
+
+
+def sheets_connection() -> SheetsConnection:
+    global _CONNECTION
+    with _CONNECTION_LOCK:
+        if _CONNECTION is None:
+            _CONNECTION = SheetsConnection(GOOGLE_SHEET_URL)
+    return _CONNECTION
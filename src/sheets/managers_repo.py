@@ -1,22 +1,25 @@
 import re
+import time
+import atexit
+import threading
 from datetime import datetime
 import pytz
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 
-from src.config import GOOGLE_SHEET_URL, TZ
+from src.config import TZ, MEETINGS_SPOOL_PATH, SHEETS_FLUSH_WINDOW
+from src.sheets.connection import sheets_connection
+from src.sheets.write_buffer import MeetingsWriteBuffer
+from src.sheets.meetings_index import MeetingsIndex
+from src.utils.replay import register_handler, replay_queue
+from src.utils.retry import call_google, http_status, is_outage
 
 # ----------------------------
 # Internal helpers / caching
 # ----------------------------
 
-_SCOPE = [
-    "https://spreadsheets.google.com/feeds",
-    "https://www.googleapis.com/auth/drive",
-]
-
-_GC = None
-_SHEET = None
+# кэш листа Managers: меняется редко, а читается на каждом шаге выбора менеджера
+MANAGERS_CACHE_TTL = 300  # seconds
+_MANAGERS_CACHE: list[dict] | None = None
+_MANAGERS_CACHE_TS = 0.0
 
 
 def _norm(s: str) -> str:
@@ -24,32 +27,103 @@ def _norm(s: str) -> str:
     return re.sub(r"\s+", "", (s or "").strip().lower())
 
 
+def _gs(fn, *args, idempotent: bool = True, **kwargs):
+    """
+    Вызов gspread через общую политику повторов/квот Sheets (src/utils/retry.py).
+    Токен обновляется заранее; на 401 — переподключение и ещё одна попытка.
+    """
+    conn = sheets_connection()
+    conn.ensure_fresh()
+    try:
+        return call_google("sheets", fn, *args, idempotent=idempotent, **kwargs)
+    except Exception as e:
+        if http_status(e) != 401:
+            raise
+        conn.reconnect()
+        return call_google("sheets", fn, *args, idempotent=idempotent, **kwargs)
+
+
+def _gs_once(fn, *args, **kwargs):
+    # неидемпотентные записи (append, удаление строк): повторяем только явный отказ по квоте (429)
+    return _gs(fn, *args, idempotent=False, **kwargs)
+
+
 def _get_sheet():
     """
-    Cached access to spreadsheet via service account.
-    Avoids re-auth on every call.
+    Таблица через общее подключение (src/sheets/connection.py): авторизация один раз на процесс.
     """
-    global _GC, _SHEET
-    if _GC is None or _SHEET is None:
-        creds = ServiceAccountCredentials.from_json_keyfile_name("credentials.json", _SCOPE)
-        _GC = gspread.authorize(creds)
-        _SHEET = _GC.open_by_url(GOOGLE_SHEET_URL)
-    return _SHEET
+    return sheets_connection().spreadsheet()
 
 
 def _now_str() -> str:
     return datetime.now(pytz.timezone(TZ)).strftime("%Y-%m-%d %H:%M:%S")
 
 
+def new_version() -> str:
+    """
+    Новая метка версии строки Meetings: сравнивается только на равенство,
+    наносекунды делают совпадение у двух записей практически невозможным.
+    Префикс «v» — чтобы Sheets (USER_ENTERED) не превратил метку из цифр или «12e34» в число.
+    """
+    return "v" + format(time.time_ns(), "x")
+
+
+class MeetingConflict(RuntimeError):
+    """
+    Строку изменили после того, как её прочитали (версия не совпала).
+    """
+
+
 # ----------------------------
 # Managers (existing logic)
 # ----------------------------
 
-def get_managers():
-    sheet = _get_sheet()
-    ws = sheet.worksheet("Managers")
+def get_managers(*, force_refresh: bool = False):
+    """
+    Список менеджеров из листа Managers (с кэшем на MANAGERS_CACHE_TTL секунд).
+    """
+    global _MANAGERS_CACHE, _MANAGERS_CACHE_TS
+    if (
+        not force_refresh
+        and _MANAGERS_CACHE is not None
+        and time.monotonic() - _MANAGERS_CACHE_TS < MANAGERS_CACHE_TTL
+    ):
+        return list(_MANAGERS_CACHE)
+
+    managers = _load_managers()
+    _MANAGERS_CACHE = managers
+    _MANAGERS_CACHE_TS = time.monotonic()
+    return list(managers)
 
-    values = ws.get_all_values()
+
+def find_manager(query: str, managers: list[dict] | None = None) -> dict | None:
+    """
+    Ищет менеджера по @username, telegram_id или имени (без учёта регистра).
+    """
+    q = (query or "").strip()
+    if not q:
+        return None
+    if managers is None:
+        managers = get_managers()
+
+    q_norm = q.lstrip("@").lower()
+    for m in managers:
+        username = (m.get("username") or "").strip().lstrip("@").lower()
+        if username and username == q_norm:
+            return m
+    for m in managers:
+        if (m.get("telegram_id") or "").strip() == q:
+            return m
+    for m in managers:
+        if (m.get("name") or "").strip().lower() == q.lower():
+            return m
+    return None
+
+
+def _load_managers():
+    ws = sheets_connection().worksheet("Managers")
+
+    values = _gs(ws.get_all_values)
     if not values or len(values) < 2:
         return []
 
@@ -126,30 +200,58 @@ MEETINGS_HEADERS = [
     "comment",
     "event_id",
     "status",  # created / canceled / updated
+    "recurrence",  # RRULE для повторяющихся встреч (одна строка на серию)
+    "updated_at",  # последняя правка строки (для инкрементальной выгрузки)
+    "version",  # метка версии строки, меняется при каждой записи (optimistic concurrency)
 ]
 
 
+_MEETINGS_CHECKED = False
+
+
 def ensure_meetings_sheet():
     """
     Ensures Meetings sheet exists and has header row.
     If sheet doesn't exist -> create it.
     If exists but empty -> add headers.
+
+    Проверка делается один раз на процесс и читает только строку заголовков;
+    сам объект листа берётся из кэша подключения.
     """
-    sheet = _get_sheet()
+    from gspread.exceptions import WorksheetNotFound
+
+    global _MEETINGS_CHECKED
+    conn = sheets_connection()
+    if _MEETINGS_CHECKED:
+        return conn.worksheet(MEETINGS_SHEET_NAME)
 
     try:
-        ws = sheet.worksheet(MEETINGS_SHEET_NAME)
-    except gspread.exceptions.WorksheetNotFound:
-        ws = sheet.add_worksheet(title=MEETINGS_SHEET_NAME, rows=2000, cols=len(MEETINGS_HEADERS))
+        ws = conn.worksheet(MEETINGS_SHEET_NAME)
+    except WorksheetNotFound:
+        ws = conn.add_worksheet(MEETINGS_SHEET_NAME, rows=2000, cols=len(MEETINGS_HEADERS))
 
-    values = ws.get_all_values()
-    if not values:
-        ws.append_row(MEETINGS_HEADERS, value_input_option="USER_ENTERED")
+    first_row = _gs(ws.row_values, 1)
+    if not first_row:
+        _gs_once(ws.append_row, MEETINGS_HEADERS, value_input_option="USER_ENTERED")
+        _HEADERS_CACHE[ws.title] = list(MEETINGS_HEADERS)
+        _MEETINGS_CHECKED = True
         return ws
 
     # If first row doesn't look like headers — we won't overwrite; but we can check minimal
-    first_row_norm = [_norm(x) for x in values[0]]
+    first_row_norm = [_norm(x) for x in first_row]
+    while first_row_norm and not first_row_norm[-1]:
+        first_row_norm.pop()
     expected_norm = [_norm(x) for x in MEETINGS_HEADERS]
+
+    if len(first_row_norm) < len(expected_norm) and first_row_norm == expected_norm[: len(first_row_norm)]:
+        # старый лист без новых колонок — дописываем недостающие заголовки справа
+        if ws.col_count < len(MEETINGS_HEADERS):
+            _gs(ws.add_cols, len(MEETINGS_HEADERS) - ws.col_count)
+        _gs(ws.update, range_name="A1", values=[MEETINGS_HEADERS], value_input_option="USER_ENTERED")
+        _HEADERS_CACHE[ws.title] = list(MEETINGS_HEADERS)
+        _MEETINGS_CHECKED = True
+        return ws
+
     if first_row_norm[: len(expected_norm)] != expected_norm:
         # Do not destroy existing data; just raise clear error
         raise RuntimeError(
@@ -157,10 +259,12 @@ def ensure_meetings_sheet():
             f"Ожидаю: {MEETINGS_HEADERS}"
         )
 
+    _HEADERS_CACHE[ws.title] = first_row
+    _MEETINGS_CHECKED = True
     return ws
 
 
-def append_meeting(
+def build_meeting_row(
     *,
     created_by_id: int,
     created_by_username: str,
@@ -177,14 +281,14 @@ def append_meeting(
     comment: str,
     event_id: str,
     status: str = "created",
-):
+    recurrence: str = "",
+) -> list[str]:
     """
-    Appends a meeting row into Meetings sheet.
+    Собирает строку для листа Meetings (порядок как в MEETINGS_HEADERS).
     """
-    ws = ensure_meetings_sheet()
-
-    row = [
-        _now_str(),
+    now = _now_str()
+    return [
+        now,
         str(created_by_id),
         created_by_username or "",
         str(chat_id),
@@ -200,39 +304,267 @@ def append_meeting(
         comment or "",
         event_id or "",
         status or "created",
+        recurrence or "",
+        now,
+        new_version(),
     ]
-    ws.append_row(row, value_input_option="USER_ENTERED")
 
 
-def list_meetings_for_date(date_ddmmYYYY: str) -> list[dict]:
+_WRITE_BUFFER: MeetingsWriteBuffer | None = None
+_WRITE_BUFFER_LOCK = threading.Lock()
+
+
+def _append_rows_now(rows: list[list[str]]) -> None:
+    ws = ensure_meetings_sheet()
+    _gs_once(ws.append_rows, rows, value_input_option="USER_ENTERED")
+
+
+def _rows_not_in_sheet(rows: list[list[str]]) -> list[list[str]]:
     """
-    Reads meetings for specific date (DD.MM.YYYY) from Meetings sheet.
-    Returns list of dicts with keys from headers.
+    После неоднозначного сбоя append (таймаут, 5xx) строки могли уже записаться:
+    отбрасываем те, чей event_id уже есть в Meetings. Читает одну колонку.
     """
     ws = ensure_meetings_sheet()
-    values = ws.get_all_values()
-    if not values or len(values) < 2:
+    col_idx = _col_index(_headers(ws), "event_id")
+    if col_idx is None:
+        return rows
+    present = {(v or "").strip() for v in _gs(ws.col_values, col_idx + 1)[1:]}
+    pos = MEETINGS_HEADERS.index("event_id")
+    return [r for r in rows if not (len(r) > pos and (r[pos] or "").strip() in present - {""})]
+
+
+def _write_buffer() -> MeetingsWriteBuffer:
+    """
+    Ленивый write-behind буфер для Meetings (см. src/sheets/write_buffer.py).
+    При завершении процесса накопленное сбрасывается через atexit.
+    """
+    global _WRITE_BUFFER
+    with _WRITE_BUFFER_LOCK:
+        if _WRITE_BUFFER is None:
+            _WRITE_BUFFER = MeetingsWriteBuffer(
+                _append_rows_now,
+                MEETINGS_SPOOL_PATH,
+                flush_window=SHEETS_FLUSH_WINDOW,
+                dedupe_fn=_rows_not_in_sheet,
+            )
+            atexit.register(flush_meetings)
+    return _WRITE_BUFFER
+
+
+def start_meetings_writer() -> int:
+    """
+    Запускает буфер заранее (при старте бота), чтобы строки из spool
+    после падения ушли в таблицу сразу. Возвращает число восстановленных строк.
+    """
+    return len(_write_buffer().pending_rows())
+
+
+def flush_meetings(timeout: float | None = 10.0) -> bool:
+    """
+    Shutdown-хук: синхронно отправляет накопленные строки.
+    False — что-то осталось в spool (уйдёт при следующем запуске).
+    """
+    if _WRITE_BUFFER is None:
+        return True
+    return _WRITE_BUFFER.flush(timeout)
+
+
+def _pending_meetings() -> list[dict]:
+    if _WRITE_BUFFER is None:
         return []
+    return [_row_to_dict(MEETINGS_HEADERS, r) for r in _WRITE_BUFFER.pending_rows()]
+
+
+def _row_to_dict(headers: list[str], row: list[str]) -> dict:
+    return {h: (row[i] if i < len(row) else "") for i, h in enumerate(headers)}
+
+
+def append_meeting(**fields):
+    """
+    Appends a meeting row into Meetings sheet.
+    Аргументы — как у build_meeting_row().
+
+    Запись отложенная: строка сразу попадает в локальный spool,
+    а в таблицу уходит пачкой через append_rows (write-behind буфер).
+    """
+    row = build_meeting_row(**fields)
+    _write_buffer().submit([row])
+    _index_rows([row])
 
+
+def append_meeting_rows(rows: list[list[str]]) -> int:
+    """
+    Готовые строки (порядок MEETINGS_HEADERS) — в write-behind буфер как есть.
+    Используется зеркалированием из локального хранилища.
+    """
+    if not rows:
+        return 0
+    _write_buffer().submit(rows)
+    _index_rows(rows)
+    return len(rows)
+
+
+def list_all_meetings() -> list[dict]:
+    """
+    Все строки листа Meetings (полная выгрузка — для первичного импорта в локальное хранилище).
+    """
+    ws = ensure_meetings_sheet()
+    values = _gs(ws.get_all_values)
+    if not values or len(values) < 2:
+        return []
     headers = values[0]
-    rows = values[1:]
+    return [_row_to_dict(headers, r) for r in values[1:]]
 
-    # find date col index
+
+def append_meetings(rows: list[dict]) -> int:
+    """
+    Пакетная запись: одна строка на dict (аргументы как у build_meeting_row()),
+    всё уходит одним вызовом append_rows.
+    Возвращает количество поставленных в очередь строк.
+    """
+    if not rows:
+        return 0
+    values = [build_meeting_row(**r) for r in rows]
+    _write_buffer().submit(values)
+    _index_rows(values)
+    return len(values)
+
+
+def _rows_to_items(headers: list[str], rows: list[list[str]]) -> list[dict]:
+    return [_row_to_dict(headers, r) for r in rows]
+
+
+# ----------------------------
+# Column-projected reads
+# ----------------------------
+# Поиск читает одну колонку (event_id или date), затем — только найденные строки.
+# Для MEETINGS_HEADERS это ~1/16 байт полной выгрузки листа.
+
+# title листа -> строка заголовков
+_HEADERS_CACHE: dict[str, list[str]] = {}
+
+
+def _headers(ws) -> list[str]:
+    headers = _HEADERS_CACHE.get(ws.title)
+    if headers is None:
+        headers = _gs(ws.row_values, 1)
+        _HEADERS_CACHE[ws.title] = headers
+    return headers
+
+
+def _col_index(headers: list[str], name: str) -> int | None:
     headers_norm = [_norm(h) for h in headers]
     try:
-        idx_date = headers_norm.index("date")
+        return headers_norm.index(name)
     except ValueError:
+        return None
+
+
+def _matching_rows(ws, col_idx: int, value: str) -> list[int]:
+    """
+    Номера строк (1-based, без заголовка), где колонка col_idx (0-based) == value.
+    Читает только эту колонку.
+    """
+    col = _gs(ws.col_values, col_idx + 1)
+    target = (value or "").strip()
+    return [i for i, v in enumerate(col[1:], start=2) if (v or "").strip() == target]
+
+
+def _col_letters(col: int) -> str:
+    # 1 -> A, 27 -> AA (как gspread.utils.rowcol_to_a1, без импорта gspread)
+    letters = ""
+    while col > 0:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def _read_rows(ws, headers: list[str], row_nums: list[int]) -> list[dict]:
+    """
+    Читает только указанные строки: один batch_get с непрерывными диапазонами.
+    """
+    if not row_nums:
         return []
+    last_col = _col_letters(len(headers))
+    ranges = _row_ranges(row_nums)
+    blocks = _gs(ws.batch_get, [f"A{start}:{last_col}{end}" for start, end in ranges])
+
+    items = []
+    for (start, end), block in zip(ranges, blocks):
+        block = list(block)
+        # пустые хвостовые строки API не возвращает
+        block += [[]] * ((end - start + 1) - len(block))
+        items.extend(_row_to_dict(headers, r) for r in block)
+    return items
+
+
+def _list_date_in_ws(ws, date_ddmmYYYY: str) -> list[dict]:
+    headers = _headers(ws)
+    idx_date = _col_index(headers, "date")
+    if idx_date is None:
+        return []
+    return _read_rows(ws, headers, _matching_rows(ws, idx_date, date_ddmmYYYY))
+
 
-    res = []
-    for r in rows:
-        if len(r) <= idx_date:
+def _find_event_in_ws(ws, event_id: str, *, read_row: bool = True) -> tuple[int, list[str], dict] | None:
+    """
+    (номер строки 1-based, заголовки, dict) для event_id в листе или None.
+    read_row=False — только номер строки (dict будет пустым), без чтения самой строки.
+    """
+    headers = _headers(ws)
+    idx_event = _col_index(headers, "event_id")
+    if idx_event is None:
+        return None
+
+    rows = _matching_rows(ws, idx_event, event_id)
+    if not rows:
+        return None
+    row_num = rows[0]
+    item = _read_rows(ws, headers, [row_num])[0] if read_row else {}
+    return row_num, headers, item
+
+
+def _update_row(ws, row_num: int, headers: list[str], updates: dict) -> None:
+    """
+    Все изменённые ячейки строки — одним batch_update.
+    """
+    headers_norm = [_norm(h) for h in headers]
+    data = []
+    for k, v in updates.items():
+        kn = _norm(k)
+        if kn not in headers_norm:
             continue
-        if (r[idx_date] or "").strip() == date_ddmmYYYY:
-            item = {}
-            for i, h in enumerate(headers):
-                item[h] = r[i] if i < len(r) else ""
-            res.append(item)
+        col_idx = headers_norm.index(kn) + 1
+        data.append({"range": f"{_col_letters(col_idx)}{row_num}", "values": [[str(v)]]})
+    if data:
+        _gs(ws.batch_update, data, value_input_option="USER_ENTERED")
+
+
+def list_meetings_for_date(date_ddmmYYYY: str) -> list[dict]:
+    """
+    Reads meetings for specific date (DD.MM.YYYY) from Meetings sheet.
+    Returns list of dicts with keys from headers.
+
+    Если месяц уже архивирован — дочитываем только его помесячный лист (Meetings_YYYY_MM).
+    Sheets недоступен — отдаём последний успешный результат за эту дату (строки с "_stale").
+    """
+    res = [m for m in _pending_meetings() if (m.get("date") or "").strip() == date_ddmmYYYY]
+
+    try:
+        rows = _list_date_in_ws(ensure_meetings_sheet(), date_ddmmYYYY)
+        part = _partition_ws_for_date(date_ddmmYYYY)
+        if part is not None:
+            rows.extend(_list_date_in_ws(part, date_ddmmYYYY))
+    except Exception as e:
+        cached = _STALE_BY_DATE.get(date_ddmmYYYY) if is_outage(e) else None
+        if cached is None:
+            raise
+        print(f"Sheets unavailable, serving cached meetings for {date_ddmmYYYY}:", repr(e))
+        rows = [{**m, "_stale": True} for m in cached]
+    else:
+        _stale_remember(rows, date_ddmmYYYY)
+
+    res.extend(rows)
 
     # sort by time if possible
     def _sort_key(x: dict):
@@ -241,69 +573,638 @@ def list_meetings_for_date(date_ddmmYYYY: str) -> list[dict]:
     res.sort(key=_sort_key)
     return res
 
+
 def get_meeting_by_event_id(event_id: str) -> dict | None:
     """
     Ищет встречу в листе Meetings по event_id.
     Возвращает dict (headers -> values) или None.
+    Не нашли в «горячем» листе — смотрим в архивный лист по индексу.
+    Sheets недоступен — копия из кэша последних чтений / индекса с пометкой "_stale".
     """
-    ws = ensure_meetings_sheet()
-    values = ws.get_all_values()
-    if not values or len(values) < 2:
+    for m in _pending_meetings():
+        if (m.get("event_id") or "").strip() == (event_id or "").strip():
+            return m
+
+    try:
+        found = _find_event_in_ws(ensure_meetings_sheet(), event_id)
+        if found is None:
+            part = _partition_ws_for_event(event_id)
+            if part is not None:
+                found = _find_event_in_ws(part, event_id)
+    except Exception as e:
+        cached = _stale_meeting(event_id) if is_outage(e) else None
+        if cached is None:
+            raise
+        print(f"Sheets unavailable, serving cached meeting {event_id}:", repr(e))
+        return {**cached, "_stale": True}
+
+    if not found:
         return None
+    _stale_remember([found[2]])
+    return found[2]
 
-    headers = values[0]
-    headers_norm = [_norm(h) for h in headers]
 
+def update_meeting_by_event_id(event_id: str, updates: dict, *, expected_version: str | None = None) -> bool:
+    """
+    Обновляет строку в Meetings по event_id (на месте).
+    updates: {"time": "...", "client": "...", "comment": "...", ...}
+    Возвращает True если обновили.
+
+    Sheets недоступен (или в очереди уже есть отложенные правки) — правка уходит
+    в очередь повторов (src/utils/replay.py), кэш и индекс обновляются сразу; возвращаем True.
+    updated_at и новая version проставляются сами, если их нет в updates.
+
+    expected_version — версия, которую видел вызывающий: если строку с тех пор изменили,
+    MeetingConflict. Проверка — чтение строки перед записью (Sheets не умеет compare-and-set),
+    окно между ними — один запрос.
+    """
+    if expected_version is not None:
+        current = get_meeting_by_event_id(event_id)
+        if current is None:
+            return False
+        if (current.get("version") or "").strip() != expected_version:
+            raise MeetingConflict(f"meeting {event_id} was changed concurrently")
+
+    updates = {
+        **updates,
+        "updated_at": updates.get("updated_at") or _now_str(),
+        "version": updates.get("version") or new_version(),
+    }
+    if _update_pending_meeting(event_id, updates):
+        _index_update(event_id, updates)
+        return True
+
+    queue = replay_queue()
+    if not queue.has_pending("sheets"):
+        try:
+            return _update_meeting_by_event_id_now(event_id, updates)
+        except Exception as e:
+            if not is_outage(e):
+                raise
+
+    queue.enqueue("sheets", "sheets.update", {"event_id": event_id, "updates": {k: str(v) for k, v in updates.items()}})
+    _index_update(event_id, updates)
+    _stale_update(event_id, updates)
+    return True
+
+
+def _update_meeting_by_event_id_now(event_id: str, updates: dict) -> bool:
+    ws = ensure_meetings_sheet()
+    found = _find_event_in_ws(ws, event_id, read_row=False)
+    if found is None:
+        ws = _partition_ws_for_event(event_id)
+        if ws is not None:
+            found = _find_event_in_ws(ws, event_id, read_row=False)
+
+    if not found:
+        return False
+
+    row_num, headers, _ = found
+    _update_row(ws, row_num, headers, updates)
+    _index_update(event_id, updates)
+    _stale_update(event_id, updates)
+    return True
+
+
+register_handler("sheets.update", _update_meeting_by_event_id_now)
+
+
+# ----------------------------
+# Stale cache (на время недоступности Sheets)
+# ----------------------------
+
+_STALE_LOCK = threading.Lock()
+_STALE_BY_EVENT: dict[str, dict] = {}
+_STALE_BY_DATE: dict[str, list[dict]] = {}
+
+
+def _stale_remember(items: list[dict], date_ddmmYYYY: str | None = None) -> None:
+    with _STALE_LOCK:
+        for it in items:
+            eid = (it.get("event_id") or "").strip()
+            if eid:
+                _STALE_BY_EVENT[eid] = dict(it)
+        if date_ddmmYYYY is not None:
+            _STALE_BY_DATE[date_ddmmYYYY] = [dict(it) for it in items]
+
+
+def _stale_meeting(event_id: str) -> dict | None:
+    eid = (event_id or "").strip()
+    with _STALE_LOCK:
+        cached = _STALE_BY_EVENT.get(eid)
+        if cached is not None:
+            return dict(cached)
+    return _INDEX.get(eid) if _INDEX is not None else None
+
+
+def _stale_update(event_id: str, updates: dict) -> None:
+    eid = (event_id or "").strip()
+    changes = {k: str(v) for k, v in updates.items()}
+    with _STALE_LOCK:
+        if eid in _STALE_BY_EVENT:
+            _STALE_BY_EVENT[eid].update(changes)
+        for items in _STALE_BY_DATE.values():
+            for it in items:
+                if (it.get("event_id") or "").strip() == eid:
+                    it.update(changes)
+
+
+# ----------------------------
+# Date-sorted index (range queries)
+# ----------------------------
+
+_INDEX: MeetingsIndex | None = None
+_INDEX_LOCK = threading.Lock()
+# архивные листы, уже загруженные в индекс
+_INDEXED_PARTITIONS: set[str] = set()
+
+
+def _meetings_index() -> MeetingsIndex:
+    """
+    Индекс строится один раз (полное чтение «горячего» листа + буфер),
+    дальше поддерживается инкрементально на append/update.
+    """
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            idx = MeetingsIndex()
+            ws = ensure_meetings_sheet()
+            values = _gs(ws.get_all_values)
+            if values and len(values) > 1:
+                idx.load(_rows_to_items(values[0], values[1:]))
+            idx.load(_pending_meetings())
+            _INDEX = idx
+    return _INDEX
+
+
+def _index_rows(rows: list[list[str]]) -> None:
+    items = [_row_to_dict(MEETINGS_HEADERS, r) for r in rows]
+    for on_rows, _ in list(_LISTENERS):
+        _call_listener(on_rows, items)
+    if _INDEX is None:
+        return
+    _INDEX.load(items)
+
+
+def _index_update(event_id: str, updates: dict) -> None:
+    for _, on_update in list(_LISTENERS):
+        _call_listener(on_update, event_id, updates)
+    if _INDEX is None:
+        return
+    _INDEX.update(event_id, updates)
+
+
+# подписчики на изменения встреч этого процесса: [(on_rows, on_update), ...]
+_LISTENERS: list[tuple] = []
+
+
+def add_meetings_listener(on_rows, on_update) -> None:
+    """
+    Подписка на запись встреч через этот модуль (агрегаты /stats и т.п.):
+    on_rows(items) — новые строки (list[dict]), on_update(event_id, updates) — правка полей.
+    Вызывается синхронно в потоке записи; ошибка подписчика запись не ломает.
+    """
+    _LISTENERS.append((on_rows, on_update))
+
+
+def _call_listener(fn, *args) -> None:
+    try:
+        fn(*args)
+    except Exception as e:
+        print("Meetings listener error:", repr(e))
+
+
+def _index_partitions(idx: MeetingsIndex, start: datetime, end: datetime) -> None:
+    """
+    Подгружает в индекс архивные листы тех месяцев, что попадают в [start, end).
+    """
+    y, m = start.year, start.month
+    while (y, m) <= (end.year, end.month):
+        title = partition_title(y, m)
+        if title not in _INDEXED_PARTITIONS and title in _worksheet_titles():
+            values = _gs(sheets_connection().worksheet(title).get_all_values)
+            if values and len(values) > 1:
+                idx.load(_rows_to_items(values[0], values[1:]))
+            _INDEXED_PARTITIONS.add(title)
+        m += 1
+        if m > 12:
+            y, m = y + 1, 1
+
+
+def as_local_dt(value) -> datetime:
+    tz = pytz.timezone(TZ)
+    if isinstance(value, datetime):
+        return tz.localize(value) if value.tzinfo is None else value.astimezone(tz)
+    return tz.localize(datetime(value.year, value.month, value.day))
+
+
+def list_meetings_between(start, end, manager=None) -> list[dict]:
+    """
+    Встречи с началом в [start, end) по start_iso, по возрастанию.
+    start/end — date (полночь по TZ) или datetime.
+    manager — telegram_id, имя или @username (None — все менеджеры).
+
+    Бинарный поиск по индексу: O(log n + k) без чтения таблицы.
+    """
+    start_dt = as_local_dt(start)
+    end_dt = as_local_dt(end)
+
+    idx = _meetings_index()
+    _index_partitions(idx, start_dt, end_dt)
+    return idx.between(start_dt, end_dt, manager=manager)
+
+
+def iter_meetings_history():
+    """
+    Все встречи за всё время: архивные листы Meetings_YYYY_MM, затем «горячий» лист и буфер.
+    Строка, оставшаяся в двух местах после сбоя архивации, придёт дважды — позже «горячая».
+    Каждый лист читается одним get_all_values (для полной перестройки агрегатов).
+    """
+    for title in _partition_titles():
+        values = _gs(sheets_connection().worksheet(title).get_all_values)
+        if values and len(values) > 1:
+            yield from _rows_to_items(values[0], values[1:])
+    yield from list_all_meetings()
+    yield from _pending_meetings()
+
+
+def _partition_titles() -> list[str]:
+    # все архивные листы Meetings_YYYY_MM, по возрастанию месяца
+    pattern = re.compile(rf"{re.escape(MEETINGS_SHEET_NAME)}_\d{{4}}_\d{{2}}")
+    return sorted(t for t in _worksheet_titles(refresh=True) if pattern.fullmatch(t))
+
+
+EXPORT_CHUNK_ROWS = 1000
+
+
+def iter_meetings_chunked(start_day=None, end_day=None, *, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """
+    Встречи с датой в [start_day, end_day] (date, включительно; None — без границы):
+    архивные листы нужных месяцев, затем «горячий» лист.
+    Лист читается диапазонами по chunk_rows строк — в памяти не больше одной пачки.
+    """
+    titles = []
+    for title in _partition_titles():
+        month = title[len(MEETINGS_SHEET_NAME) + 1:].replace("_", "")  # "YYYYMM"
+        if start_day is not None and month < f"{start_day:%Y%m}":
+            continue
+        if end_day is not None and month > f"{end_day:%Y%m}":
+            continue
+        titles.append(title)
+    titles.append(MEETINGS_SHEET_NAME)
+
+    for title in titles:
+        ws = ensure_meetings_sheet() if title == MEETINGS_SHEET_NAME else sheets_connection().worksheet(title)
+        headers = _headers(ws)
+        idx_date = _col_index(headers, "date")
+        if idx_date is None:
+            continue
+        last_col = _col_letters(len(headers))
+        # row_count — размер сетки листа (с пустыми строками в конце), данные внутри него
+        for start in range(2, ws.row_count + 1, chunk_rows):
+            block = _gs(ws.get, f"A{start}:{last_col}{start + chunk_rows - 1}")
+            for row in block:
+                if start_day is not None or end_day is not None:
+                    try:
+                        d = datetime.strptime((row[idx_date] if len(row) > idx_date else "").strip(), "%d.%m.%Y").date()
+                    except ValueError:
+                        continue
+                    if (start_day is not None and d < start_day) or (end_day is not None and d > end_day):
+                        continue
+                if any((v or "").strip() for v in row):
+                    yield _row_to_dict(headers, row)
+
+
+def search_meetings(query: str) -> list[dict]:
+    """
+    Поиск по клиенту, комментарию и менеджеру в индексе (архивные листы — только уже подгруженные).
+    Предстоящие встречи от ближайшей, затем прошедшие; таблица не читается.
+    """
+    return _meetings_index().search(query)
+
+
+# ----------------------------
+# Monthly partitions (archive)
+# ----------------------------
+
+ARCHIVE_INDEX_SHEET_NAME = "MeetingsArchiveIndex"
+ARCHIVE_INDEX_HEADERS = ["event_id", "partition"]
+
+# event_id -> название архивного листа (кэш листа-индекса)
+_ARCHIVE_INDEX: dict[str, str] | None = None
+
+
+def partition_title(year: int, month: int) -> str:
+    return f"{MEETINGS_SHEET_NAME}_{year:04d}_{month:02d}"
+
+
+def _partition_title_for_date(date_ddmmYYYY: str) -> str | None:
     try:
-        idx_event = headers_norm.index("event_id")
+        d = datetime.strptime((date_ddmmYYYY or "").strip(), "%d.%m.%Y")
     except ValueError:
         return None
+    return partition_title(d.year, d.month)
 
-    for row in values[1:]:
-        if len(row) <= idx_event:
-            continue
-        if (row[idx_event] or "").strip() == (event_id or "").strip():
-            item = {}
-            for i, h in enumerate(headers):
-                item[h] = row[i] if i < len(row) else ""
-            return item
 
-    return None
+def _worksheet_titles(refresh: bool = False) -> set[str]:
+    # названия существующих листов (чтобы не ловить WorksheetNotFound на каждый запрос)
+    return sheets_connection().titles(refresh=refresh)
+
+
+def _partition_ws(title: str | None):
+    if not title or title not in _worksheet_titles():
+        return None
+    return sheets_connection().worksheet(title)
+
+
+def _partition_ws_for_date(date_ddmmYYYY: str):
+    return _partition_ws(_partition_title_for_date(date_ddmmYYYY))
+
+
+def _load_archive_index(refresh: bool = False) -> dict[str, str]:
+    global _ARCHIVE_INDEX
+    if _ARCHIVE_INDEX is not None and not refresh:
+        return _ARCHIVE_INDEX
+
+    index: dict[str, str] = {}
+    if ARCHIVE_INDEX_SHEET_NAME in _worksheet_titles(refresh=refresh):
+        values = _gs(sheets_connection().worksheet(ARCHIVE_INDEX_SHEET_NAME).get_all_values)
+        for row in values[1:]:
+            if len(row) >= 2 and row[0].strip():
+                index[row[0].strip()] = row[1].strip()
+    _ARCHIVE_INDEX = index
+    return index
 
 
-def update_meeting_by_event_id(event_id: str, updates: dict) -> bool:
+def _partition_ws_for_event(event_id: str):
+    target = (event_id or "").strip()
+    title = _load_archive_index().get(target)
+    if title is None:
+        # индекс мог пополниться архивацией из другого процесса
+        title = _load_archive_index(refresh=True).get(target)
+    return _partition_ws(title)
+
+
+def _ensure_sheet_with_headers(title: str, headers: list[str], rows: int = 100):
+    conn = sheets_connection()
+    if title in _worksheet_titles():
+        return conn.worksheet(title)
+    ws = conn.add_worksheet(title, rows=max(rows, 2), cols=len(headers))
+    _gs_once(ws.append_row, headers, value_input_option="USER_ENTERED")
+    _HEADERS_CACHE[title] = list(headers)
+    return ws
+
+
+def _row_ranges(row_nums: list[int]) -> list[tuple[int, int]]:
     """
-    Обновляет строку в Meetings по event_id (на месте).
-    updates: {"time": "...", "client": "...", "comment": "...", ...}
-    Возвращает True если обновили.
+    [2, 3, 4, 7, 9, 10] -> [(2, 4), (7, 7), (9, 10)] — непрерывные диапазоны строк.
+    """
+    ranges: list[tuple[int, int]] = []
+    for n in sorted(row_nums):
+        if ranges and n == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], n)
+        else:
+            ranges.append((n, n))
+    return ranges
+
+
+def _rows_not_in_partition(part_ws, rows: list[list[str]], idx_event: int) -> list[list[str]]:
+    """
+    Строки, которых ещё нет в архивном листе: по event_id, а без event_id — по всей строке.
+    """
+    values = _gs(part_ws.get_all_values)
+    if len(values) < 2:
+        return rows
+
+    width = len(values[0])
+    part_idx_event = _col_index(values[0], "event_id")
+
+    def _event(row: list[str], idx: int | None) -> str:
+        return (row[idx] if idx is not None and len(row) > idx else "").strip()
+
+    def _key(row: list[str]) -> tuple[str, ...]:
+        return tuple((row[i] if i < len(row) else "").strip() for i in range(width))
+
+    present_ids = {_event(r, part_idx_event) for r in values[1:]} - {""}
+    present_rows = {_key(r) for r in values[1:]}
+
+    out: list[list[str]] = []
+    for row in rows:
+        event_id = _event(row, idx_event)
+        if event_id:
+            if event_id in present_ids:
+                continue
+        elif _key(row) in present_rows:
+            continue
+        out.append(row)
+    return out
+
+
+def archive_meetings_before(cutoff, *, dry_run: bool = False) -> dict[str, int]:
+    """
+    Переносит строки Meetings с датой < cutoff (date) в помесячные листы Meetings_YYYY_MM.
+
+    Порядок безопасен к сбоям: сначала копии (append_rows на месяц) и индекс event_id -> лист,
+    потом одно batch_update с удалением строк из «горячего» листа (снизу вверх).
+    Если удаление не прошло, строка просто есть в двух местах — поиск берёт «горячую».
+    Повторный запуск не дублирует: строки, которые уже есть в листе месяца (по event_id,
+    без event_id — по совпадению всей строки), и event_id, уже записанные в индекс, пропускаются —
+    остаётся только удалить строки из «горячего» листа.
+
+    Возвращает {название листа: перенесено строк}.
     """
     ws = ensure_meetings_sheet()
-    values = ws.get_all_values()
+    values = _gs(ws.get_all_values)
     if not values or len(values) < 2:
-        return False
+        return {}
 
     headers = values[0]
     headers_norm = [_norm(h) for h in headers]
+    idx_date = headers_norm.index("date")
+    idx_event = headers_norm.index("event_id")
 
-    try:
-        idx_event = headers_norm.index("event_id")
-    except ValueError:
-        return False
+    by_partition: dict[str, list[list[str]]] = {}
+    row_nums: list[int] = []
+    index_rows: list[list[str]] = []
+
+    for row_num, row in enumerate(values[1:], start=2):
+        date_s = (row[idx_date] if len(row) > idx_date else "").strip()
+        try:
+            d = datetime.strptime(date_s, "%d.%m.%Y").date()
+        except ValueError:
+            continue
+        if d >= cutoff:
+            continue
+
+        title = partition_title(d.year, d.month)
+        by_partition.setdefault(title, []).append(row)
+        row_nums.append(row_num)
+        event_id = (row[idx_event] if len(row) > idx_event else "").strip()
+        if event_id:
+            index_rows.append([event_id, title])
+
+    summary = {title: len(rows) for title, rows in sorted(by_partition.items())}
+    if dry_run or not row_nums:
+        return summary
+
+    # 1) копии по месяцам — один append_rows на месяц; уже скопированное прошлым (упавшим) запуском пропускаем
+    existing_titles = _worksheet_titles(refresh=True)
+    for title, rows in sorted(by_partition.items()):
+        if title in existing_titles:
+            rows = _rows_not_in_partition(sheets_connection().worksheet(title), rows, idx_event)
+            if not rows:
+                continue
+        part = _ensure_sheet_with_headers(title, headers, rows=len(rows) + 1)
+        _gs_once(part.append_rows, rows, value_input_option="USER_ENTERED")
+
+    # 2) индекс event_id -> лист (без тех, что уже в индексе)
+    indexed = _load_archive_index(refresh=True)
+    index_rows = [r for r in index_rows if r[0] not in indexed]
+    if index_rows:
+        idx_ws = _ensure_sheet_with_headers(ARCHIVE_INDEX_SHEET_NAME, ARCHIVE_INDEX_HEADERS)
+        _gs_once(idx_ws.append_rows, index_rows, value_input_option="RAW")
+        if _ARCHIVE_INDEX is not None:
+            _ARCHIVE_INDEX.update({e: t for e, t in index_rows})
+
+    # 3) удаление из горячего листа одним запросом; снизу вверх, чтобы индексы не съезжали
+    requests = [
+        {
+            "deleteDimension": {
+                "range": {
+                    "sheetId": ws.id,
+                    "dimension": "ROWS",
+                    "startIndex": start - 1,  # 0-based, включительно
+                    "endIndex": end,          # 0-based, не включительно
+                }
+            }
+        }
+        for start, end in reversed(_row_ranges(row_nums))
+    ]
+    _gs_once(_get_sheet().batch_update, {"requests": requests})
+
+    return summary
 
-    target_row = None
-    for i, row in enumerate(values[1:], start=2):  # 1-based для gspread, header = 1
-        if len(row) > idx_event and (row[idx_event] or "").strip() == (event_id or "").strip():
-            target_row = i
-            break
 
-    if not target_row:
+def _update_pending_meeting(event_id: str, updates: dict) -> bool:
+    """
+    Если строка ещё в write-behind буфере — правим её там (в таблицу уйдёт уже новая версия).
+    """
+    if _WRITE_BUFFER is None:
         return False
 
-    for k, v in updates.items():
-        kn = _norm(k)
-        if kn not in headers_norm:
+    headers_norm = [_norm(h) for h in MEETINGS_HEADERS]
+    idx_event = headers_norm.index("event_id")
+    target = (event_id or "").strip()
+
+    def _match(row: list[str]) -> bool:
+        return len(row) > idx_event and (row[idx_event] or "").strip() == target
+
+    def _apply(row: list[str]) -> list[str]:
+        row = row + [""] * (len(MEETINGS_HEADERS) - len(row))
+        for k, v in updates.items():
+            kn = _norm(k)
+            if kn in headers_norm:
+                row[headers_norm.index(kn)] = str(v)
+        return row
+
+    return _WRITE_BUFFER.update_pending(_match, _apply)
+
+
+# ----------------------------
+# Reconciliation (Calendar ↔ Sheet)
+# ----------------------------
+
+def iter_meeting_rows_between(start_day, end_day):
+    """
+    Строки Meetings с датой в [start_day, end_day] (date, включительно), вместе с архивными
+    листами тех же месяцев: (название листа, номер строки 1-based, заголовки, dict).
+    Каждый лист читается одним get_all_values.
+    """
+    titles = [MEETINGS_SHEET_NAME]
+    y, m = start_day.year, start_day.month
+    while (y, m) <= (end_day.year, end_day.month):
+        title = partition_title(y, m)
+        if title in _worksheet_titles():
+            titles.append(title)
+        m += 1
+        if m > 12:
+            y, m = y + 1, 1
+
+    for title in titles:
+        ws = ensure_meetings_sheet() if title == MEETINGS_SHEET_NAME else sheets_connection().worksheet(title)
+        values = _gs(ws.get_all_values)
+        if not values or len(values) < 2:
             continue
-        col_idx = headers_norm.index(kn) + 1
-        ws.update_cell(target_row, col_idx, str(v))
+        headers = values[0]
+        idx_date = _col_index(headers, "date")
+        if idx_date is None:
+            continue
+        for row_num, row in enumerate(values[1:], start=2):
+            try:
+                d = datetime.strptime((row[idx_date] if len(row) > idx_date else "").strip(), "%d.%m.%Y").date()
+            except ValueError:
+                continue
+            if start_day <= d <= end_day:
+                yield title, row_num, headers, _row_to_dict(headers, row)
 
-    return True
+
+def write_meeting_cells(changes: list[tuple[str, dict, dict]]) -> tuple[int, list[str]]:
+    """
+    Правки многих строк (в том числе в разных листах) одним values_batch_update.
+    changes: [(название листа, строка как её прочитали, {колонка: значение}), ...].
+
+    Между чтением и записью строки могут сдвинуться (архивация удаляет строки), а бот может
+    поправить встречу: перед записью строки ищутся заново по event_id, строка с другой version
+    пропускается. Окно между проверкой и записью — один запрос.
+    Возвращает (число записанных ячеек, event_id пропущенных строк).
+    """
+    by_title: dict[str, list[tuple[dict, dict]]] = {}
+    for title, item, updates in changes:
+        by_title.setdefault(title, []).append((item, updates))
+
+    now = _now_str()
+    data = []
+    skipped = []
+    for title, group in by_title.items():
+        ws = ensure_meetings_sheet() if title == MEETINGS_SHEET_NAME else sheets_connection().worksheet(title)
+        headers = _gs(ws.row_values, 1)
+        headers_norm = [_norm(h) for h in headers]
+        idx_event = _col_index(headers, "event_id")
+        if idx_event is None:
+            skipped.extend((item.get("event_id") or "").strip() for item, _ in group)
+            continue
+
+        # event_id -> номера строк сейчас; сами строки — ради текущей version
+        rows_by_event: dict[str, list[int]] = {}
+        for row_num, v in enumerate(_gs(ws.col_values, idx_event + 1)[1:], start=2):
+            rows_by_event.setdefault((v or "").strip(), []).append(row_num)
+        wanted = sorted({n for item, _ in group for n in rows_by_event.get((item.get("event_id") or "").strip(), [])})
+        current = dict(zip(wanted, _read_rows(ws, headers, wanted)))
+
+        used: set[int] = set()
+        for item, updates in group:
+            event_id = (item.get("event_id") or "").strip()
+            version = (item.get("version") or "").strip()
+            row_num = next(
+                (
+                    n for n in rows_by_event.get(event_id, [])
+                    if n not in used and (current[n].get("version") or "").strip() == version
+                ),
+                None,
+            )
+            if row_num is None:
+                skipped.append(event_id)
+                continue
+            used.add(row_num)
+
+            updates = {**updates, "updated_at": now, "version": new_version()}
+            for k, v in updates.items():
+                kn = _norm(k)
+                if kn not in headers_norm:
+                    continue
+                cell = f"{_col_letters(headers_norm.index(kn) + 1)}{row_num}"
+                data.append({"range": f"'{title}'!{cell}", "values": [[str(v)]]})
+
+    if data:
+        _gs(_get_sheet().values_batch_update, {"valueInputOption": "USER_ENTERED", "data": data})
+    return len(data), skipped
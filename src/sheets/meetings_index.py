@@ -0,0 +1,229 @@
+# src/sheets/meetings_index.py
+"""
+In-memory индекс встреч, отсортированный по началу (start_iso).
+
+- between(start, end) — бинарный поиск по отсортированному списку ключей: O(log n + k);
+- per-manager списки тех же ключей (по telegram_id, имени и @username);
+- инвертированный индекс слов клиента, комментария и менеджера для поиска (/find):
+  слово -> event_id, плюс отсортированный словарь слов для поиска по началу слова;
+- upsert/remove — инкрементально, без перестройки.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Iterable, Optional
+
+import pytz
+
+from src.config import TZ
+
+Key = tuple  # (start_dt, event_id)
+
+
+def parse_start(item: dict) -> Optional[datetime]:
+    """
+    start_iso строки Meetings -> aware datetime (naive считаем локальным TZ).
+    Если start_iso пуст — собираем из date + time.
+    """
+    tz = pytz.timezone(TZ)
+    raw = (item.get("start_iso") or "").strip()
+    dt = None
+    if raw:
+        try:
+            dt = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+        except ValueError:
+            dt = None
+    if dt is None:
+        try:
+            dt = datetime.strptime(
+                f"{(item.get('date') or '').strip()} {(item.get('time') or '00:00').strip()}",
+                "%d.%m.%Y %H:%M",
+            )
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = tz.localize(dt)
+    return dt.astimezone(tz)
+
+
+def manager_keys(item: dict) -> set[str]:
+    """
+    Алиасы менеджера строки: telegram_id, имя и username (в нижнем регистре, без @).
+    """
+    keys = set()
+    tid = (item.get("manager_telegram_id") or "").strip()
+    if tid and tid != "0":
+        keys.add(tid)
+    name = (item.get("manager_name") or "").strip().lower()
+    if name:
+        keys.add(name)
+    username = (item.get("manager_username") or "").strip().lstrip("@").lower()
+    if username:
+        keys.add(username)
+    return keys
+
+
+def normalize_manager(manager) -> str:
+    return str(manager).strip().lstrip("@").lower()
+
+
+# -------------------- Search --------------------
+SEARCH_FIELDS = ("client", "comment", "manager_name", "manager_username")
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def search_tokens(text: str) -> set[str]:
+    """
+    Слова для поиска: NFKC, без регистра, «ё» = «е»; @username и пунктуация отбрасываются.
+    """
+    norm = unicodedata.normalize("NFKC", text or "").casefold().replace("ё", "е")
+    return set(_WORD_RE.findall(norm))
+
+
+def item_tokens(item: dict) -> set[str]:
+    tokens: set[str] = set()
+    for field in SEARCH_FIELDS:
+        tokens |= search_tokens(item.get(field) or "")
+    return tokens
+
+
+class MeetingsIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys: list[Key] = []
+        self._by_manager: dict[str, list[Key]] = {}
+        self._items: dict[str, dict] = {}
+        self._item_key: dict[str, Key] = {}
+        # поиск: слово -> event_id и отсортированный список слов (для поиска по префиксу)
+        self._postings: dict[str, set[str]] = {}
+        self._vocab: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def load(self, items: Iterable[dict]) -> None:
+        with self._lock:
+            for item in items:
+                self.upsert(item)
+
+    def get(self, event_id: str) -> Optional[dict]:
+        with self._lock:
+            item = self._items.get((event_id or "").strip())
+            return dict(item) if item else None
+
+    def upsert(self, item: dict) -> None:
+        event_id = (item.get("event_id") or "").strip()
+        if not event_id:
+            return
+        start = parse_start(item)
+        if start is None:
+            return
+
+        with self._lock:
+            self.remove(event_id)
+            key = (start, event_id)
+            insort(self._keys, key)
+            for mk in manager_keys(item):
+                insort(self._by_manager.setdefault(mk, []), key)
+            self._items[event_id] = dict(item)
+            self._item_key[event_id] = key
+            for token in item_tokens(item):
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = set()
+                    insort(self._vocab, token)
+                postings.add(event_id)
+
+    def update(self, event_id: str, updates: dict) -> None:
+        with self._lock:
+            item = self._items.get((event_id or "").strip())
+            if item is None:
+                return
+            merged = dict(item)
+            merged.update({k: str(v) for k, v in updates.items()})
+            self.upsert(merged)
+
+    def remove(self, event_id: str) -> None:
+        event_id = (event_id or "").strip()
+        with self._lock:
+            key = self._item_key.pop(event_id, None)
+            item = self._items.pop(event_id, None)
+            if key is None:
+                return
+            _remove_key(self._keys, key)
+            for token in item_tokens(item or {}):
+                postings = self._postings.get(token)
+                if postings is not None:
+                    postings.discard(event_id)
+                    if not postings:
+                        del self._postings[token]
+                        i = bisect_left(self._vocab, token)
+                        if i < len(self._vocab) and self._vocab[i] == token:
+                            del self._vocab[i]
+            for mk in manager_keys(item or {}):
+                lst = self._by_manager.get(mk)
+                if lst is not None:
+                    _remove_key(lst, key)
+                    if not lst:
+                        del self._by_manager[mk]
+
+    def between(self, start: datetime, end: datetime, manager=None) -> list[dict]:
+        """
+        Встречи с началом в [start, end), по возрастанию времени.
+        manager — telegram_id, имя или @username (None — все).
+        """
+        with self._lock:
+            if manager is None:
+                keys = self._keys
+            else:
+                keys = self._by_manager.get(normalize_manager(manager), [])
+            lo = bisect_left(keys, (start, ""))
+            hi = bisect_left(keys, (end, ""))
+            return [dict(self._items[eid]) for _, eid in keys[lo:hi]]
+
+    def _prefix_matches(self, prefix: str) -> set[str]:
+        # все event_id со словом, начинающимся с prefix: диапазон в отсортированном словаре
+        lo = bisect_left(self._vocab, prefix)
+        hi = bisect_left(self._vocab, prefix + "\U0010ffff")
+        found: set[str] = set()
+        for token in self._vocab[lo:hi]:
+            found |= self._postings[token]
+        return found
+
+    def search(self, query: str, *, now: datetime | None = None) -> list[dict]:
+        """
+        Встречи, где каждое слово запроса — начало какого-то слова в клиенте, комментарии или
+        менеджере. Отменённые не показываются. Порядок: предстоящие от ближайшей, затем прошедшие
+        от последней.
+        """
+        tokens = sorted(search_tokens(query), key=len, reverse=True)
+        if not tokens:
+            return []
+        with self._lock:
+            found: set[str] | None = None
+            for token in tokens:
+                matches = self._prefix_matches(token)
+                found = matches if found is None else found & matches
+                if not found:
+                    return []
+            # self._keys уже отсортирован по началу: делим по «сейчас» и фильтруем, без сортировки
+            now = now or datetime.now(pytz.timezone(TZ))
+            split = bisect_left(self._keys, (now, ""))
+            upcoming = [eid for _, eid in self._keys[split:] if eid in found]
+            past = [eid for _, eid in reversed(self._keys[:split]) if eid in found]
+            return [
+                dict(self._items[eid])
+                for eid in upcoming + past
+                if (self._items[eid].get("status") or "") != "canceled"
+            ]
+
+
+def _remove_key(keys: list[Key], key: Key) -> None:
+    i = bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        del keys[i]
@@ -0,0 +1,330 @@
+# src/sheets/meetings_stats.py
+"""
+Агрегаты для /stats и scripts/stats.py: число встреч по менеджеру, ISO-неделе и статусу.
+
+- на встречу хранится только (менеджер, неделя, статус), счётчики — неделя -> менеджер -> статус;
+- append/update в managers_repo правят счётчики инкрементально (add_meetings_listener):
+  старый вклад встречи вычитается, новый прибавляется — O(1) на запись;
+- запрос за N недель — N обращений к словарю, история не перечитывается;
+- состояние лежит в STATS_STATE_PATH и переживает перезапуск; сохраняется не чаще
+  раза в STATS_SAVE_INTERVAL секунд и при выходе;
+- полная перестройка (все листы, включая архивные) — только по запросу: rebuild();
+  записи, пришедшие во время перестройки, применяются поверх неё;
+- файл состояния, записанный другим процессом (scripts/stats.py --rebuild), подхватывается
+  при следующем запросе или сохранении: берётся с диска, сверху — свои записи с прошлого сохранения.
+
+Серия повторяющихся встреч считается одной встречей на неделе первой даты.
+Правки мимо бота (руками в таблице, scripts/reconcile.py) попадут в агрегаты после rebuild().
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+from src.config import STATS_STATE_PATH, STATS_SAVE_INTERVAL
+from src.sheets import managers_repo
+from src.sheets.meetings_index import parse_start
+from src.utils.dt import tz_now
+
+STATE_VERSION = 1
+CANCELED = "canceled"
+
+Entry = tuple  # (менеджер, неделя "2026-W43", статус)
+
+
+def week_key(d: date) -> str:
+    year, week, _ = d.isocalendar()
+    return f"{year:04d}-W{week:02d}"
+
+
+def week_monday(key: str) -> date:
+    year, week = key.split("-W")
+    return date.fromisocalendar(int(year), int(week), 1)
+
+
+def last_weeks(n: int, *, today: date | None = None) -> list[str]:
+    """
+    Ключи n последних недель, по возрастанию; последняя — текущая.
+    """
+    today = today or tz_now().date()
+    return [week_key(today - timedelta(weeks=i)) for i in range(max(1, n) - 1, -1, -1)]
+
+
+def manager_label(item: dict) -> str:
+    name = (item.get("manager_name") or "").strip()
+    if name:
+        return name
+    username = (item.get("manager_username") or "").strip().lstrip("@")
+    if username:
+        return f"@{username}"
+    tid = (item.get("manager_telegram_id") or "").strip()
+    return tid if tid and tid != "0" else "—"
+
+
+def _entry(item: dict) -> Entry | None:
+    start = parse_start(item)
+    if start is None:
+        return None
+    status = (item.get("status") or "").strip() or "created"
+    return manager_label(item), week_key(start.date()), status
+
+
+class MeetingsStats:
+    def __init__(self, state_path: str, save_interval: float):
+        self._path = state_path
+        self._save_interval = save_interval
+        self._lock = threading.Lock()
+        self._entries: dict[str, Entry] = {}  # event_id -> вклад встречи в счётчики
+        self._counts: dict[str, dict[str, dict[str, int]]] = {}  # неделя -> менеджер -> статус -> n
+        self._built_at: str | None = None
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        # записи с прошлого сохранения: ("rows", items) / ("update", event_id, updates) —
+        # применяются повторно поверх перестройки или файла другого процесса
+        self._journal: list[tuple] = []
+        self._rebuilding = False
+        self._rebuild_lock = threading.Lock()
+        self._file_stamp: int | None = None  # st_mtime_ns файла, который мы читали/писали
+        self._load()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def built_at(self) -> str | None:
+        return self._built_at
+
+    # -------------------- counters --------------------
+    def _bump(self, entry: Entry, delta: int) -> None:
+        manager, week, status = entry
+        by_manager = self._counts.setdefault(week, {})
+        by_status = by_manager.setdefault(manager, {})
+        n = by_status.get(status, 0) + delta
+        if n > 0:
+            by_status[status] = n
+            return
+        by_status.pop(status, None)
+        if not by_status:
+            del by_manager[manager]
+            if not by_manager:
+                del self._counts[week]
+
+    def _put(self, event_id: str, entry: Entry | None) -> None:
+        old = self._entries.pop(event_id, None)
+        if old is not None:
+            self._bump(old, -1)
+        if entry is not None:
+            self._entries[event_id] = entry
+            self._bump(entry, 1)
+        if old != entry:
+            self._dirty = True
+
+    def _apply_rows(self, items: list[dict]) -> None:
+        for item in items:
+            event_id = (item.get("event_id") or "").strip()
+            if event_id:
+                self._put(event_id, _entry(item))
+
+    def _apply_update(self, event_id: str, updates: dict) -> None:
+        old = self._entries.get(event_id)
+        if old is None:
+            return
+        manager, week, status = old
+        if any(k in updates for k in ("manager_name", "manager_username", "manager_telegram_id")):
+            manager = manager_label(updates)
+        if any(k in updates for k in ("start_iso", "date")):
+            start = parse_start(updates)
+            if start is not None:
+                week = week_key(start.date())
+        if "status" in updates:
+            status = str(updates["status"]).strip() or "created"
+        self._put(event_id, (manager, week, status))
+
+    def _replay(self, ops: list[tuple]) -> None:
+        for op in ops:
+            if op[0] == "rows":
+                self._apply_rows(op[1])
+            else:
+                self._apply_update(op[1], op[2])
+
+    def _log(self, op: tuple) -> None:
+        # до первой сборки состояние всё равно заменит rebuild(): копить журнал незачем
+        if self._built_at is not None or self._rebuilding:
+            self._journal.append(op)
+
+    def add_rows(self, items: list[dict]) -> None:
+        items = [dict(item) for item in items]
+        with self._lock:
+            self._apply_rows(items)
+            self._log(("rows", items))
+        self._maybe_save()
+
+    def update(self, event_id: str, updates: dict) -> None:
+        """
+        Правка полей встречи: пересчитываются только затронутые части (менеджер, неделя, статус).
+        """
+        event_id = (event_id or "").strip()
+        updates = dict(updates)
+        with self._lock:
+            self._apply_update(event_id, updates)
+            self._log(("update", event_id, updates))
+        self._maybe_save()
+
+    # -------------------- queries --------------------
+    def summary(self, weeks: list[str]) -> list[dict]:
+        """
+        По менеджерам за недели weeks: {"manager", "total", "canceled", "by_week": {неделя: без отменённых}}.
+        Сортировка — по числу встреч (без отменённых), больше — выше.
+        """
+        out: dict[str, dict] = {}
+        with self._lock:
+            self._reload_if_changed()
+            for week in weeks:
+                for manager, by_status in self._counts.get(week, {}).items():
+                    row = out.setdefault(manager, {"manager": manager, "total": 0, "canceled": 0, "by_week": {}})
+                    total = sum(by_status.values())
+                    canceled = by_status.get(CANCELED, 0)
+                    row["total"] += total
+                    row["canceled"] += canceled
+                    row["by_week"][week] = total - canceled
+        return sorted(out.values(), key=lambda r: (-(r["total"] - r["canceled"]), r["manager"].lower()))
+
+    def status_totals(self, weeks: list[str]) -> dict[str, int]:
+        totals: dict[str, int] = {}
+        with self._lock:
+            self._reload_if_changed()
+            for week in weeks:
+                for by_status in self._counts.get(week, {}).values():
+                    for status, n in by_status.items():
+                        totals[status] = totals.get(status, 0) + n
+        return totals
+
+    # -------------------- rebuild --------------------
+    def rebuild(self) -> int:
+        """
+        Полный пересчёт по всем листам Meetings (включая архив). Возвращает число встреч.
+        Листы читаются без блокировки; записи, пришедшие за это время, применяются после подмены.
+        """
+        with self._rebuild_lock:
+            with self._lock:
+                self._rebuilding = True
+                mark = len(self._journal)
+            try:
+                entries: dict[str, Entry] = {}
+                for item in managers_repo.iter_meetings_history():
+                    event_id = (item.get("event_id") or "").strip()
+                    entry = _entry(item) if event_id else None
+                    if entry is not None:
+                        entries[event_id] = entry
+
+                with self._lock:
+                    self._entries = {}
+                    self._counts = {}
+                    for event_id, entry in entries.items():
+                        self._put(event_id, entry)
+                    self._replay(self._journal[mark:])
+                    self._built_at = tz_now().isoformat(timespec="seconds")
+                    self._save()
+            finally:
+                with self._lock:
+                    self._rebuilding = False
+        return len(entries)
+
+    def ensure_built(self) -> None:
+        if self._built_at is None:
+            self.rebuild()
+
+    # -------------------- state --------------------
+    def _stamp(self) -> int | None:
+        try:
+            return os.stat(self._path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self) -> bool:
+        stamp = self._stamp()
+        if stamp is None:
+            return False
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print("Stats: broken state file, will rebuild:", repr(e))
+            return False
+        self._file_stamp = stamp
+        if state.get("version") != STATE_VERSION:
+            return False
+        self._entries = {}
+        self._counts = {}
+        for event_id, entry in (state.get("entries") or {}).items():
+            self._put(event_id, tuple(entry))
+        self._built_at = state.get("built_at")
+        self._dirty = False
+        return True
+
+    def _reload_if_changed(self) -> None:
+        # файл переписал другой процесс (scripts/stats.py --rebuild): берём его, сверху — свои записи
+        if self._rebuilding or self._stamp() in (None, self._file_stamp):
+            return
+        if self._load():
+            print("Stats: state file changed on disk, reloaded")
+            self._replay(self._journal)
+            self._dirty = bool(self._journal)
+
+    def _save(self) -> None:
+        d = os.path.dirname(self._path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        state = {"version": STATE_VERSION, "built_at": self._built_at, "entries": self._entries}
+        tmp = self._path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self._path)
+        self._file_stamp = self._stamp()
+        self._journal = []
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def _maybe_save(self) -> None:
+        with self._lock:
+            # во время перестройки журнал нужен ей — сохранит сама rebuild()
+            if self._rebuilding or time.monotonic() - self._saved_at < self._save_interval:
+                return
+            self._reload_if_changed()
+            if self._dirty and self._built_at is not None:
+                try:
+                    self._save()
+                except OSError as e:
+                    print("Stats: can't save state:", repr(e))
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._reload_if_changed()
+            if self._dirty and self._built_at is not None:
+                self._save()
+
+
+_STATS: MeetingsStats | None = None
+_STATS_LOCK = threading.Lock()
+
+
+def get_meetings_stats() -> MeetingsStats:
+    """
+    Singleton агрегатов: состояние с диска + подписка на записи managers_repo.
+    Вызывать при старте процесса, чтобы не пропустить записи до первого /stats.
+    """
+    global _STATS
+    with _STATS_LOCK:
+        if _STATS is None:
+            stats = MeetingsStats(STATS_STATE_PATH, STATS_SAVE_INTERVAL)
+            managers_repo.add_meetings_listener(stats.add_rows, stats.update)
+            atexit.register(stats.flush)
+            _STATS = stats
+    return _STATS
@@ -0,0 +1,204 @@
+# src/sheets/write_buffer.py
+"""
+Write-behind буфер для добавления строк в Google Sheets.
+
+- submit() сразу пишет строку в локальный spool (JSONL + fsync) и возвращается;
+- фоновый поток ждёт окно flush_window и отправляет всё накопленное одним flush_fn(rows);
+- при ошибке — повтор с экспоненциальной задержкой, строки остаются в spool;
+- если исход отправки неизвестен (таймаут, 5xx, восстановление spool после падения) —
+  перед повтором dedupe_fn отбрасывает строки, которые уже попали в таблицу;
+- при старте строки из spool (после падения) отправляются заново;
+- flush() — синхронный сброс для завершения процесса.
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+import threading
+import time
+from typing import Callable, List, Optional
+
+from src.utils.retry import is_rejected
+
+Row = List[str]
+
+
+class MeetingsWriteBuffer:
+    def __init__(
+        self,
+        flush_fn: Callable[[List[Row]], None],
+        spool_path: str,
+        *,
+        flush_window: float = 2.0,
+        max_backoff: float = 300.0,
+        dedupe_fn: Optional[Callable[[List[Row]], List[Row]]] = None,
+    ):
+        self._flush_fn = flush_fn
+        self._dedupe_fn = dedupe_fn
+        self._spool_path = spool_path
+        self._flush_window = max(0.0, flush_window)
+        self._max_backoff = max_backoff
+
+        self._cond = threading.Condition()
+        self._pending: List[Row] = self._load_spool()
+        self._flushing = False
+        self._failures = 0
+        self._closed = False
+        # строки из spool могли уйти в таблицу прямо перед падением
+        self._uncertain = bool(self._pending)
+
+        self._thread = threading.Thread(target=self._run, name="sheets-write-buffer", daemon=True)
+        self._thread.start()
+
+    # -------------------- spool --------------------
+    def _load_spool(self) -> List[Row]:
+        if not os.path.exists(self._spool_path):
+            return []
+        rows = []
+        with open(self._spool_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    # обрезанная последняя строка после падения — пропускаем
+                    print("Spool: skip broken line:", line[:80])
+        if rows:
+            print(f"Spool: recovered {len(rows)} unsent row(s) from {self._spool_path}")
+        return rows
+
+    def _append_spool(self, rows: List[Row]) -> None:
+        d = os.path.dirname(self._spool_path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        with open(self._spool_path, "a", encoding="utf-8") as f:
+            for r in rows:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _rewrite_spool(self) -> None:
+        # атомарно: пишем во временный файл и подменяем
+        tmp = self._spool_path + ".tmp"
+        d = os.path.dirname(self._spool_path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            for r in self._pending:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._spool_path)
+
+    # -------------------- public API --------------------
+    def submit(self, rows: List[Row]) -> None:
+        """
+        Ставит строки в очередь. Возвращается после записи в spool (данные уже не потеряются).
+        """
+        if not rows:
+            return
+        rows = [[str(x) for x in r] for r in rows]
+        with self._cond:
+            self._append_spool(rows)
+            self._pending.extend(rows)
+            self._cond.notify_all()
+
+    def pending_rows(self) -> List[Row]:
+        with self._cond:
+            return [list(r) for r in self._pending]
+
+    def update_pending(self, match: Callable[[Row], bool], apply: Callable[[Row], Row]) -> bool:
+        """
+        Обновляет ещё не отправленную строку на месте.
+        Если строка сейчас отправляется — ждём окончания отправки и возвращаем False
+        (тогда вызывающий обновляет её уже в таблице).
+        """
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            for i, row in enumerate(self._pending):
+                if match(row):
+                    self._pending[i] = [str(x) for x in apply(list(row))]
+                    self._rewrite_spool()
+                    return True
+        return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Синхронно отправляет всё накопленное (для shutdown).
+        True — буфер пуст; False — не успели/ошибка (строки остались в spool).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._flushing:
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    return False
+                self._cond.wait(left)
+        return self._flush_once()
+
+    def close(self, timeout: Optional[float] = 10.0) -> bool:
+        ok = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        return ok
+
+    # -------------------- worker --------------------
+    def _flush_once(self) -> bool:
+        with self._cond:
+            if self._flushing:
+                return False
+            if not self._pending:
+                return True
+            batch = [list(r) for r in self._pending]
+            uncertain = self._uncertain
+            self._flushing = True
+
+        try:
+            send = batch
+            if uncertain and self._dedupe_fn is not None:
+                send = self._dedupe_fn(batch)
+                if len(send) < len(batch):
+                    print(f"Sheets flush: {len(batch) - len(send)} row(s) already in sheet, skipped")
+            if send:
+                self._flush_fn(send)
+        except Exception as e:
+            with self._cond:
+                self._flushing = False
+                self._failures += 1
+                # сервер мог успеть записать — перед следующей попыткой сверяемся с таблицей
+                self._uncertain = uncertain or not is_rejected(e)
+                self._cond.notify_all()
+            print(f"Sheets flush failed ({len(batch)} row(s), attempt {self._failures}):", repr(e))
+            return False
+
+        with self._cond:
+            del self._pending[: len(batch)]
+            self._rewrite_spool()
+            self._flushing = False
+            self._failures = 0
+            self._uncertain = False
+            self._cond.notify_all()
+            return not self._pending
+
+    def _backoff_delay(self) -> float:
+        base = min(self._max_backoff, 2 ** min(self._failures, 16))
+        return base / 2 + random.uniform(0, base / 2)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+
+            # окно накопления: всё, что придёт за это время, уйдёт одним запросом
+            time.sleep(self._flush_window)
+
+            if not self._flush_once() and self._failures:
+                time.sleep(self._backoff_delay())
@@ -0,0 +1,121 @@
+# src/storage/meetings_repository.py
+"""
+Единый интерфейс хранения встреч.
+
+- SheetsMeetingsRepository — прежнее поведение: всё читается/пишется в лист Meetings;
+- SqliteMeetingsRepository (src/storage/sqlite_repo.py) — основное хранилище на диске,
+  лист Meetings догоняется фоновым зеркалированием.
+
+Какая реализация используется — решает get_meetings_repository() по MEETINGS_DB_PATH.
+"""
+from __future__ import annotations
+
+import threading
+from abc import ABC, abstractmethod
+
+from src.config import MEETINGS_DB_PATH, SHEETS_MIRROR_INTERVAL
+from src.sheets import managers_repo
+from src.sheets.managers_repo import MeetingConflict  # noqa: F401 — часть интерфейса хранилища
+
+
+class MeetingsRepository(ABC):
+    @abstractmethod
+    def append_meeting(self, **fields) -> None:
+        """Добавить встречу (аргументы как у build_meeting_row())."""
+
+    @abstractmethod
+    def append_meetings(self, rows: list[dict]) -> int:
+        """Добавить несколько встреч разом. Возвращает количество."""
+
+    @abstractmethod
+    def get_meeting_by_event_id(self, event_id: str) -> dict | None:
+        """Встреча по event_id (dict: MEETINGS_HEADERS -> value) или None."""
+
+    @abstractmethod
+    def update_meeting_by_event_id(self, event_id: str, updates: dict, *, expected_version: str | None = None) -> bool:
+        """
+        Обновить поля встречи. True — если нашли и обновили.
+        expected_version — колонка version на момент чтения; если строку уже изменили — MeetingConflict.
+        """
+
+    @abstractmethod
+    def list_meetings_for_date(self, date_ddmmYYYY: str) -> list[dict]:
+        """Встречи на дату DD.MM.YYYY, отсортированные по времени."""
+
+    @abstractmethod
+    def list_meetings_between(self, start, end, manager=None) -> list[dict]:
+        """Встречи с началом в [start, end) (date или datetime), опционально одного менеджера."""
+
+    @abstractmethod
+    def search_meetings(self, query: str) -> list[dict]:
+        """Поиск по клиенту, комментарию и менеджеру: предстоящие от ближайшей, затем прошедшие."""
+
+    @abstractmethod
+    def iter_meetings(self, *, since: str = "", start_day=None, end_day=None):
+        """
+        Потоково (пачками, без полной выгрузки в память): (курсор, встреча) для встреч с датой
+        в [start_day, end_day], изменённых после since. Курсор — строка, растёт со временем
+        правки; его максимум передают как since в следующий раз (граничные строки могут
+        прийти повторно).
+        """
+
+    def close(self) -> None:
+        """Остановить фоновую работу (зеркалирование) перед выходом."""
+
+
+class SheetsMeetingsRepository(MeetingsRepository):
+    """
+    Хранилище прямо в Google Sheets (модульные функции managers_repo).
+    """
+
+    def append_meeting(self, **fields) -> None:
+        managers_repo.append_meeting(**fields)
+
+    def append_meetings(self, rows: list[dict]) -> int:
+        return managers_repo.append_meetings(rows)
+
+    def get_meeting_by_event_id(self, event_id: str) -> dict | None:
+        return managers_repo.get_meeting_by_event_id(event_id)
+
+    def update_meeting_by_event_id(self, event_id: str, updates: dict, *, expected_version: str | None = None) -> bool:
+        return managers_repo.update_meeting_by_event_id(event_id, updates, expected_version=expected_version)
+
+    def list_meetings_for_date(self, date_ddmmYYYY: str) -> list[dict]:
+        return managers_repo.list_meetings_for_date(date_ddmmYYYY)
+
+    def list_meetings_between(self, start, end, manager=None) -> list[dict]:
+        return managers_repo.list_meetings_between(start, end, manager=manager)
+
+    def search_meetings(self, query: str) -> list[dict]:
+        return managers_repo.search_meetings(query)
+
+    def iter_meetings(self, *, since: str = "", start_day=None, end_day=None):
+        # курсор — updated_at строки (строки до появления колонки — created_at)
+        for item in managers_repo.iter_meetings_chunked(start_day, end_day):
+            cursor = (item.get("updated_at") or "").strip() or (item.get("created_at") or "").strip()
+            if cursor >= since:
+                yield cursor, item
+
+
+_REPO: MeetingsRepository | None = None
+_REPO_LOCK = threading.Lock()
+
+
+def get_meetings_repository() -> MeetingsRepository:
+    """
+    Singleton-репозиторий для процесса.
+    MEETINGS_DB_PATH задан → SQLite + фоновое зеркало в Sheets, иначе — только Sheets.
+    """
+    global _REPO
+    with _REPO_LOCK:
+        if _REPO is None:
+            if MEETINGS_DB_PATH:
+                from src.storage.sqlite_repo import SqliteMeetingsRepository
+
+                repo = SqliteMeetingsRepository(MEETINGS_DB_PATH)
+                repo.bootstrap_from_sheet()
+                repo.start_mirror(SHEETS_MIRROR_INTERVAL)
+                _REPO = repo
+            else:
+                _REPO = SheetsMeetingsRepository()
+    return _REPO
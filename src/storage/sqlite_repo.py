@@ -0,0 +1,338 @@
+# src/storage/sqlite_repo.py
+"""
+SQLite-хранилище встреч (основное), лист Meetings — асинхронное зеркало для людей.
+
+Колонки таблицы meetings = MEETINGS_HEADERS + служебные:
+  updated_at  — когда строку меняли локально (UTC; в лист уходит по TZ в колонку updated_at);
+  sync_state  — 0: в таблице актуально, 1: новая (нужно append), 2: изменена (нужно update).
+Таблица meta — служебные отметки: bootstrapped_at ставится, когда история из таблицы
+(включая архивные листы) перенесена; до этого зеркало повторяет перенос.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytz
+
+from src.config import TZ
+from src.sheets import managers_repo
+from src.sheets.managers_repo import MEETINGS_HEADERS, MeetingConflict, build_meeting_row, as_local_dt, new_version
+from src.sheets.meetings_index import MeetingsIndex
+from src.storage.meetings_repository import MeetingsRepository
+
+SYNC_OK = 0
+SYNC_NEW = 1
+SYNC_DIRTY = 2
+
+# updated_at листа здесь — служебная колонка с тем же именем
+_COLUMNS = [c for c in MEETINGS_HEADERS if c != "updated_at"]
+
+EXPORT_CHUNK_ROWS = 1000
+# не удался перенос истории из таблицы — следующая попытка не раньше чем через столько секунд
+BOOTSTRAP_RETRY = 60.0
+
+
+def _sheet_time(value: str) -> str:
+    """
+    updated_at базы (UTC, ISO с микросекундами) -> формат created_at листа, по TZ.
+    """
+    try:
+        dt = datetime.strptime(value or "", "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return ""
+    return dt.astimezone(pytz.timezone(TZ)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class SqliteMeetingsRepository(MeetingsRepository):
+    def __init__(self, path: str):
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+
+        self._path = path
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+
+        self._index: MeetingsIndex | None = None
+        self._index_version = 0
+        self._bootstrap_retry_at = 0.0
+
+        self._mirror_thread: threading.Thread | None = None
+        self._mirror_stop = threading.Event()
+
+    # -------------------- schema --------------------
+    def _init_schema(self) -> None:
+        with self._lock, self._db:
+            cols = ", ".join(f'"{c}" TEXT NOT NULL DEFAULT \'\'' for c in _COLUMNS)
+            self._db.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS meetings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    {cols},
+                    updated_at TEXT NOT NULL DEFAULT '',
+                    sync_state INTEGER NOT NULL DEFAULT {SYNC_NEW}
+                )
+                """
+            )
+            # новые колонки MEETINGS_HEADERS (например recurrence) на существующей базе
+            existing = {r["name"] for r in self._db.execute("PRAGMA table_info(meetings)")}
+            for c in _COLUMNS:
+                if c not in existing:
+                    self._db.execute(f'ALTER TABLE meetings ADD COLUMN "{c}" TEXT NOT NULL DEFAULT \'\'')
+
+            # служебные отметки (bootstrapped_at — история из таблицы перенесена)
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_meetings_event_id ON meetings(event_id)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_meetings_date ON meetings(date, time)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_meetings_manager ON meetings(manager_telegram_id, start_iso)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_meetings_start ON meetings(start_iso)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_meetings_sync ON meetings(sync_state)")
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        item = {c: row[c] for c in _COLUMNS}
+        item["updated_at"] = _sheet_time(row["updated_at"])
+        return item
+
+    def _insert_rows(self, values: list[list[str]], sync_state: int) -> None:
+        """
+        values — строки в порядке MEETINGS_HEADERS (как build_meeting_row).
+        """
+        cols = ", ".join(f'"{c}"' for c in _COLUMNS)
+        marks = ", ".join("?" for _ in _COLUMNS)
+        now = self._now()
+        data = []
+        for v in values:
+            item = dict(zip(MEETINGS_HEADERS, v))
+            data.append([*(item.get(c) or "" for c in _COLUMNS), now, sync_state])
+        with self._lock, self._db:
+            self._db.executemany(
+                f"INSERT INTO meetings ({cols}, updated_at, sync_state) VALUES ({marks}, ?, ?)",
+                data,
+            )
+            if self._index is not None:
+                self._index.load(dict(zip(_COLUMNS, d)) for d in data)
+
+    # -------------------- MeetingsRepository --------------------
+    def append_meeting(self, **fields) -> None:
+        self._insert_rows([build_meeting_row(**fields)], SYNC_NEW)
+
+    def append_meetings(self, rows: list[dict]) -> int:
+        if not rows:
+            return 0
+        self._insert_rows([build_meeting_row(**r) for r in rows], SYNC_NEW)
+        return len(rows)
+
+    def get_meeting_by_event_id(self, event_id: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM meetings WHERE event_id = ? ORDER BY id LIMIT 1",
+                ((event_id or "").strip(),),
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def update_meeting_by_event_id(self, event_id: str, updates: dict, *, expected_version: str | None = None) -> bool:
+        fields = {k: str(v) for k, v in updates.items() if k in _COLUMNS}
+        if not fields:
+            return self.get_meeting_by_event_id(event_id) is not None
+        fields["version"] = fields.get("version") or new_version()
+
+        # compare-and-set: версия проверяется в том же UPDATE
+        where, args = "event_id = ?", [(event_id or "").strip()]
+        if expected_version is not None:
+            where += " AND version = ?"
+            args.append(expected_version)
+
+        sets = ", ".join(f'"{k}" = ?' for k in fields)
+        with self._lock, self._db:
+            cur = self._db.execute(
+                f"""
+                UPDATE meetings
+                SET {sets}, updated_at = ?,
+                    sync_state = CASE WHEN sync_state = {SYNC_NEW} THEN {SYNC_NEW} ELSE {SYNC_DIRTY} END
+                WHERE {where}
+                """,
+                [*fields.values(), self._now(), *args],
+            )
+            if cur.rowcount and self._index is not None:
+                self._index.update(event_id, fields)
+        if not cur.rowcount and expected_version is not None and self.get_meeting_by_event_id(event_id) is not None:
+            raise MeetingConflict(f"meeting {event_id} was changed concurrently")
+        return cur.rowcount > 0
+
+    def list_meetings_for_date(self, date_ddmmYYYY: str) -> list[dict]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM meetings WHERE date = ? ORDER BY time, id",
+                (date_ddmmYYYY,),
+            ).fetchall()
+        return [self._to_dict(r) for r in rows]
+
+    def _meetings_index(self) -> MeetingsIndex:
+        # строится из базы, дальше поддерживается на insert/update; data_version меняется только
+        # от записей других соединений (scripts/reconcile.py) — тогда индекс перестраивается
+        with self._lock:
+            data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+            if self._index is None or data_version != self._index_version:
+                idx = MeetingsIndex()
+                idx.load(self._to_dict(r) for r in self._db.execute("SELECT * FROM meetings ORDER BY id"))
+                self._index = idx
+                self._index_version = data_version
+        return self._index
+
+    def list_meetings_between(self, start, end, manager=None) -> list[dict]:
+        return self._meetings_index().between(as_local_dt(start), as_local_dt(end), manager=manager)
+
+    def search_meetings(self, query: str) -> list[dict]:
+        return self._meetings_index().search(query)
+
+    def iter_meetings(self, *, since: str = "", start_day=None, end_day=None):
+        """
+        Курсор — "updated_at|id" (пакетная вставка даёт многим строкам один updated_at,
+        id делает курсор строгим). Отдельное соединение только на чтение (WAL): выгрузка идёт
+        пачками по EXPORT_CHUNK_ROWS и не держит блокировку основного соединения.
+        """
+        since_at, _, since_id = (since or "").partition("|")
+        db = sqlite3.connect(f"file:{self._path}?mode=ro", uri=True)
+        db.row_factory = sqlite3.Row
+        try:
+            cur = db.execute(
+                """
+                SELECT * FROM meetings
+                WHERE updated_at > ? OR (updated_at = ? AND id > ?)
+                ORDER BY updated_at, id
+                """,
+                (since_at, since_at, int(since_id or 0)),
+            )
+            while True:
+                rows = cur.fetchmany(EXPORT_CHUNK_ROWS)
+                if not rows:
+                    break
+                for r in rows:
+                    if start_day is not None or end_day is not None:
+                        try:
+                            d = datetime.strptime((r["date"] or "").strip(), "%d.%m.%Y").date()
+                        except ValueError:
+                            continue
+                        if (start_day is not None and d < start_day) or (end_day is not None and d > end_day):
+                            continue
+                    yield f"{r['updated_at']}|{r['id']:012d}", self._to_dict(r)
+        finally:
+            db.close()
+
+    # -------------------- Sheets mirror --------------------
+    def _bootstrapped(self) -> bool:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'bootstrapped_at'").fetchone()
+        return row is not None
+
+    def bootstrap_from_sheet(self) -> int:
+        """
+        Перенос истории из таблицы: архивные листы Meetings_YYYY_MM, «горячий» лист и буфер
+        (iter_meetings_history). Успех отмечается в meta; до него зеркало повторяет попытку
+        на каждом проходе. Встречи, уже лежащие в базе (созданы ботом, пока импорт не удавался),
+        не трогаются. Возвращает число перенесённых встреч.
+        """
+        if self._bootstrapped() or time.monotonic() < self._bootstrap_retry_at:
+            return 0
+
+        try:
+            # строка, оставшаяся и в архиве, и в «горячем» листе, приходит дважды — берём позднюю
+            history: dict[str, dict] = {}
+            no_id: list[dict] = []
+            for it in managers_repo.iter_meetings_history():
+                event_id = (it.get("event_id") or "").strip()
+                if event_id:
+                    history[event_id] = it
+                else:
+                    no_id.append(it)
+        except Exception as e:
+            self._bootstrap_retry_at = time.monotonic() + BOOTSTRAP_RETRY
+            print(f"SQLite bootstrap from sheet failed, retry in {BOOTSTRAP_RETRY:.0f}s:", repr(e))
+            return 0
+
+        with self._lock:
+            known = {r[0] for r in self._db.execute("SELECT event_id FROM meetings")}
+            items = [it for e, it in history.items() if e not in known] + no_id
+            self._insert_rows([[it.get(c, "") for c in MEETINGS_HEADERS] for it in items], SYNC_OK)
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('bootstrapped_at', ?)", (self._now(),)
+                )
+        print(f"SQLite: imported {len(items)} meeting(s) from sheet")
+        return len(items)
+
+    def sync_to_sheet(self) -> int:
+        """
+        Один проход зеркалирования: новые строки — одним append (через write-behind буфер),
+        изменённые — update по event_id. Возвращает число синхронизированных строк.
+        """
+        with self._lock:
+            new_rows = self._db.execute(
+                "SELECT * FROM meetings WHERE sync_state = ? ORDER BY id", (SYNC_NEW,)
+            ).fetchall()
+            dirty_rows = self._db.execute(
+                "SELECT * FROM meetings WHERE sync_state = ? ORDER BY id", (SYNC_DIRTY,)
+            ).fetchall()
+
+        done = 0
+
+        if new_rows:
+            managers_repo.append_meeting_rows([[self._to_dict(r)[c] for c in MEETINGS_HEADERS] for r in new_rows])
+            self._mark_synced([r["id"] for r in new_rows], [r["updated_at"] for r in new_rows])
+            done += len(new_rows)
+
+        for r in dirty_rows:
+            item = self._to_dict(r)
+            managers_repo.update_meeting_by_event_id(item["event_id"], item)
+            self._mark_synced([r["id"]], [r["updated_at"]])
+            done += 1
+
+        return done
+
+    def _mark_synced(self, ids: list[int], versions: list[str]) -> None:
+        # если строку успели поменять во время синхронизации — она уже в таблице,
+        # но со старыми значениями: помечаем «изменённой», чтобы следующий проход сделал update
+        with self._lock, self._db:
+            self._db.executemany(
+                f"UPDATE meetings SET sync_state = CASE WHEN updated_at = ? THEN {SYNC_OK} ELSE {SYNC_DIRTY} END WHERE id = ?",
+                [(v, i) for i, v in zip(ids, versions)],
+            )
+
+    def start_mirror(self, interval: float) -> None:
+        if self._mirror_thread is not None:
+            return
+
+        def _loop():
+            while not self._mirror_stop.wait(interval):
+                try:
+                    self.bootstrap_from_sheet()
+                    self.sync_to_sheet()
+                except Exception as e:
+                    print("Sheets mirror error:", repr(e))
+
+        self._mirror_thread = threading.Thread(target=_loop, name="sheets-mirror", daemon=True)
+        self._mirror_thread.start()
+
+    def close(self) -> None:
+        self.stop_mirror()
+
+    def stop_mirror(self) -> None:
+        self._mirror_stop.set()
+        try:
+            self.sync_to_sheet()
+        except Exception as e:
+            print("Sheets mirror final sync failed:", repr(e))
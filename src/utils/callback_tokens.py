@@ -0,0 +1,122 @@
+# src/utils/callback_tokens.py
+"""
+Короткие токены для callback_data inline-кнопок (лимит Telegram — 64 байта).
+
+- кнопка несёт "t:<12 символов>", а payload (dict: action + параметры) лежит на сервере;
+- токен — хэш payload: одна и та же кнопка в разных сообщениях получает один токен,
+  повторная отрисовка клавиатуры ничего не пишет;
+- горячие токены — в памяти (TTL CALLBACK_TOKEN_TTL секунд, не больше MEMORY_MAX штук);
+- все токены — в SQLite (CALLBACK_TOKENS_PATH): кнопка работает после перезапуска бота
+  и после вытеснения из памяти; не нажимавшиеся CALLBACK_TOKEN_DAYS дней удаляются.
+
+Токены видит только процесс с тем же файлом: кнопки в отчётах из GitHub Actions
+по-прежнему несут данные прямо в callback_data.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from src.config import CALLBACK_TOKENS_PATH, CALLBACK_TOKEN_TTL, CALLBACK_TOKEN_DAYS
+
+TOKEN_PREFIX = "t:"
+TOKEN_LEN = 12  # 72 бита base64url — коллизии на практике исключены
+MEMORY_MAX = 5000
+
+
+def make_token(payload: dict) -> str:
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(hashlib.sha256(raw).digest()).decode("ascii")[:TOKEN_LEN]
+
+
+def is_token(data: str) -> bool:
+    return (data or "").startswith(TOKEN_PREFIX)
+
+
+class CallbackTokens:
+    def __init__(self, path: str, ttl: float, keep_days: float):
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, tuple[float, dict]] = OrderedDict()  # token -> (истекает, payload)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS tokens (token TEXT PRIMARY KEY, payload TEXT NOT NULL, used_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM tokens WHERE used_at < ?", (time.time() - keep_days * 86400,))
+
+    def _remember(self, token: str, payload: dict) -> None:
+        self._memory[token] = (time.monotonic() + self._ttl, payload)
+        self._memory.move_to_end(token)
+        while len(self._memory) > MEMORY_MAX:
+            self._memory.popitem(last=False)
+
+    def _fresh(self, token: str) -> dict | None:
+        hit = self._memory.get(token)
+        if hit is None:
+            return None
+        if hit[0] < time.monotonic():
+            del self._memory[token]
+            return None
+        return hit[1]
+
+    def put(self, payload: dict) -> str:
+        """
+        callback_data для payload: "t:<token>". В базу пишется, только если токена нет в памяти.
+        """
+        token = make_token(payload)
+        with self._lock:
+            if self._fresh(token) is None:
+                with self._db:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO tokens (token, payload, used_at) VALUES (?, ?, ?)",
+                        (token, json.dumps(payload, ensure_ascii=False), time.time()),
+                    )
+            self._remember(token, payload)
+        return TOKEN_PREFIX + token
+
+    def get(self, data: str) -> dict | None:
+        """
+        payload по callback_data "t:<token>"; None — токен неизвестен или давно удалён.
+        """
+        token = (data or "")[len(TOKEN_PREFIX):]
+        with self._lock:
+            payload = self._fresh(token)
+            if payload is not None:
+                return dict(payload)
+            row = self._db.execute("SELECT payload FROM tokens WHERE token = ?", (token,)).fetchone()
+            if row is None:
+                return None
+            payload = json.loads(row[0])
+            with self._db:
+                self._db.execute("UPDATE tokens SET used_at = ? WHERE token = ?", (time.time(), token))
+            self._remember(token, payload)
+            return dict(payload)
+
+
+_TOKENS: CallbackTokens | None = None
+_TOKENS_LOCK = threading.Lock()
+
+
+def callback_tokens() -> CallbackTokens:
+    global _TOKENS
+    with _TOKENS_LOCK:
+        if _TOKENS is None:
+            _TOKENS = CallbackTokens(CALLBACK_TOKENS_PATH, CALLBACK_TOKEN_TTL, CALLBACK_TOKEN_DAYS)
+    return _TOKENS
+
+
+def callback_token(action: str, **params) -> str:
+    """
+    callback_data кнопки: callback_token("edit", event_id=...) -> "t:Ab3...".
+    """
+    return callback_tokens().put({"action": action, **params})
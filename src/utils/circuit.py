@@ -0,0 +1,109 @@
+# src/utils/circuit.py
+"""
+Circuit breaker для внешних API.
+
+closed    — вызовы идут, считаем долю ошибок в окне последних `window` вызовов;
+open      — доля ошибок превысила порог: сразу CircuitOpenError, без ожидания таймаутов;
+half_open — через open_seconds пропускаем один пробный вызов: успех → closed, ошибка → open.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} временно недоступен (circuit open), повтор через {retry_in:.0f} с")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        *,
+        window: int = 20,
+        min_calls: int = 5,
+        error_rate: float = 0.5,
+        open_seconds: float = 30.0,
+    ):
+        self.name = name
+        self._window = deque(maxlen=window)
+        self._min_calls = min_calls
+        self._error_rate = error_rate
+        self._open_seconds = open_seconds
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self._open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def is_open(self) -> bool:
+        return self.state == OPEN
+
+    def before_call(self) -> None:
+        """
+        Бросает CircuitOpenError, если вызов сейчас делать нельзя.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            elapsed = time.monotonic() - self._opened_at
+            if self._state == OPEN and elapsed < self._open_seconds:
+                raise CircuitOpenError(self.name, self._open_seconds - elapsed)
+            # half-open: пропускаем ровно один пробный вызов
+            if self._trial_in_flight:
+                raise CircuitOpenError(self.name, 1.0)
+            self._state = HALF_OPEN
+            self._trial_in_flight = True
+
+    def record(self, success: bool) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trial_in_flight = False
+                if success:
+                    self._state = CLOSED
+                    self._window.clear()
+                    print(f"Circuit {self.name}: closed")
+                else:
+                    self._trip()
+                return
+
+            self._window.append(success)
+            failures = self._window.count(False)
+            if (
+                self._state == CLOSED
+                and len(self._window) >= self._min_calls
+                and failures / len(self._window) >= self._error_rate
+            ):
+                self._trip()
+
+    def _trip(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        print(f"Circuit {self.name}: open for {self._open_seconds:.0f}s")
+
+
+_BREAKERS: dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def breaker(name: str) -> CircuitBreaker:
+    with _BREAKERS_LOCK:
+        if name not in _BREAKERS:
+            _BREAKERS[name] = CircuitBreaker(name)
+        return _BREAKERS[name]
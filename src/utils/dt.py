@@ -0,0 +1,50 @@
+import re
+from datetime import datetime, timedelta
+
+import pytz
+
+from src.config import TZ
+
+
+# -------------------- Time helpers --------------------
+def tz_now():
+    return datetime.now(pytz.timezone(TZ))
+
+
+def today_date_str():
+    return tz_now().strftime("%d.%m.%Y")
+
+
+def tomorrow_date_str():
+    return (tz_now() + timedelta(days=1)).strftime("%d.%m.%Y")
+
+
+def build_dt_from_inputs(date_str: str, time_str: str) -> datetime:
+    dd, mm, yyyy = date_str.split(".")
+    hh, mi = time_str.split(":")
+    return datetime(int(yyyy), int(mm), int(dd), int(hh), int(mi), 0)
+
+
+# -------------------- Parsers --------------------
+def parse_date_input(s: str) -> str | None:
+    s = (s or "").strip()
+    m = re.match(r"^(\d{2})\.(\d{2})(?:\.(\d{4}))?$", s)
+    if not m:
+        return None
+    dd, mm, yyyy = m.group(1), m.group(2), m.group(3)
+    if yyyy is None:
+        yyyy = str(tz_now().year)
+
+    try:
+        datetime(int(yyyy), int(mm), int(dd))
+    except Exception:
+        return None
+    return f"{dd}.{mm}.{yyyy}"
+
+
+def parse_time_input(s: str) -> str | None:
+    s = (s or "").strip()
+    m = re.match(r"^([01]\d|2[0-3]):([0-5]\d)$", s)
+    if not m:
+        return None
+    return s
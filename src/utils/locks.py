@@ -0,0 +1,48 @@
+# src/utils/locks.py
+"""
+Блокировки по ключу внутри процесса: event_lock(event_id) — одна правка встречи за раз.
+
+Замок на ключ создаётся при первом захвате и удаляется, когда его никто не держит и не ждёт,
+так что словарь не растёт с числом встреч. Между процессами защищают версии
+(колонка version в Meetings, ETag события в Calendar), а не эти замки.
+"""
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+
+
+class KeyedLocks:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks: dict[str, list] = {}  # ключ -> [RLock, сколько потоков держат или ждут]
+
+    @contextmanager
+    def hold(self, key: str):
+        with self._lock:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.RLock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._locks)
+
+
+_EVENT_LOCKS = KeyedLocks()
+
+
+def event_lock(event_id: str):
+    """
+    with event_lock(event_id): ... — чтение, проверка версии и запись встречи без гонок в процессе.
+    """
+    return _EVENT_LOCKS.hold((event_id or "").strip())
@@ -0,0 +1,158 @@
+# src/utils/replay.py
+"""
+Очередь записей, отложенных на время недоступности Google API.
+
+- enqueue(api, op, kwargs) — операция пишется в JSONL-spool (переживает перезапуск);
+- фоновый поток по порядку (FIFO) повторяет операции, когда breaker этого API закрыт;
+- обработчики регистрируют модули-владельцы: register_handler("calendar.delete", fn).
+
+Пока в очереди есть записи для API, новые записи в этот API тоже идут в очередь
+(has_pending), чтобы более поздняя правка не обогнала более раннюю.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict
+
+from src.config import REPLAY_SPOOL_PATH
+from src.utils.circuit import breaker
+from src.utils.retry import is_outage
+
+_HANDLERS: Dict[str, Callable] = {}
+
+REPLAY_INTERVAL = 10.0  # секунд между попытками
+
+
+def register_handler(op: str, fn: Callable) -> None:
+    _HANDLERS[op] = fn
+
+
+def _encode(v):
+    if isinstance(v, datetime):
+        return {"__dt__": v.isoformat()}
+    return v
+
+
+def _decode(v):
+    if isinstance(v, dict) and set(v) == {"__dt__"}:
+        return datetime.fromisoformat(v["__dt__"])
+    return v
+
+
+class ReplayQueue:
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+        self._items: list[dict] = self._load()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _load(self) -> list[dict]:
+        if not os.path.exists(self._path):
+            return []
+        items = []
+        with open(self._path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        items.append(json.loads(line))
+                    except ValueError:
+                        print("Replay: skip broken line:", line[:80])
+        return items
+
+    def _save(self) -> None:
+        d = os.path.dirname(self._path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        tmp = self._path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for it in self._items:
+                f.write(json.dumps(it, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path)
+
+    def enqueue(self, api: str, op: str, kwargs: dict) -> None:
+        with self._lock:
+            self._items.append({"api": api, "op": op, "kwargs": {k: _encode(v) for k, v in kwargs.items()}})
+            self._save()
+        print(f"Replay: queued {op} ({len(self._items)} pending)")
+        self.start()
+        self._wake.set()
+
+    def has_pending(self, api: str) -> bool:
+        with self._lock:
+            return any(it["api"] == api for it in self._items)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def replay_once(self) -> int:
+        """
+        Выполняет операции по порядку, пока не упрёмся в ошибку. Возвращает число выполненных.
+        """
+        done = 0
+        while True:
+            with self._lock:
+                if not self._items:
+                    return done
+                item = self._items[0]
+
+            if breaker(item["api"]).is_open():
+                return done
+
+            handler = _HANDLERS.get(item["op"])
+            if handler is None:
+                # модуль-владелец ещё не импортирован в этом процессе — попробуем позже
+                return done
+
+            try:
+                handler(**{k: _decode(v) for k, v in item["kwargs"].items()})
+            except Exception as e:
+                if is_outage(e):
+                    return done
+                # операция больше не применима (например, событие удалено) — не блокируем очередь
+                print(f"Replay: drop {item['op']}:", repr(e))
+
+            with self._lock:
+                if self._items and self._items[0] is item:
+                    self._items.pop(0)
+                    self._save()
+            done += 1
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="replay-queue", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(REPLAY_INTERVAL)
+            self._wake.clear()
+            try:
+                n = self.replay_once()
+                if n:
+                    print(f"Replay: applied {n} queued write(s), {len(self)} left")
+            except Exception as e:
+                print("Replay error:", repr(e))
+
+
+_QUEUE: ReplayQueue | None = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def replay_queue() -> ReplayQueue:
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is None:
+            _QUEUE = ReplayQueue(REPLAY_SPOOL_PATH)
+            if len(_QUEUE):
+                _QUEUE.start()
+    return _QUEUE
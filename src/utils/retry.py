@@ -0,0 +1,239 @@
+# src/utils/retry.py
+"""
+Общая политика повторов для Google API (Calendar и Sheets).
+
+- экспоненциальная задержка с jitter (full jitter), уважаем Retry-After;
+- бюджет на повторы одного запроса (секунды) и максимум попыток;
+- клиентский token bucket под поминутную квоту каждого API;
+- счётчики: вызовы, повторы, ожидание в bucket, окончательные ошибки;
+- circuit breaker на каждый API (src/utils/circuit.py): при высокой доле сбоев — CircuitOpenError сразу.
+
+Использование:
+    call_google("calendar", request.execute)
+    call_google("sheets", ws.append_rows, rows, idempotent=False)
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+from src.utils.circuit import CircuitOpenError, breaker
+from src.config import (
+    SHEETS_RATE_PER_MIN,
+    CALENDAR_RATE_PER_MIN,
+    GOOGLE_RETRY_BUDGET,
+    GOOGLE_RETRY_ATTEMPTS,
+)
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+# -------------------- Token bucket --------------------
+class TokenBucket:
+    """
+    rate_per_min токенов в минуту, ёмкость burst (по умолчанию — 1/6 минутной квоты).
+    acquire() блокирует, пока токенов не хватает; возвращает, сколько секунд ждали.
+    """
+
+    def __init__(self, rate_per_min: float, burst: float | None = None):
+        self._rate = max(rate_per_min, 0.001) / 60.0  # токенов в секунду
+        self._capacity = burst if burst is not None else max(1.0, rate_per_min / 6)
+        self._tokens = self._capacity
+        self._ts = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._ts) * self._rate)
+        self._ts = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        tokens = min(tokens, self._capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                need = (tokens - self._tokens) / self._rate
+            time.sleep(need)
+            waited += need
+
+
+# -------------------- Policy / metrics --------------------
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 5
+    base_delay: float = 0.5
+    max_delay: float = 16.0
+    budget: float = 30.0  # секунд на все повторы одного запроса
+
+
+_METRICS_LOCK = threading.Lock()
+_METRICS: dict[str, dict[str, float]] = {}
+
+
+def _metric(api: str, key: str, value: float = 1) -> None:
+    with _METRICS_LOCK:
+        m = _METRICS.setdefault(api, {"calls": 0, "retries": 0, "throttled": 0, "throttle_wait": 0.0, "failures": 0})
+        m[key] = m.get(key, 0) + value
+
+
+def retry_metrics() -> dict[str, dict[str, float]]:
+    with _METRICS_LOCK:
+        return {api: dict(m) for api, m in _METRICS.items()}
+
+
+def format_retry_metrics() -> str:
+    parts = []
+    for api, m in sorted(retry_metrics().items()):
+        parts.append(
+            f"{api}: calls={int(m['calls'])} retries={int(m['retries'])} "
+            f"throttled={int(m['throttled'])} wait={m['throttle_wait']:.1f}s failures={int(m['failures'])}"
+        )
+    return "; ".join(parts)
+
+
+_BUCKETS = {
+    "sheets": TokenBucket(SHEETS_RATE_PER_MIN),
+    "calendar": TokenBucket(CALENDAR_RATE_PER_MIN),
+}
+
+_POLICIES = {
+    "sheets": RetryPolicy(max_attempts=GOOGLE_RETRY_ATTEMPTS, budget=GOOGLE_RETRY_BUDGET),
+    "calendar": RetryPolicy(max_attempts=GOOGLE_RETRY_ATTEMPTS, budget=GOOGLE_RETRY_BUDGET),
+}
+
+
+# -------------------- Error classification --------------------
+def http_status(exc: BaseException) -> int | None:
+    """
+    HTTP-статус из ошибок googleapiclient (HttpError.resp.status)
+    и gspread (APIError.response.status_code). None — не HTTP-ошибка.
+    """
+    resp = getattr(exc, "resp", None)
+    if resp is not None and getattr(resp, "status", None) is not None:
+        try:
+            return int(resp.status)
+        except (TypeError, ValueError):
+            return None
+    response = getattr(exc, "response", None)
+    if response is not None and getattr(response, "status_code", None) is not None:
+        return int(response.status_code)
+    return None
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or getattr(exc, "resp", None)
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def is_transient(exc: BaseException) -> bool:
+    status = http_status(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    # сетевые сбои без HTTP-ответа (таймаут, разрыв соединения)
+    return isinstance(exc, (TimeoutError, ConnectionError)) or type(exc).__name__ in (
+        "ConnectionError",
+        "Timeout",
+        "ReadTimeout",
+        "TransportError",
+    )
+
+
+def is_outage(exc: BaseException) -> bool:
+    """
+    Ошибка «сервис недоступен» (а не ошибка запроса): можно отдать кэш / поставить запись в очередь.
+    """
+    return isinstance(exc, CircuitOpenError) or is_transient(exc)
+
+
+def is_rejected(exc: BaseException) -> bool:
+    """
+    Запрос точно не выполнен: отказ по квоте / ошибка запроса (4xx, кроме 408),
+    открытый breaker или отказ в соединении. Таймаут и 5xx — исход неизвестен,
+    неидемпотентная запись могла уже примениться.
+    """
+    if isinstance(exc, CircuitOpenError):
+        return True
+    status = http_status(exc)
+    if status is not None:
+        return 400 <= status < 500 and status != 408
+    # requests/urllib3 заворачивают ConnectionRefusedError в несколько слоёв
+    seen = set()
+    stack = [exc]
+    while stack:
+        e = stack.pop()
+        if e is None or id(e) in seen:
+            continue
+        seen.add(id(e))
+        if isinstance(e, ConnectionRefusedError) or type(e).__name__ == "NewConnectionError":
+            return True
+        stack.extend([e.__cause__, e.__context__, getattr(e, "reason", None)])
+        stack.extend(x for x in e.args if isinstance(x, BaseException))
+    return False
+
+
+def _should_retry(exc: BaseException, idempotent: bool) -> bool:
+    if not idempotent:
+        # неидемпотентную запись (append/insert) повторяем только если сервер её точно отверг
+        return http_status(exc) == 429
+    return is_transient(exc)
+
+
+# -------------------- Entry point --------------------
+def call_google(api: str, fn, *args, idempotent: bool = True, cost: float = 1.0, **kwargs):
+    """
+    Вызывает fn(*args, **kwargs) с квотой и повторами политики api ("sheets" / "calendar").
+    cost — сколько запросов квоты тратит вызов (например, размер batch).
+    """
+    bucket = _BUCKETS[api]
+    policy = _POLICIES[api]
+    circuit = breaker(api)
+    deadline = time.monotonic() + policy.budget
+
+    # при открытом breaker падаем сразу, не дожидаясь HTTP-таймаутов
+    circuit.before_call()
+
+    attempt = 0
+    while True:
+        waited = bucket.acquire(cost)
+        if waited > 0:
+            _metric(api, "throttled")
+            _metric(api, "throttle_wait", waited)
+
+        _metric(api, "calls")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            attempt += 1
+            retry = attempt < policy.max_attempts and _should_retry(e, idempotent)
+            if retry:
+                delay = random.uniform(0, min(policy.max_delay, policy.base_delay * (2 ** attempt)))
+                retry_after = _retry_after(e)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                # бюджет исчерпан или breaker открыли другие вызовы — дальше не повторяем
+                retry = time.monotonic() + delay <= deadline and not circuit.is_open()
+
+            if not retry:
+                _metric(api, "failures")
+                # в breaker — один исход на логический запрос, а не на каждую попытку;
+                # считаем только сбои сервиса: 4xx — ошибка запроса, 429 — просто квота
+                circuit.record(not is_transient(e) or http_status(e) == 429)
+                raise
+
+            _metric(api, "retries")
+            print(f"{api}: transient error (attempt {attempt}), retry in {delay:.1f}s:", repr(e))
+            time.sleep(delay)
+            continue
+
+        circuit.record(True)
+        return result